@@ -4,3 +4,6 @@ class ApikeyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.apikey'
     label = 'apikey'
+
+    def ready(self):
+        from . import signals
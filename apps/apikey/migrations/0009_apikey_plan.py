@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apikey', '0008_apikey_industry_category_apikey_product_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='plan',
+            field=models.CharField(choices=[('free', 'Free'), ('pro', 'Pro'), ('enterprise', 'Enterprise')], default='free', help_text='Ingestion quota tier, see RATE_LIMIT_PLANS', max_length=20),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:26
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apikey', '0009_apikey_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='sampling_rate',
+            field=models.FloatField(default=1.0, help_text='Fraction of sessions kept; emissions are scaled up by its inverse', validators=[django.core.validators.MinValueValidator(0.001), django.core.validators.MaxValueValidator(1.0)]),
+        ),
+    ]
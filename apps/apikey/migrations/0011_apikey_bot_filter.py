@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apikey', '0010_apikey_sampling_rate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='bot_filter',
+            field=models.CharField(choices=[('off', 'Off'), ('tag', 'Tag'), ('drop', 'Drop')], default='tag', help_text='What the collector does with crawler and monitoring traffic', max_length=10),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import uuid
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.utils import timezone
 from django.db import models
@@ -13,6 +14,16 @@ class Product(models.TextChoices):
     WEB = 'web', _('Web')
     LUBRICANT = 'lubricant', _('Lubricant')
 
+class Plan(models.TextChoices):
+    FREE = 'free', _('Free')
+    PRO = 'pro', _('Pro')
+    ENTERPRISE = 'enterprise', _('Enterprise')
+
+class BotFilter(models.TextChoices):
+    OFF = 'off', _('Off')
+    TAG = 'tag', _('Tag')
+    DROP = 'drop', _('Drop')
+
 class APIKey(models.Model):
     external_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, db_index=True)
     key = models.CharField(max_length=100, unique=True, db_index=True)
@@ -36,6 +47,23 @@ class APIKey(models.Model):
     usage_count = models.IntegerField(default=0)
     last_used_at = models.DateTimeField(null=True, blank=True)
     domain = models.CharField(max_length=255, default='*')
+    plan = models.CharField(
+        max_length=20,
+        choices=Plan.choices,
+        default=Plan.FREE,
+        help_text="Ingestion quota tier, see RATE_LIMIT_PLANS"
+    )
+    sampling_rate = models.FloatField(
+        default=1.0,
+        validators=[MinValueValidator(0.001), MaxValueValidator(1.0)],
+        help_text="Fraction of sessions kept; emissions are scaled up by its inverse"
+    )
+    bot_filter = models.CharField(
+        max_length=10,
+        choices=BotFilter.choices,
+        default=BotFilter.TAG,
+        help_text="What the collector does with crawler and monitoring traffic"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
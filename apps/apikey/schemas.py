@@ -18,9 +18,14 @@ class APIKeyResponse(BaseModel):
     is_active: bool
     industry_category: Optional[str] = None
     product: Optional[str] = None
+    plan: str = 'free'
+    sampling_rate: float = 1.0
+    bot_filter: str = 'tag'
     last_used_at: Optional[str] = None
     created_at: str
     conversion_rules_count: int
+    duplicate_rate: float = 0.0
+    bot_rate: float = 0.0
 
 
 class APIKeyDetailResponse(BaseModel):
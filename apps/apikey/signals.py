@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import APIKey, ConversionRule
+
+# Saves that only touch counters do not change what the tracker config serves
+COUNTER_FIELDS = {'usage_count', 'last_used_at', 'conversion_count', 'last_triggered_at'}
+
+
+def _invalidate_config(key: str, update_fields=None):
+    from core.services.apikey_service import APIKeyConfigService
+
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    APIKeyConfigService().invalidate(key)
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_key_config(sender, instance, update_fields=None, **kwargs):
+    _invalidate_config(instance.key, update_fields)
+
+
+@receiver(post_save, sender=ConversionRule)
+@receiver(post_delete, sender=ConversionRule)
+def invalidate_conversion_rule_config(sender, instance, update_fields=None, **kwargs):
+    _invalidate_config(instance.api_key.key, update_fields)
@@ -0,0 +1,150 @@
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from ..models import APIKey, ConversionRule
+from core.checks import shared_cache_check
+from core.db.apikeys import APIKeyData
+from core.services.apikey_service import APIKeyService, APIKeyUsageBuffer
+
+CONFIG_URL = '/api/v1/keys/config'
+
+
+@override_settings(APIKEY_CONFIG_MAX_AGE=60, APIKEY_CONFIG_STALE_WHILE_REVALIDATE=300)
+class APIKeyConfigTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_test_config_key',
+            name='Config Key',
+            user_id='user-1',
+            domain='example.com'
+        )
+        self.rule = ConversionRule.objects.create(
+            api_key=self.api_key,
+            name='Checkout',
+            rule_type='url',
+            url_pattern='/checkout',
+            match_type='contains'
+        )
+        patcher = mock.patch.object(APIKeyService, 'record_usage_deferred')
+        self.record_usage = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, **headers):
+        return self.client.get(CONFIG_URL, {'api_key': self.api_key.key}, headers=headers)
+
+    def test_returns_snapshot_with_cache_headers(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body['total_rules'], 1)
+        self.assertEqual(body['conversion_rules'][0]['url_pattern'], '/checkout')
+        self.assertEqual(response['ETag'], f'"{body["version"]}"')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.record_usage.assert_called_once_with(str(self.api_key.external_id))
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self._get()['ETag']
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self._get(if_none_match=f'W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_served_from_cache(self):
+        self._get()
+        with self.assertNumQueries(0):
+            response = self._get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rule_change_invalidates_snapshot(self):
+        etag = self._get()['ETag']
+
+        self.rule.url_pattern = '/thank-you'
+        self.rule.save()
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['conversion_rules'][0]['url_pattern'], '/thank-you')
+
+    def test_sampling_rate_is_served_with_the_snapshot(self):
+        self.assertEqual(self._get().json()['sampling']['rate'], 1.0)
+
+        self.api_key.sampling_rate = 0.25
+        self.api_key.save()
+
+        sampling = self._get().json()['sampling']
+        self.assertEqual(sampling['rate'], 0.25)
+        self.assertEqual(sampling['hash'], 'fnv1a32')
+        self.assertEqual(sampling['threshold'], 2 ** 30)
+
+    def test_counter_update_keeps_snapshot(self):
+        etag = self._get()['ETag']
+
+        self.rule.increment_conversion_count()
+
+        with self.assertNumQueries(0):
+            response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_deactivated_key_is_rejected(self):
+        self._get()
+
+        self.api_key.is_active = False
+        self.api_key.save()
+
+        response = self._get()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_increment_usage(self):
+        other = APIKey.objects.create(key='cc_other', name='Other', user_id='user-1')
+
+        APIKeyData().bulk_increment_usage({
+            str(self.api_key.external_id): 3,
+            str(other.external_id): 1,
+        })
+
+        self.api_key.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.api_key.usage_count, 3)
+        self.assertEqual(other.usage_count, 1)
+        self.assertIsNotNone(self.api_key.last_used_at)
+
+
+
+class APIKeyUsageBufferTests(SimpleTestCase):
+    @mock.patch('core.tasks.flush_api_key_usage_task.delay')
+    def test_idle_process_flushes_on_its_own(self, delay):
+        buffer = APIKeyUsageBuffer(flush_interval=0.2)
+        buffer.record('key-1')
+        buffer.record('key-1')
+
+        deadline = time.monotonic() + 5
+        while not delay.called and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        delay.assert_called_once_with({'key-1': 2})
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(DEBUG=False, REDIS_URL=None, CACHES=LOCMEM)
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_per_process_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in shared_cache_check(None)], ['core.W001'])
+
+    @override_settings(REDIS_URL='redis://cache:6379/0')
+    def test_redis_is_not_reported(self):
+        self.assertEqual(shared_cache_check(None), [])
+
+    @override_settings(DEBUG=True)
+    def test_development_is_not_reported(self):
+        self.assertEqual(shared_cache_check(None), [])
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from ..models import APIKey, ConversionRule
+from core.rules.conversion_rules import AhoCorasick, ConversionRuleMatcher
+from core.tasks import process_event_batch_task
+
+
+def _rule(rule_id, match_type, url_pattern, priority=0, rule_type='url'):
+    return {
+        'id': rule_id,
+        'rule_type': rule_type,
+        'match_type': match_type,
+        'url_pattern': url_pattern,
+        'priority': priority,
+    }
+
+
+class ConversionRuleMatcherTestCase(TestCase):
+    def test_aho_corasick_finds_overlapping_patterns(self):
+        automaton = AhoCorasick([('he', 'a'), ('she', 'b'), ('hers', 'c'), ('his', 'd')])
+        self.assertEqual(automaton.search('ushers'), {'a', 'b', 'c'})
+        self.assertEqual(automaton.search('nothing'), set())
+
+    def test_match_types(self):
+        matcher = ConversionRuleMatcher([
+            _rule('exact', 'exact', '/thank-you'),
+            _rule('contains', 'contains', 'checkout'),
+            _rule('prefix', 'starts_with', '/shop/'),
+            _rule('suffix', 'ends_with', '/done'),
+            _rule('regex', 'regex', r'/order/\d+$'),
+            _rule('regex-2', 'regex', r'^https://other\.com'),
+            _rule('param', 'query_param', 'utm_source=google'),
+            _rule('param-any', 'query_param', 'gclid'),
+            _rule('click', 'contains', 'checkout', rule_type='click'),
+        ])
+
+        self.assertEqual(matcher.rule_count, 8)
+        self.assertEqual(matcher.match('https://example.com/thank-you'), ['exact'])
+        self.assertEqual(matcher.match('https://example.com/checkout/step-1'), ['contains'])
+        self.assertEqual(matcher.match('https://example.com/shop/item'), ['prefix'])
+        self.assertEqual(matcher.match('https://example.com/flow/done'), ['suffix'])
+        self.assertEqual(matcher.match('https://example.com/order/42'), ['regex'])
+        self.assertEqual(matcher.match('https://example.com/?utm_source=google'), ['param'])
+        self.assertEqual(matcher.match('https://example.com/?utm_source=bing'), [])
+        self.assertEqual(matcher.match('https://example.com/?gclid=abc'), ['param-any'])
+        self.assertEqual(matcher.match('https://example.com/about'), [])
+
+    def test_results_ordered_by_priority(self):
+        matcher = ConversionRuleMatcher([
+            _rule('low', 'contains', 'checkout', priority=1),
+            _rule('high', 'starts_with', '/checkout', priority=10),
+        ])
+        self.assertEqual(matcher.match('https://example.com/checkout'), ['high', 'low'])
+
+    def test_invalid_regex_is_skipped(self):
+        matcher = ConversionRuleMatcher([_rule('bad', 'regex', '(unclosed')])
+        self.assertEqual(matcher.rule_count, 0)
+        self.assertEqual(matcher.match('https://example.com/(unclosed'), [])
+
+
+class PageViewConversionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_conversion_key',
+            name='Conversion Key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+        self.rule = ConversionRule.objects.create(
+            api_key=self.api_key,
+            name='Thank you page',
+            rule_type='url',
+            url_pattern='/thank-you',
+            match_type='ends_with'
+        )
+
+    def _event(self, event_id, page_url):
+        return {
+            'event_type': 'internet_web',
+            'user_id': 'user-1',
+            'api_key': self.api_key.key,
+            'payload': {
+                'event': 'page_view',
+                'session_id': 'session-1',
+                'tracker_token': self.api_key.key,
+                'event_id': event_id,
+                'user_id': 'visitor-1',
+                'page_url': page_url,
+                'timestamp': datetime.now(timezone.utc),
+                'utm_params': {},
+            },
+        }
+
+    @mock.patch('core.services.session.session_service.SessionService.update_or_create')
+    def test_page_views_increment_matched_rules_in_bulk(self, update_session):
+        result = process_event_batch_task.apply(args=[[
+            self._event('evt-1', 'https://example.com/thank-you'),
+            self._event('evt-2', 'https://example.com/thank-you'),
+            self._event('evt-3', 'https://example.com/pricing'),
+        ]]).get()
+
+        self.assertEqual(result['processed'], 3)
+        self.rule.refresh_from_db()
+        self.assertEqual(self.rule.conversion_count, 2)
+        self.assertIsNotNone(self.rule.last_triggered_at)
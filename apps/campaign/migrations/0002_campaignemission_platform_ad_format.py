@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='campaignemission',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='campaignemission',
+            name='ad_format',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='campaignemission',
+            name='platform',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AlterUniqueTogether(
+            name='campaignemission',
+            unique_together={('campaign', 'date', 'hour', 'country', 'region', 'device_type', 'platform', 'ad_format')},
+        ),
+    ]
@@ -82,6 +82,9 @@ class CampaignEmission(models.Model):
     city = models.CharField(max_length=100, blank=True, default='')
     
     device_type = models.CharField(max_length=50, default='desktop', db_index=True)
+    # set by ad report ingestion; empty for rollups that do not split by them
+    platform = models.CharField(max_length=50, blank=True, default='')
+    ad_format = models.CharField(max_length=50, blank=True, default='')
     page_views = models.IntegerField(default=0)
     clicks = models.IntegerField(default=0)
     conversions = models.IntegerField(default=0)
@@ -122,7 +125,7 @@ class CampaignEmission(models.Model):
 
     class Meta:
         db_table = 'campaign_emissions'
-        unique_together = [['campaign', 'date', 'hour', 'country', 'region', 'device_type']]
+        unique_together = [['campaign', 'date', 'hour', 'country', 'region', 'device_type', 'platform', 'ad_format']]
         indexes = [
             models.Index(fields=['campaign', 'date']),
             models.Index(fields=['country', 'date']),
@@ -0,0 +1,120 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.auth.models import User
+from apps.campaign.models import Campaign, CampaignEmission
+from apps.common import serialization
+from apps.event.models import CarbonBalance, CarbonTransaction
+from calculators import InternetAdsCalculator
+
+REPORT_URL = '/api/v1/events/ads/'
+
+
+@override_settings(ADS_REPORT_MAX_ROWS=10)
+class AdReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='ads@example.com')
+        self.campaign = Campaign.objects.create(user=self.user, name='Spring sale')
+        APIKey.objects.create(
+            key='cc_ads_key',
+            name='Ads key',
+            user_id=self.user.id,
+            industry_category='internet',
+            product='ads'
+        )
+
+    def _row(self, **fields) -> dict:
+        row = {
+            'campaign_id': str(self.campaign.external_id),
+            'date': '2025-01-01',
+            'hour': 9,
+            'platform': 'meta',
+            'ad_format': 'video',
+            'device_type': 'mobile',
+            'country': 'GB',
+            'impressions': 1_000_000,
+            'clicks': 2_000,
+            'conversions': 40,
+        }
+        row.update(fields)
+        return row
+
+    def _post(self, rows, key='cc_ads_key', **body):
+        return self.client.post(
+            REPORT_URL,
+            serialization.dumps({'rows': rows, **body}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': key}
+        )
+
+    def test_rows_become_rollups_and_one_ledger_entry(self):
+        response = self._post([self._row(), self._row(device_type='desktop')], report_id='report-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(serialization.loads(response.content)['rows'], 2)
+        emission = CampaignEmission.objects.get(device_type='mobile')
+        self.assertEqual(emission.platform, 'meta')
+        self.assertEqual(emission.ad_format, 'video')
+        self.assertEqual(emission.impressions, 1_000_000)
+        expected_kg = InternetAdsCalculator().calculate({
+            'platform': 'meta', 'ad_format': 'video', 'impressions': 1_000_000,
+            'clicks': 2_000, 'conversions': 40, 'device_type': 'mobile', 'country_code': 'GB',
+        })['total_emissions_kg']
+        self.assertAlmostEqual(float(emission.total_emissions_g), expected_kg * 1000, places=5)
+
+        transaction = CarbonTransaction.objects.get()
+        self.assertEqual(transaction.reference_id, 'report-1')
+        self.assertEqual(transaction.reference_type, 'internet_ads_report')
+        total_g = sum(e.total_emissions_g for e in CampaignEmission.objects.all())
+        self.assertEqual(transaction.amount_kg, (total_g / 1000).quantize(Decimal('0.000001')))
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.total_impressions, 2_000_000)
+
+    def test_resent_report_books_nothing(self):
+        self._post([self._row()])
+
+        response = self._post([self._row()])
+
+        self.assertEqual(serialization.loads(response.content)['kg_co2_delta'], 0)
+        self.assertEqual(CampaignEmission.objects.count(), 1)
+        self.assertEqual(CarbonTransaction.objects.count(), 1)
+
+    def test_daily_rows_are_replaced_not_duplicated(self):
+        self._post([self._row(hour=None)])
+
+        response = self._post([self._row(hour=None)])
+
+        self.assertEqual(serialization.loads(response.content)['kg_co2_delta'], 0)
+        self.assertEqual(CampaignEmission.objects.filter(hour__isnull=True).count(), 1)
+
+    def test_corrected_row_books_the_difference(self):
+        self._post([self._row()])
+        before = CarbonBalance.objects.get(user_id=self.user.id).total_emissions_kg
+
+        self._post([self._row(impressions=500_000, clicks=1_000, conversions=20)])
+
+        after = CarbonBalance.objects.get(user_id=self.user.id).total_emissions_kg
+        self.assertAlmostEqual(float(after), float(before) / 2, places=5)
+        self.assertTrue(CarbonTransaction.objects.filter(amount_kg__lt=0).exists())
+        self.assertEqual(CampaignEmission.objects.get().impressions, 500_000)
+
+    def test_rows_for_other_users_campaigns_are_rejected(self):
+        other = Campaign.objects.create(user=User.objects.create_user(email='other@example.com'), name='Other')
+
+        response = self._post([self._row(), self._row(campaign_id=str(other.external_id))])
+
+        body = serialization.loads(response.content)
+        self.assertEqual(body['rows'], 1)
+        self.assertEqual([rejected['index'] for rejected in body['rejected']], [1])
+        self.assertFalse(CampaignEmission.objects.filter(campaign=other).exists())
+
+    def test_invalid_and_oversized_reports_are_refused(self):
+        self.assertEqual(self._post([self._row(impressions=-1)]).status_code, 400)
+        self.assertEqual(self._post([self._row()] * 11).status_code, 413)
+
+    def test_web_keys_cannot_post_reports(self):
+        APIKey.objects.create(key='cc_web_key', name='Web key', user_id=self.user.id, product='web')
+
+        self.assertEqual(self._post([self._row()], key='cc_web_key').status_code, 400)
@@ -1,9 +1,24 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from apps.common import serialization
+
+
+class ORJSONResponse(JsonResponse):
+    """JsonResponse rendered with orjson; datetimes, UUIDs and Decimals serialize natively"""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        HttpResponse.__init__(self, content=serialization.dumps(data), **kwargs)
+
 
 def response_factory(data=None, message="", status=200, errors=None):
-    return JsonResponse({
+    return ORJSONResponse({
         "success": 200 <= status < 300,
         "message": message,
         "data": data,
         "errors": errors,
-    }, status=status)
\ No newline at end of file
+    }, status=status)
@@ -0,0 +1,41 @@
+from decimal import Decimal
+import orjson
+
+CONTENT_TYPE = 'application/x-orjson'
+
+JSONDecodeError = orjson.JSONDecodeError
+
+_DEFAULT_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # datetime, date, UUID and dataclasses are handled natively by orjson
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, sort_keys: bool = False) -> bytes:
+    option = _DEFAULT_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _DEFAULT_OPTIONS
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+def register_kombu_serializer():
+    """Make 'orjson' available as a Celery task/result serializer"""
+    from kombu.serialization import register
+
+    register(
+        'orjson',
+        dumps,
+        loads,
+        content_type=CONTENT_TYPE,
+        content_encoding='utf-8'
+    )
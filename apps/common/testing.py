@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Optional
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """Allowed SQL statements for an operation: `base` plus `per_item` for every input item"""
+    base: int
+    per_item: int = 0
+
+    def limit(self, items: int) -> int:
+        return self.base + self.per_item * items
+
+
+class QueryBudgetMixin:
+    """
+    Assertions for TestCase subclasses that fail when an endpoint or task runs
+    more queries than its budget. Checking at several input sizes catches
+    per-item queries that a single small fixture would hide.
+    """
+
+    def assertWithinQueryBudget(self, budget: QueryBudget, items: int, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+
+        limit = budget.limit(items)
+        if len(context) > limit:
+            statements = '\n'.join(
+                f"  {index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f"{len(context)} queries for {items} item(s), budget is {limit} "
+                f"({budget.base} + {budget.per_item}/item):\n{statements}"
+            )
+        return result
+
+    def assertQueryBudgetScales(self, budget: QueryBudget, run, sizes=(1, 10)):
+        """run(size) prepares fresh fixtures and returns the callable to measure"""
+        for size in sizes:
+            with self.subTest(items=size):
+                self.assertWithinQueryBudget(budget, size, run(size))
+
+
+def queued_event(
+    index: int,
+    user_id: str = 'user-1',
+    session_id: str = 'session-1',
+    api_key: str = 'cc_test_key',
+    event_id: Optional[str] = None
+) -> dict:
+    """An internet_web page_view as the collector queues it for the worker"""
+    return {
+        'event_type': 'internet_web',
+        'payload': {
+            'event': 'page_view',
+            'event_id': event_id or f'evt-{index}',
+            'session_id': session_id,
+            'page_url': f'https://example.com/{index}',
+            'timestamp': '2025-01-01T00:00:00+00:00',
+        },
+        'api_key': api_key,
+        'user_id': user_id,
+        'industry_category': 'internet',
+        'product': 'web',
+    }
+
+
+def sdk_payload(index: int, tracker_token: str = 'cc_test_key', session_id: str = 'session-1', **fields) -> dict:
+    """A page_view as the browser SDK posts it to the collector"""
+    payload = {
+        'event': 'page_view',
+        'session_id': session_id,
+        'tracker_token': tracker_token,
+        'event_id': f'evt-{index}',
+        'user_id': 'visitor-1',
+        'page_url': f'https://example.com/{index}',
+        'timestamp': '2025-01-01T00:00:00Z',
+    }
+    payload.update(fields)
+    return payload
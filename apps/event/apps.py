@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class EventConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.event'
+
+    def ready(self):
+        from apps.common.serialization import register_kombu_serializer
+        register_kombu_serializer()
@@ -0,0 +1,58 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.common import serialization
+from core.services.geolocation import build_index, geojson_regions
+
+
+class Command(BaseCommand):
+    help = "Build the reverse geocoding grid index (GEO_INDEX_PATH) from a GeoJSON boundary dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+', help="GeoJSON FeatureCollection files, later files win on overlap")
+        parser.add_argument('--output', default=None, help="Index file to write (default: GEO_INDEX_PATH)")
+        parser.add_argument(
+            '--code-property', action='append', dest='code_properties',
+            help="Feature property holding the ISO 3166 code; repeat to try several in order "
+                 "(default: iso_3166_2, ISO_A2_EH, ISO_A2)"
+        )
+        parser.add_argument('--cell-degrees', type=int, default=1, help="Coarse cell size in whole degrees")
+        parser.add_argument(
+            '--subcells', type=int, default=20,
+            help="Fine cells per coarse cell side in border cells (1 degree / 20 is ~5.5 km)"
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.GEO_INDEX_PATH
+        if not output:
+            raise CommandError("Pass --output or set GEO_INDEX_PATH")
+        code_properties = options['code_properties'] or ['iso_3166_2', 'ISO_A2_EH', 'ISO_A2']
+
+        regions = []
+        for source in options['sources']:
+            try:
+                with open(source, 'rb') as f:
+                    collection = serialization.loads(f.read())
+            except (OSError, serialization.JSONDecodeError) as e:
+                raise CommandError(f"Cannot read {source}: {e}")
+            regions.extend(geojson_regions(collection, code_properties))
+        if not regions:
+            raise CommandError(f"No polygons with a usable {' / '.join(code_properties)} property")
+
+        started_at = time.perf_counter()
+        try:
+            data = build_index(regions, options['cell_degrees'], options['subcells'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        # readers mmap the file; replace it atomically
+        temporary = f"{output}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, output)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output}: {len({code for code, _ in regions})} regions, "
+            f"{len(data) / (1024 * 1024):.1f} MB in {time.perf_counter() - started_at:.1f}s"
+        ))
@@ -0,0 +1,49 @@
+import time
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from core.services.outbox_relay import OutboxRelay
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publish events from the event_outbox table to the broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain what is publishable now and exit")
+        parser.add_argument(
+            '--batch', type=int, default=settings.EVENT_OUTBOX_RELAY_BATCH,
+            help="Rows claimed per transaction"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.EVENT_OUTBOX_POLL_INTERVAL,
+            help="Seconds to sleep when the outbox has nothing publishable"
+        )
+
+    def handle(self, *args, **options):
+        if settings.EVENT_QUEUE_BACKEND == 'postgres':
+            raise CommandError("The outbox is consumed by run_event_worker when EVENT_QUEUE_BACKEND = 'postgres'")
+
+        relay = OutboxRelay()
+        totals = {'published': 0, 'deferred': 0}
+        self.stdout.write(f"Outbox backlog: {relay.outbox.backlog()} events")
+
+        try:
+            while True:
+                result = relay.relay_once(options['batch'])
+                totals['published'] += result['published']
+                totals['deferred'] += result['deferred']
+
+                # a full claim means there is more waiting
+                if result['claimed'] >= options['batch'] and result['published']:
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            logger.info("Outbox relay stopped")
+
+        self.stdout.write(f"Published {totals['published']} events, deferred {totals['deferred']}")
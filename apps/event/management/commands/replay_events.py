@@ -0,0 +1,143 @@
+import time
+import uuid
+import statistics
+from typing import Any, Dict, List
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.services.event_capture import capture_files, read_captures
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Replay captured collector traffic (EVENT_CAPTURE_DIR files) into process_event_batch_task"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Capture files or directories")
+        parser.add_argument(
+            '--mode', choices=('eager', 'broker'), default='eager',
+            help="eager runs the task in this process; broker publishes to the queue"
+        )
+        parser.add_argument(
+            '--speed', type=float, default=0.0,
+            help="Pacing multiplier against the captured arrival times (1 = real time, 0 = as fast as possible)"
+        )
+        parser.add_argument('--limit', type=int, default=0, help="Stop after this many batches")
+        parser.add_argument(
+            '--fresh-ids', action='store_true',
+            help="Suffix event ids with a per-run token so a capture can be replayed against the same database"
+        )
+        parser.add_argument(
+            '--verify-idempotency', action='store_true',
+            help="Replay every batch a second time (eager only) and fail if anything is processed twice"
+        )
+
+    def handle(self, *args, **options):
+        from core.tasks import process_event_batch_task
+
+        if options['speed'] < 0:
+            raise CommandError("--speed cannot be negative")
+        if options['verify_idempotency'] and options['mode'] != 'eager':
+            raise CommandError("--verify-idempotency needs --mode eager")
+        if not capture_files(options['paths']):
+            raise CommandError("No capture files found")
+
+        eager = options['mode'] == 'eager'
+        id_suffix = f"-replay-{uuid.uuid4().hex[:8]}" if options['fresh_ids'] else ''
+        totals = {'processed': 0, 'skipped': 0, 'failed': 0}
+        latencies = []
+        replayed = []
+        event_count = 0
+
+        started_at = time.perf_counter()
+        first_captured_at = None
+
+        for captured in read_captures(options['paths']):
+            if options['limit'] and len(latencies) >= options['limit']:
+                break
+
+            if options['speed'] > 0:
+                if first_captured_at is None:
+                    first_captured_at = captured['t']
+                due = started_at + (captured['t'] - first_captured_at) / options['speed']
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            events = self._prepare(captured['events'], id_suffix)
+            event_count += len(events)
+
+            batch_started_at = time.perf_counter()
+            if eager:
+                outcome = process_event_batch_task.apply(args=[events]).get(propagate=False)
+                self._add_outcome(totals, outcome)
+            else:
+                process_event_batch_task.delay(events)
+            latencies.append(time.perf_counter() - batch_started_at)
+
+            if options['verify_idempotency']:
+                replayed.append(events)
+
+        elapsed = time.perf_counter() - started_at
+        self._report(latencies, event_count, elapsed, totals if eager else None)
+
+        if options['verify_idempotency']:
+            self._verify_idempotency(process_event_batch_task, replayed)
+
+    def _prepare(self, events: List[Dict[str, Any]], id_suffix: str) -> List[Dict[str, Any]]:
+        queued_at = timezone.now()
+        prepared = []
+        for event in events:
+            payload = dict(event['payload'])
+            if id_suffix and payload.get('event_id'):
+                payload['event_id'] = f"{payload['event_id']}{id_suffix}"
+            prepared.append({**event, 'payload': payload, 'queued_at': queued_at})
+        return prepared
+
+    def _add_outcome(self, totals: Dict[str, int], outcome):
+        if not isinstance(outcome, dict):
+            totals['failed'] += 1
+            return
+        for key in totals:
+            totals[key] += outcome.get(key, 0)
+
+    def _report(self, latencies: List[float], event_count: int, elapsed: float, totals):
+        samples = sorted(latencies)
+        label = 'task' if totals is not None else 'publish'
+
+        self.stdout.write(f"Replayed {len(samples)} batches ({event_count} events) in {elapsed:.2f}s")
+        if elapsed > 0:
+            self.stdout.write(
+                f"Throughput: {event_count / elapsed:.1f} events/s, {len(samples) / elapsed:.1f} batches/s"
+            )
+        if samples:
+            self.stdout.write(
+                f"Per-batch {label} latency: "
+                f"mean {statistics.fmean(samples) * 1000:.1f}ms, "
+                f"p50 {_percentile(samples, 0.50) * 1000:.1f}ms, "
+                f"p95 {_percentile(samples, 0.95) * 1000:.1f}ms, "
+                f"p99 {_percentile(samples, 0.99) * 1000:.1f}ms, "
+                f"max {samples[-1] * 1000:.1f}ms"
+            )
+        if totals is not None:
+            self.stdout.write(
+                f"Outcome: {totals['processed']} processed, {totals['skipped']} skipped, {totals['failed']} failed"
+            )
+
+    def _verify_idempotency(self, task, replayed: List[List[Dict[str, Any]]]):
+        totals = {'processed': 0, 'skipped': 0, 'failed': 0}
+        for events in replayed:
+            self._add_outcome(totals, task.apply(args=[events]).get(propagate=False))
+
+        if totals['processed']:
+            raise CommandError(
+                f"Idempotency check failed: {totals['processed']} events were processed again "
+                f"({totals['skipped']} skipped)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Idempotency check passed: second pass skipped {totals['skipped']} events"
+        ))
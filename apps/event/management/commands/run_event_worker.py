@@ -0,0 +1,61 @@
+import time
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from core.services.local_queue import LocalQueueWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Consume the local event queue (EVENT_QUEUE_BACKEND = 'postgres') without a broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain what is visible now and exit")
+        parser.add_argument(
+            '--batch', type=int, default=settings.EVENT_QUEUE_BATCH_SIZE,
+            help="Events leased per poll"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.EVENT_QUEUE_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty"
+        )
+
+    def handle(self, *args, **options):
+        if settings.EVENT_QUEUE_BACKEND != 'postgres':
+            raise CommandError("run_event_worker needs EVENT_QUEUE_BACKEND = 'postgres'")
+
+        self._start_metrics_server()
+        worker = LocalQueueWorker(batch_size=options['batch'])
+        totals = {'processed': 0, 'skipped': 0, 'failed': 0}
+
+        try:
+            while True:
+                result = worker.run_once()
+                for key in totals:
+                    totals[key] += result[key]
+
+                # fair leases can come back short while others wait; only an
+                # empty lease means the queue is drained
+                if result['leased']:
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            logger.info("Local event worker stopped")
+
+        self.stdout.write(
+            f"Processed {totals['processed']} events, skipped {totals['skipped']}, failed {totals['failed']}"
+        )
+
+    def _start_metrics_server(self):
+        if not settings.WORKER_METRICS_PORT:
+            return
+        from prometheus_client import start_http_server
+        from core.metrics import collect_registry
+
+        start_http_server(settings.WORKER_METRICS_PORT, registry=collect_registry())
+        logger.info(f"Worker metrics listening on :{settings.WORKER_METRICS_PORT}")
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:05
+
+import django.core.serializers.json
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_activesession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=100)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('user_id', models.CharField(max_length=255)),
+                ('api_key', models.CharField(max_length=255)),
+                ('api_key_id', models.CharField(blank=True, default='', max_length=64)),
+                ('session_id', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('industry_category', models.CharField(blank=True, max_length=50, null=True)),
+                ('product', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'event_outbox',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FailedEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('payload', models.JSONField()),
+                ('error_message', models.TextField()),
+                ('error_traceback', models.TextField(blank=True)),
+                ('retry_count', models.IntegerField(default=0)),
+                ('max_retries', models.IntegerField(default=3)),
+                ('status', models.CharField(choices=[('pending', 'Pending Retry'), ('processing', 'Processing'), ('resolved', 'Resolved'), ('abandoned', 'Abandoned')], db_index=True, default='pending', max_length=20)),
+                ('original_queue_message_id', models.CharField(blank=True, max_length=255)),
+                ('dlq_message_id', models.CharField(blank=True, max_length=255)),
+                ('failed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('last_retry_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'failed_events',
+                'ordering': ['-failed_at'],
+                'indexes': [models.Index(fields=['status', 'retry_count'], name='failed_even_status_775d9c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0004_failedevent_eventoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventoutbox',
+            name='lease_id',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
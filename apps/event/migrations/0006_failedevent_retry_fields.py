@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:09
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0005_eventoutbox_lease_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='failedevent',
+            name='api_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='failedevent',
+            name='event_type',
+            field=models.CharField(default='unknown', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='failedevent',
+            name='next_retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='failedevent',
+            name='user_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='failedevent',
+            name='payload',
+            field=models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddIndex(
+            model_name='failedevent',
+            index=models.Index(fields=['status', 'next_retry_at'], name='failed_even_status_78cff0_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0006_failedevent_retry_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventoutbox',
+            index=models.Index(fields=['user_id', 'id'], name='event_outbo_user_id_838860_idx'),
+        ),
+    ]
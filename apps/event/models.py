@@ -1,4 +1,5 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from apps.apikey.models import APIKey
@@ -126,6 +127,39 @@ class ProcessedEvent(models.Model):
     
     def __str__(self):
         return f"{self.reference_type}:{self.reference_id}"
+
+
+class EventOutbox(models.Model):
+    """
+    Validated events waiting for the relay to publish them to the broker, or,
+    with EVENT_QUEUE_BACKEND = 'postgres', the queue the local worker consumes
+    """
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    user_id = models.CharField(max_length=255)
+    api_key = models.CharField(max_length=255)
+    api_key_id = models.CharField(max_length=64, blank=True, default='')
+    session_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    industry_category = models.CharField(max_length=50, null=True, blank=True)
+    product = models.CharField(max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_error = models.TextField(blank=True, default='')
+    lease_id = models.UUIDField(null=True, blank=True, db_index=True)
+    
+    class Meta:
+        db_table = 'event_outbox'
+        ordering = ['id']
+        indexes = [
+            # per-tenant leases of the local queue worker
+            models.Index(fields=['user_id', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"Outbox {self.event_type} #{self.id}"
+
+
 class CarbonBalance(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     user_id = models.CharField(max_length=255, unique=True, db_index=True)
@@ -167,7 +201,10 @@ class CarbonTransaction(models.Model):
         
 class FailedEvent(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    payload = models.JSONField()
+    event_type = models.CharField(max_length=100, default='unknown')
+    user_id = models.CharField(max_length=255, blank=True, default='')
+    api_key = models.CharField(max_length=255, blank=True, default='')
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
     error_message = models.TextField()
     error_traceback = models.TextField(blank=True)
     retry_count = models.IntegerField(default=0)
@@ -187,6 +224,7 @@ class FailedEvent(models.Model):
     dlq_message_id = models.CharField(max_length=255, blank=True)
     failed_at = models.DateTimeField(auto_now_add=True, db_index=True)
     last_retry_at = models.DateTimeField(null=True, blank=True)
+    next_retry_at = models.DateTimeField(null=True, blank=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
@@ -194,6 +232,7 @@ class FailedEvent(models.Model):
         ordering = ['-failed_at']
         indexes = [
             models.Index(fields=['status', 'retry_count']),
+            models.Index(fields=['status', 'next_retry_at']),
         ]
     
     def __str__(self):
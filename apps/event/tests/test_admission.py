@@ -0,0 +1,185 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from apps.event.models import EventOutbox
+from core.services import admission
+from core.services.admission import AdmissionController, report_worker_lag
+from domain.internet.web.processers import InternetWebProcessor
+
+
+def _payload(index: int, event: str = 'page_view', **fields) -> dict:
+    payload = {
+        'event': event,
+        'session_id': 'session-1',
+        'tracker_token': 'cc_admission_key',
+        'event_id': f'evt-{index}',
+        'user_id': 'visitor-1',
+        'page_url': f'https://example.com/{index}',
+        'timestamp': '2025-01-01T00:00:00Z',
+    }
+    payload.update(fields)
+    return payload
+
+
+def _backlog(count: int):
+    EventOutbox.objects.bulk_create([
+        EventOutbox(event_type='internet_web', payload={}, user_id='user-1', api_key='cc_admission_key')
+        for _ in range(count)
+    ])
+
+
+@override_settings(
+    ADMISSION_CONTROL_ENABLED=True,
+    ADMISSION_DEPTH_THRESHOLDS=[2, 4, 6],
+    ADMISSION_LAG_THRESHOLDS=[30, 120, 600],
+    ADMISSION_PING_SAMPLE_RATE=0.5,
+    ADMISSION_RETRY_AFTER=15,
+    EVENT_OUTBOX_ENABLED=True,
+)
+class AdmissionControllerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.controller = AdmissionController(sample_interval=0)
+
+    def test_backlog_picks_the_level(self):
+        self.assertEqual(self.controller.pressure().level, admission.NORMAL)
+
+        _backlog(4)
+        pressure = self.controller.pressure()
+
+        self.assertEqual(pressure.level, admission.TRIM_PAGE_VIEWS)
+        self.assertEqual(pressure.depth, 4)
+
+    def test_worker_lag_picks_the_level(self):
+        report_worker_lag(700)
+
+        self.assertEqual(self.controller.pressure().level, admission.REJECT)
+        self.assertEqual(self.controller.retry_after(), 15)
+
+    def test_pressure_is_sampled_not_read_per_request(self):
+        controller = AdmissionController(sample_interval=60)
+        controller.pressure()
+
+        _backlog(6)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(controller.pressure().level, admission.NORMAL)
+
+    @override_settings(EVENT_OUTBOX_ENABLED=False)
+    def test_failed_probe_sheds_nothing(self):
+        with mock.patch.object(AdmissionController, '_sqs_backlog', side_effect=RuntimeError("no broker")):
+            pressure = self.controller.pressure()
+
+        self.assertEqual(pressure.level, admission.NORMAL)
+        self.assertIsNone(pressure.depth)
+
+    @mock.patch('core.services.admission.random.random', side_effect=[0.9, 0.1])
+    def test_pings_are_sampled_and_reweighted(self, _):
+        _backlog(2)
+        events = [
+            {'payload': _payload(1, 'ping', time_spent_seconds=30)},
+            {'payload': _payload(2, 'ping', time_spent_seconds=30)},
+            {'payload': _payload(3, page_title='Home')},
+        ]
+
+        admitted = self.controller.shape(events)
+
+        self.assertEqual([event['payload']['event_id'] for event in admitted], ['evt-2', 'evt-3'])
+        self.assertEqual(admitted[0]['payload']['sampling_rate'], 0.5)
+        self.assertNotIn('sampling_rate', admitted[1]['payload'])
+        self.assertEqual(admitted[1]['payload']['page_title'], 'Home')
+
+    @mock.patch('core.services.admission.random.random', return_value=0.1)
+    def test_sampled_pings_scale_their_whole_result(self, _):
+        _backlog(2)
+        ping = _payload(1, 'ping', time_spent_seconds=30, session_id='session-2')
+        processor = InternetWebProcessor()
+        unsampled = processor.process(processor.validate_payload(ping))
+
+        admitted = self.controller.shape([{'payload': processor.validate_payload({**ping, 'sampling_rate': 0.5})}])
+
+        result = processor.process(admitted[0]['payload'])
+        self.assertEqual(admitted[0]['payload']['time_spent_seconds'], 30)
+        self.assertEqual(result.kg_co2_emitted, unsampled.kg_co2_emitted * 4)
+
+    def test_page_view_detail_is_trimmed_under_more_pressure(self):
+        _backlog(4)
+
+        admitted = self.controller.shape([{'payload': _payload(1, page_title='Home', language='en')}])
+
+        self.assertNotIn('page_title', admitted[0]['payload'])
+        self.assertNotIn('language', admitted[0]['payload'])
+        self.assertEqual(admitted[0]['payload']['page_url'], 'https://example.com/1')
+
+    @override_settings(ADMISSION_CONTROL_ENABLED=False)
+    def test_disabled_controller_admits_everything(self):
+        _backlog(10)
+        events = [{'payload': _payload(1, 'ping')}]
+
+        self.assertIs(self.controller.shape(events), events)
+        self.assertEqual(self.controller.retry_after(), 0)
+
+
+@override_settings(
+    ADMISSION_CONTROL_ENABLED=True,
+    ADMISSION_LAG_THRESHOLDS=[30, 120, 600],
+    ADMISSION_PING_SAMPLE_RATE=0.0,
+    ADMISSION_RETRY_AFTER=15,
+)
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class CollectorAdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        APIKey.objects.create(
+            key='cc_admission_key',
+            name='Admission key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+        # lag alone drives these tests; keep the broker out of it
+        for patcher in (
+            mock.patch(
+                'core.api.controllers.events.get_admission_controller',
+                return_value=AdmissionController(sample_interval=0)
+            ),
+            mock.patch.object(AdmissionController, '_backlog', return_value=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, payloads):
+        return self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': payloads}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_admission_key'}
+        )
+
+    def test_overloaded_collector_answers_503_with_retry_after(self, apply_async):
+        report_worker_lag(900)
+
+        response = self._post([_payload(1)])
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '15')
+        apply_async.assert_not_called()
+
+    def test_sampled_out_batches_are_accepted_without_queueing(self, apply_async):
+        report_worker_lag(60)
+
+        response = self._post([_payload(1, 'ping'), _payload(2, 'ping')])
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(serialization.loads(response.content)['event_count'], 0)
+        apply_async.assert_not_called()
+
+    def test_page_views_still_flow_while_pings_are_shed(self, apply_async):
+        report_worker_lag(60)
+
+        response = self._post([_payload(1, 'ping'), _payload(2)])
+
+        self.assertEqual(serialization.loads(response.content)['event_count'], 1)
+        apply_async.assert_called_once()
@@ -0,0 +1,109 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from apps.event.models import ProcessedEvent, Session
+from core.tasks import process_events
+from domain.internet.web.processers import InternetWebProcessor
+
+
+def _aggregate(**fields) -> dict:
+    payload = {
+        'event': 'aggregate',
+        'aggregate_event': 'page_view',
+        'count': 100,
+        'total_bytes': 100 * 400_000,
+        'session_id': 'session-1',
+        'tracker_token': 'cc_aggregate_key',
+        'user_id': 'visitor-1',
+        'page_url': 'https://example.com/',
+        'timestamp': '2025-01-01T12:00:41Z',
+    }
+    payload.update(fields)
+    return payload
+
+
+class AggregateValidationTests(SimpleTestCase):
+    def setUp(self):
+        self.processor = InternetWebProcessor()
+
+    def test_window_is_the_identity(self):
+        first = self.processor.validate_payload(_aggregate())
+        resent = self.processor.validate_payload(_aggregate(event_id='client-id', timestamp='2025-01-01T12:00:59Z'))
+        next_minute = self.processor.validate_payload(_aggregate(timestamp='2025-01-01T12:01:00Z'))
+
+        self.assertEqual(first['window_start'].isoformat(), '2025-01-01T12:00:00+00:00')
+        self.assertEqual(first['window_seconds'], 60)
+        self.assertEqual(first['event_id'], resent['event_id'])
+        self.assertNotEqual(first['event_id'], next_minute['event_id'])
+
+    def test_invalid_aggregates_are_rejected_individually(self):
+        validated, errors = self.processor.validate_batch([
+            _aggregate(),
+            _aggregate(aggregate_event='conversion'),
+            _aggregate(count=0),
+        ])
+
+        self.assertEqual(len(validated), 1)
+        self.assertEqual([index for index, _ in errors], [1, 2])
+
+    def test_emissions_match_the_events_it_stands_for(self):
+        single = self.processor.process(self.processor.validate_payload({
+            **_aggregate(), 'event': 'page_view', 'event_id': 'evt-1', 'bytesPerPageView': 400_000
+        }))
+
+        result = self.processor.process(self.processor.validate_payload(_aggregate()))
+
+        self.assertAlmostEqual(float(result.kg_co2_emitted), float(single.kg_co2_emitted) * 100, places=12)
+        self.assertEqual(result.reference_type, 'internet_web_aggregate')
+        self.assertEqual(result.metadata['aggregate']['count'], 100)
+
+
+class AggregateProcessingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        APIKey.objects.create(
+            key='cc_aggregate_key',
+            name='Aggregate key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def _event(self, **fields) -> dict:
+        return {
+            'event_type': 'internet_web',
+            'payload': InternetWebProcessor().validate_payload(_aggregate(**fields)),
+            'user_id': 'user-1',
+            'api_key': 'cc_aggregate_key',
+        }
+
+    def test_an_aggregate_is_one_ledger_entry(self):
+        result = process_events([self._event()])
+
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(ProcessedEvent.objects.count(), 1)
+        session = Session.objects.get(session_id='session-1')
+        self.assertEqual(session.event_count, 100)
+        self.assertEqual(session.events_summary, {'page_view': 100})
+
+    def test_resent_window_is_processed_once(self):
+        process_events([self._event()])
+
+        result = process_events([self._event(event_id='retry')])
+
+        self.assertEqual(result['skipped'], 1)
+        self.assertEqual(ProcessedEvent.objects.count(), 1)
+
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_collector_accepts_aggregates(self, apply_async):
+        response = self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': [_aggregate(), _aggregate(page_url='https://example.com/pricing')]}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_aggregate_key'}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(serialization.loads(response.content)['event_count'], 2)
@@ -0,0 +1,124 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from apps.apikey.models import APIKey
+from apps.event.models import ProcessedEvent
+from calculators.base import MemoizedCalculator
+from calculators.internet_website import InternetWebsiteCalculator
+from core.tasks import process_events
+from domain.internet.ads.processers import InternetAdsProcessor
+from domain.internet.web.processers import InternetWebProcessor
+from domain.oil.processers import OilGasLubricantProcessor
+
+MOBILE_UA = 'Mozilla/5.0 (Linux; Android 14) Mobile'
+
+
+def _web(index: int, **fields) -> dict:
+    payload = {
+        'event': 'page_view',
+        'event_id': f'evt-{index}',
+        'session_id': 'session-1',
+        'tracker_token': 'cc_batch_key',
+        'user_id': 'visitor-1',
+        'page_url': f'https://example.com/{index}',
+        'timestamp': '2025-01-01T00:00:00Z',
+    }
+    payload.update(fields)
+    return InternetWebProcessor().validate_payload(payload)
+
+
+class ProcessBatchTests(SimpleTestCase):
+    def assertSameResults(self, processor, payloads):
+        batch = processor.process_batch(payloads)
+
+        self.assertEqual(len(batch), len(payloads))
+        for payload, result in zip(payloads, batch):
+            single = processor.process(payload)
+            self.assertEqual(result.kg_co2_emitted, single.kg_co2_emitted)
+            self.assertEqual(result.reference_id, single.reference_id)
+            self.assertEqual(result.reference_type, single.reference_type)
+            self.assertEqual(result.metadata, single.metadata)
+
+    def test_web_batch_matches_single_processing(self):
+        self.assertSameResults(InternetWebProcessor(), [
+            _web(1),
+            _web(2, user_agent=MOBILE_UA),
+            _web(3, user_agent=MOBILE_UA, bytesPerPageView=900_000),
+            _web(4, event='ping', time_spent_seconds=30, sampling_rate=0.5),
+            _web(5, event='aggregate', aggregate_event='page_view', count=10),
+        ])
+
+    def test_ads_batch_matches_single_processing(self):
+        processor = InternetAdsProcessor()
+        payloads = [
+            processor.validate_payload({**_web(index), 'utm_params': {'utm_source': source}})
+            for index, source in enumerate(['google', 'facebook', 'google'])
+        ]
+
+        self.assertSameResults(processor, payloads)
+
+    def test_oil_batch_matches_single_processing(self):
+        processor = OilGasLubricantProcessor()
+        payloads = [
+            processor.validate_payload({
+                'machine_id': 'press-1',
+                'run_id': f'run-{index}',
+                'volume_liters': 12.5,
+                'started_at': '2025-01-01T00:00:00Z',
+                'ended_at': '2025-01-01T01:00:00Z',
+            })
+            for index in range(3)
+        ]
+
+        self.assertSameResults(processor, payloads)
+
+    def test_repeated_inputs_are_calculated_once(self):
+        calculator = InternetWebsiteCalculator()
+        memoized = MemoizedCalculator(calculator)
+
+        with mock.patch.object(calculator, 'calculate', wraps=calculator.calculate) as calculate:
+            for _ in range(3):
+                memoized.calculate({'bytes_transferred': 1024, 'country_code': 'US'})
+            memoized.calculate({'bytes_transferred': 2048, 'country_code': 'US'})
+
+        self.assertEqual(calculate.call_count, 2)
+
+
+class WorkerBatchProcessingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        APIKey.objects.create(
+            key='cc_batch_key',
+            name='Batch key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def _events(self, count: int) -> list:
+        return [
+            {
+                'event_type': 'internet_web',
+                'payload': {**_web(index), 'timestamp': timezone.now()},
+                'user_id': 'user-1',
+                'api_key': 'cc_batch_key',
+            }
+            for index in range(count)
+        ]
+
+    def test_worker_prefers_process_batch(self):
+        with mock.patch.object(InternetWebProcessor, 'process', side_effect=AssertionError("per-event path")):
+            result = process_events(self._events(3))
+
+        self.assertEqual(result['processed'], 3)
+
+    def test_failed_batch_falls_back_to_single_events(self):
+        events = self._events(3)
+        del events[1]['payload']['event_id']
+
+        result = process_events(events)
+
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(ProcessedEvent.objects.count(), 2)
@@ -0,0 +1,131 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from core.services.bot_filter import bot_reason, bot_stats, filter_bots
+
+BROWSER_UA = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+)
+GOOGLEBOT = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+
+def _payload(event_id: str = 'evt-1', **fields) -> dict:
+    payload = {
+        'event': 'page_view',
+        'event_id': event_id,
+        'session_id': 'session-1',
+        'tracker_token': 'cc_bot_key',
+        'user_id': 'visitor-1',
+        'page_url': 'https://example.com/',
+        'timestamp': '2025-01-01T00:00:00Z',
+        'user_agent': BROWSER_UA,
+        'screen_resolution': '1920x1080',
+    }
+    payload.update(fields)
+    return payload
+
+
+def _events(*payloads) -> list:
+    return [{'payload': payload} for payload in payloads]
+
+
+class BotReasonTests(SimpleTestCase):
+    def test_reasons(self):
+        cases = [
+            (_payload(), None),
+            (_payload(user_agent=GOOGLEBOT), 'user_agent'),
+            (_payload(user_agent='ELB-HealthChecker/2.0'), 'user_agent'),
+            (_payload(user_agent='python-requests/2.32.3'), 'user_agent'),
+            (_payload(screen_resolution=None), 'no_screen'),
+            (_payload(event='ping', screen_resolution=None), None),
+            # server-side senders carry no user agent at all
+            (_payload(user_agent=None, screen_resolution=None), None),
+            # a phone maker, not a crawler
+            (_payload(user_agent='Mozilla/5.0 (Linux; Android 10; CUBOT P40) Mobile'), None),
+        ]
+        for payload, reason in cases:
+            with self.subTest(user_agent=payload['user_agent'], event=payload['event']):
+                self.assertEqual(bot_reason(payload), reason)
+
+
+class FilterBotsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_modes(self):
+        def batch():
+            return _events(_payload('human'), _payload('crawler', user_agent=GOOGLEBOT))
+
+        dropped = filter_bots('key-1', batch(), 'drop')
+        tagged = filter_bots('key-1', batch(), 'tag')
+        unfiltered = filter_bots('key-1', batch(), 'off')
+
+        self.assertEqual([e['payload']['event_id'] for e in dropped], ['human'])
+        self.assertEqual([e['payload'].get('bot') for e in tagged], [None, 'user_agent'])
+        self.assertEqual(len(unfiltered), 2)
+
+    def test_client_supplied_tags_are_stripped(self):
+        for mode in ('off', 'tag', 'drop'):
+            with self.subTest(mode=mode):
+                events = filter_bots('key-1', _events(_payload(bot='user_agent')), mode)
+
+                self.assertNotIn('bot', events[0]['payload'])
+
+    def test_bot_rate_is_reported_per_key(self):
+        filter_bots('key-1', _events(_payload('a'), _payload('b'), _payload('c', user_agent=GOOGLEBOT)), 'drop')
+        filter_bots('key-1', _events(_payload('d', screen_resolution=None)), 'tag')
+
+        stats = bot_stats(['key-1', 'key-2'])
+
+        self.assertEqual(stats['key-1'], {'events': 4, 'bots': 2, 'bot_rate': 0.5})
+        self.assertEqual(stats['key-2']['bot_rate'], 0.0)
+
+
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class CollectorBotFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_bot_key',
+            name='Bot key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web',
+            bot_filter='drop'
+        )
+
+    def _post(self, *payloads):
+        return self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': list(payloads)}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_bot_key'}
+        )
+
+    def test_bots_are_not_queued(self, apply_async):
+        response = self._post(_payload('human'), _payload('crawler', user_agent=GOOGLEBOT))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(serialization.loads(response.content)['event_count'], 1)
+
+    def test_a_batch_of_only_bots_never_reaches_the_queue(self, apply_async):
+        response = self._post(_payload('crawler', user_agent=GOOGLEBOT))
+
+        self.assertEqual(response.status_code, 202)
+        apply_async.assert_not_called()
+
+    def test_tagging_keys_queue_bots_with_the_reason(self, apply_async):
+        self.api_key.bot_filter = 'tag'
+        self.api_key.save()
+
+        response = self._post(_payload('human'), _payload('crawler', user_agent=GOOGLEBOT))
+
+        self.assertEqual(serialization.loads(response.content)['event_count'], 2)
+
+    def test_new_keys_tag_rather_than_drop(self, apply_async):
+        api_key = APIKey.objects.create(key='cc_bot_default', name='Default', user_id='user-1')
+
+        self.assertEqual(api_key.bot_filter, 'tag')
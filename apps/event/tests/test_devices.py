@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+from domain.internet.devices import classify_user_agent, detect_device_type
+
+CHROME_DESKTOP = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+)
+EDGE_DESKTOP = CHROME_DESKTOP + ' Edg/126.0.0.0'
+SAFARI_IPHONE = (
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 '
+    '(KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1'
+)
+SAFARI_IPAD = SAFARI_IPHONE.replace('iPhone; CPU iPhone OS', 'iPad; CPU OS')
+CHROME_ANDROID_TABLET = (
+    'Mozilla/5.0 (Linux; Android 14; SM-X710) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+)
+GOOGLEBOT = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+
+class UserAgentClassificationTests(SimpleTestCase):
+    def test_device_browser_and_bot(self):
+        cases = [
+            (CHROME_DESKTOP, 'desktop', 'chrome', False),
+            (EDGE_DESKTOP, 'desktop', 'edge', False),
+            (SAFARI_IPHONE, 'mobile', 'safari', False),
+            (SAFARI_IPAD, 'tablet', 'safari', False),
+            (CHROME_ANDROID_TABLET, 'tablet', 'chrome', False),
+            (GOOGLEBOT, 'desktop', 'other', True),
+            ('curl/8.4.0', 'desktop', 'other', True),
+            ('', 'desktop', 'other', False),
+        ]
+        for user_agent, device, browser, is_bot in cases:
+            with self.subTest(user_agent=user_agent):
+                info = classify_user_agent(user_agent)
+                self.assertEqual((info.device_type, info.browser_family, info.is_bot), (device, browser, is_bot))
+
+    def test_screen_resolution_refines_desktop_user_agents(self):
+        self.assertEqual(detect_device_type(CHROME_DESKTOP, '390x844'), 'mobile')
+        self.assertEqual(detect_device_type(CHROME_DESKTOP, '820x1180'), 'tablet')
+        self.assertEqual(detect_device_type(CHROME_DESKTOP, '1920x1080'), 'desktop')
+        self.assertEqual(detect_device_type(None, '390x844'), 'mobile')
+        self.assertEqual(detect_device_type(CHROME_DESKTOP, 'unknown'), 'desktop')
+        self.assertEqual(detect_device_type(SAFARI_IPAD, '1920x1080'), 'tablet')
+
+    def test_repeated_user_agents_hit_the_cache(self):
+        classify_user_agent.cache_clear()
+
+        for _ in range(5):
+            detect_device_type(SAFARI_IPHONE)
+
+        info = classify_user_agent.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 4))
@@ -0,0 +1,120 @@
+import json
+import base64
+import threading
+from functools import partial
+from django.core.cache import cache
+from django.test import TestCase
+from kombu.serialization import dumps
+from apps.apikey.models import APIKey
+from apps.common.testing import queued_event
+from apps.event.models import FailedEvent
+from core.services.dlq_drain import DLQDrainer, decode_dlq_message
+from core.services.event_envelope import encode_batch
+
+
+class FakeSQS:
+    """Just enough of the boto3 SQS client for the drainer"""
+
+    def __init__(self, bodies):
+        self._lock = threading.Lock()
+        self.messages = [
+            {'MessageId': f'msg-{index}', 'ReceiptHandle': f'handle-{index}', 'Body': body}
+            for index, body in enumerate(bodies)
+        ]
+        self.deleted = []
+        self.receive_calls = 0
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds):
+        with self._lock:
+            self.receive_calls += 1
+            batch, self.messages = self.messages[:MaxNumberOfMessages], self.messages[MaxNumberOfMessages:]
+        return {'Messages': batch} if batch else {}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self._lock:
+            self.deleted.extend(entry['ReceiptHandle'] for entry in Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries]}
+
+
+def _kombu_body(args, serializer='orjson', task_id='task-1') -> str:
+    content_type, content_encoding, body = dumps([args, {}, {}], serializer=serializer)
+    if isinstance(body, str):
+        body = body.encode()
+    message = {
+        'body': base64.b64encode(body).decode(),
+        'content-encoding': content_encoding,
+        'content-type': content_type,
+        'headers': {'id': task_id, 'task': 'core.tasks.process_event_batch_task'},
+        'properties': {'body_encoding': 'base64', 'delivery_info': {}},
+    }
+    return base64.b64encode(json.dumps(message).encode()).decode()
+
+
+_event = partial(queued_event, api_key='cc_dlq_key')
+
+class DLQDrainTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_dlq_key',
+            name='DLQ key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def test_decodes_celery_task_messages(self):
+        events, task_id = decode_dlq_message(_kombu_body([[_event(1), _event(2)]], task_id='task-9'))
+
+        self.assertEqual(task_id, 'task-9')
+        self.assertEqual([event['payload']['event_id'] for event in events], ['evt-1', 'evt-2'])
+
+    def test_decodes_msgpack_envelopes(self):
+        envelope = encode_batch([_event(1)], user_id='user-1', api_key_id=str(self.api_key.external_id))
+
+        events, _ = decode_dlq_message(_kombu_body([envelope], serializer='msgpack'))
+
+        self.assertEqual(events[0]['payload']['event_id'], 'evt-1')
+        self.assertEqual(events[0]['api_key_id'], str(self.api_key.external_id))
+
+    def test_drains_everything_with_batched_receives_and_deletes(self):
+        sqs = FakeSQS([_kombu_body([[_event(i), _event(i + 1000)]]) for i in range(45)])
+
+        result = DLQDrainer(sqs, 'dlq-url', time_budget=60, concurrency=3, wait_time_seconds=0).drain()
+
+        self.assertEqual(result, {'received': 45, 'filed': 90, 'deleted': 45, 'undecodable': 0})
+        self.assertEqual(FailedEvent.objects.filter(status='pending').count(), 90)
+        self.assertEqual(len(sqs.deleted), 45)
+        # rounds of three receives: 30 messages, 15 messages, then an empty round
+        self.assertEqual(sqs.receive_calls, 9)
+        failed_event = FailedEvent.objects.filter(dlq_message_id='msg-0').first()
+        self.assertEqual(failed_event.api_key, 'cc_dlq_key')
+        self.assertEqual(failed_event.original_queue_message_id, 'task-1')
+        self.assertIsNotNone(failed_event.next_retry_at)
+
+    def test_envelope_events_get_their_api_key_back(self):
+        envelope = encode_batch([_event(1)], user_id='user-1', api_key_id=str(self.api_key.external_id))
+        sqs = FakeSQS([_kombu_body([envelope], serializer='msgpack')])
+
+        DLQDrainer(sqs, 'dlq-url', time_budget=60, wait_time_seconds=0).drain()
+
+        self.assertEqual(FailedEvent.objects.get().api_key, 'cc_dlq_key')
+
+    def test_undecodable_messages_are_kept_and_abandoned(self):
+        sqs = FakeSQS(['not a message'])
+
+        result = DLQDrainer(sqs, 'dlq-url', time_budget=60, wait_time_seconds=0).drain()
+
+        self.assertEqual(result['undecodable'], 1)
+        failed_event = FailedEvent.objects.get()
+        self.assertEqual(failed_event.status, 'abandoned')
+        self.assertEqual(failed_event.payload, {'body': 'not a message'})
+        self.assertEqual(sqs.deleted, ['handle-0'])
+
+    def test_stops_when_the_time_budget_is_spent(self):
+        sqs = FakeSQS([_kombu_body([[_event(i)]]) for i in range(30)])
+
+        result = DLQDrainer(sqs, 'dlq-url', time_budget=0, wait_time_seconds=0).drain()
+
+        self.assertEqual(result['received'], 0)
+        self.assertEqual(len(sqs.messages), 30)
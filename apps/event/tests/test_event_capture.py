@@ -0,0 +1,171 @@
+import os
+import gzip
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from apps.event.models import ProcessedEvent
+from core.services import event_capture
+from core.services.apikey_service import APIKeyService
+from core.services.event_capture import EventCaptureWriter, capture_files, read_captures
+
+
+def _event(index: int) -> dict:
+    return {
+        'event_type': 'internet_web',
+        'payload': {
+            'event': 'page_view',
+            'event_id': f'evt-{index}',
+            'session_id': 'session-1',
+            'page_url': f'https://example.com/{index}',
+            'timestamp': '2025-01-01T00:00:00+00:00',
+        },
+        'api_key': 'cc_capture_key',
+        'user_id': 'user-1',
+        'industry_category': 'internet',
+        'product': 'web',
+    }
+
+
+class EventCaptureWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def _writer(self, **kwargs):
+        options = {'max_bytes': 1024 * 1024, 'rotate_seconds': 3600, 'max_files': 10}
+        options.update(kwargs)
+        writer = EventCaptureWriter(self.directory, **options)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_batches_round_trip_in_order(self):
+        writer = self._writer()
+        writer.write([_event(1), _event(2)])
+        writer.write([_event(3)])
+
+        batches = list(read_captures([self.directory]))
+
+        self.assertEqual([len(batch['events']) for batch in batches], [2, 1])
+        self.assertEqual(batches[1]['events'][0]['payload']['event_id'], 'evt-3')
+        self.assertLessEqual(batches[0]['t'], batches[1]['t'])
+
+    def test_open_file_is_readable_up_to_the_last_batch(self):
+        writer = self._writer()
+        writer.write([_event(1)])
+
+        # nothing closed the gzip stream yet
+        self.assertEqual(len(list(read_captures([self.directory]))), 1)
+
+    def test_rotates_by_size_and_keeps_newest_files(self):
+        writer = self._writer(max_bytes=1, max_files=2)
+        for index in range(4):
+            writer.write([_event(index)])
+
+        files = capture_files([self.directory])
+        self.assertEqual(len(files), 2)
+        event_ids = [batch['events'][0]['payload']['event_id'] for batch in read_captures(files)]
+        self.assertEqual(event_ids, ['evt-2', 'evt-3'])
+
+    def test_truncated_file_stops_at_last_complete_line(self):
+        path = os.path.join(self.directory, 'events-20250101T000000-1-0001.ndjson.gz')
+        data = gzip.compress(serialization.dumps({'t': 1.0, 'events': [_event(1)]}) + b'\n{"t": 2')
+        with open(path, 'wb') as file:
+            file.write(data[:-6])
+
+        batches = list(read_captures([path]))
+
+        self.assertEqual(len(batches), 1)
+
+    def test_sampled_out_batches_are_not_written(self):
+        writer = self._writer(sample_rate=0.0)
+
+        self.assertFalse(writer.write([_event(1)]))
+        self.assertEqual(capture_files([self.directory]), [])
+
+
+class EventCaptureReplayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.api_key = APIKey.objects.create(
+            key='cc_capture_key',
+            name='Capture key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+        patcher = mock.patch.object(APIKeyService, 'record_usage_deferred')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_collector_tees_validated_batches(self, apply_async):
+        with override_settings(EVENT_CAPTURE_DIR=self.directory), \
+                mock.patch.object(event_capture, '_writer', None):
+            response = self.client.post(
+                '/api/v1/events/',
+                serialization.dumps({'events': [
+                    {**_event(1)['payload'], 'tracker_token': self.api_key.key, 'user_id': 'visitor-1'},
+                    {'event': 'page_view'},
+                ]}),
+                content_type='application/json',
+                headers={'X-Tracker-Token': self.api_key.key}
+            )
+            event_capture.get_capture_writer().close()
+
+        self.assertEqual(response.status_code, 202)
+        batches = list(read_captures([self.directory]))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([event['payload']['event_id'] for event in batches[0]['events']], ['evt-1'])
+
+    def _capture(self, *batches):
+        writer = EventCaptureWriter(self.directory, max_bytes=1024 * 1024, rotate_seconds=3600, max_files=10)
+        for batch in batches:
+            writer.write(batch)
+        writer.close()
+
+    def test_replay_processes_batches_and_verifies_idempotency(self):
+        self._capture([_event(1), _event(2)], [_event(3)])
+        out = StringIO()
+
+        call_command('replay_events', self.directory, '--verify-idempotency', stdout=out)
+
+        self.assertEqual(ProcessedEvent.objects.count(), 3)
+        self.assertIn('Replayed 2 batches (3 events)', out.getvalue())
+        self.assertIn('Outcome: 3 processed, 0 skipped, 0 failed', out.getvalue())
+        self.assertIn('p95', out.getvalue())
+        self.assertIn('second pass skipped 3 events', out.getvalue())
+
+    def test_fresh_ids_allow_replaying_the_same_capture(self):
+        self._capture([_event(1)])
+        call_command('replay_events', self.directory, stdout=StringIO())
+
+        out = StringIO()
+        call_command('replay_events', self.directory, '--fresh-ids', '--limit', '1', stdout=out)
+
+        self.assertEqual(ProcessedEvent.objects.count(), 2)
+        self.assertIn('Outcome: 1 processed', out.getvalue())
+
+    def test_broker_mode_publishes_without_waiting_for_results(self):
+        self._capture([_event(1)])
+
+        with mock.patch('core.tasks.process_event_batch_task.delay') as delay:
+            out = StringIO()
+            call_command('replay_events', self.directory, '--mode', 'broker', stdout=out)
+
+        delay.assert_called_once()
+        self.assertIn('publish latency', out.getvalue())
+
+    def test_rejects_idempotency_check_through_the_broker(self):
+        self._capture([_event(1)])
+
+        with self.assertRaises(CommandError):
+            call_command('replay_events', self.directory, '--mode', 'broker', '--verify-idempotency')
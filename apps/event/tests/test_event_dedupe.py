@@ -0,0 +1,160 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from core.services.event_dedupe import EdgeDeduplicator, RotatingSeenSet, duplicate_stats
+
+
+def _events(*event_ids) -> list:
+    return [{'payload': {'event': 'page_view', 'event_id': event_id}} for event_id in event_ids]
+
+
+def _ids(events) -> list:
+    return [event['payload']['event_id'] for event in events]
+
+
+class RotatingSeenSetTests(SimpleTestCase):
+    @mock.patch('core.services.event_dedupe.time.monotonic')
+    def test_keys_are_remembered_for_one_to_two_windows(self, monotonic):
+        monotonic.return_value = 0
+        seen = RotatingSeenSet(window=60, max_keys=100)
+        seen.check_and_add([b'a'])
+
+        monotonic.return_value = 61
+        self.assertEqual(seen.check_and_add([b'a', b'b']), [True, False])
+
+        monotonic.return_value = 122
+        self.assertEqual(seen.check_and_add([b'b', b'a']), [True, False])
+
+    def test_memory_is_bounded(self):
+        seen = RotatingSeenSet(window=3600, max_keys=2)
+
+        seen.check_and_add([b'a', b'b', b'c', b'd', b'e'])
+
+        self.assertLessEqual(len(seen._current) + len(seen._previous), 4)
+        self.assertEqual(seen.check_and_add([b'a']), [False])
+
+
+class EdgeDeduplicatorTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_backend_drops_repeats(self):
+        deduplicator = EdgeDeduplicator(backend='local', window=60, max_keys=100)
+
+        self.assertEqual(_ids(deduplicator.filter('key-1', _events('e1', 'e2', 'e1'))), ['e1', 'e2'])
+        self.assertEqual(_ids(deduplicator.filter('key-1', _events('e2', 'e3'))), ['e3'])
+        # the same event_id under another key is a different event
+        self.assertEqual(_ids(deduplicator.filter('key-2', _events('e1'))), ['e1'])
+
+    def test_cache_backend_is_shared_between_instances(self):
+        first = EdgeDeduplicator(backend='cache', window=60)
+        second = EdgeDeduplicator(backend='cache', window=60)
+
+        self.assertEqual(_ids(first.filter('key-1', _events('e1', 'e1', 'e2'))), ['e1', 'e2'])
+        self.assertEqual(_ids(second.filter('key-1', _events('e1', 'e3'))), ['e3'])
+
+    def test_forgotten_events_are_let_through_again(self):
+        for backend in ('local', 'cache'):
+            with self.subTest(backend=backend):
+                deduplicator = EdgeDeduplicator(backend=backend, window=60, max_keys=100)
+                events = deduplicator.filter('key-1', _events(f'{backend}-1'))
+
+                deduplicator.forget('key-1', events)
+
+                self.assertEqual(len(deduplicator.filter('key-1', _events(f'{backend}-1'))), 1)
+
+    def test_events_are_keyed_on_the_processors_reference(self):
+        deduplicator = EdgeDeduplicator(backend='local', window=60, max_keys=100)
+        runs = [{'payload': {'machine_id': 'machine-1', 'run_id': run_id}} for run_id in ('r1', 'r2', 'r1')]
+
+        unique = deduplicator.filter('key-1', runs, id_field='run_id')
+
+        self.assertEqual([event['payload']['run_id'] for event in unique], ['r1', 'r2'])
+
+    def test_events_without_an_id_pass_through(self):
+        for backend in ('local', 'cache'):
+            with self.subTest(backend=backend):
+                deduplicator = EdgeDeduplicator(backend=backend, window=60, max_keys=100)
+                events = [{'payload': {'run_id': 'r1'}}, {'payload': {'run_id': 'r2'}}]
+
+                self.assertEqual(len(deduplicator.filter('key-1', events)), 2)
+                self.assertEqual(len(deduplicator.filter('key-1', events)), 2)
+
+    def test_off_backend_keeps_everything(self):
+        deduplicator = EdgeDeduplicator(backend='off')
+        events = _events('e1', 'e1')
+
+        self.assertIs(deduplicator.filter('key-1', events), events)
+
+    def test_duplicate_rate_is_reported_per_key(self):
+        deduplicator = EdgeDeduplicator(backend='local', window=60, max_keys=100)
+        deduplicator.filter('key-1', _events('e1', 'e2', 'e3', 'e4'))
+        deduplicator.filter('key-1', _events('e1', 'e5', 'e6', 'e7'))
+
+        stats = duplicate_stats(['key-1', 'key-2'])
+
+        self.assertEqual(stats['key-1'], {'events': 8, 'duplicates': 1, 'duplicate_rate': 0.125})
+        self.assertEqual(stats['key-2']['duplicate_rate'], 0.0)
+
+
+@override_settings(EVENT_DEDUPE_BACKEND='cache')
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class CollectorDedupeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_dedupe_key',
+            name='Dedupe key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+        patcher = mock.patch(
+            'core.api.controllers.events.get_deduplicator',
+            return_value=EdgeDeduplicator(backend='cache')
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, *event_ids):
+        return self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': [
+                {
+                    'event': 'page_view',
+                    'session_id': 'session-1',
+                    'tracker_token': 'cc_dedupe_key',
+                    'event_id': event_id,
+                    'user_id': 'visitor-1',
+                    'page_url': 'https://example.com/',
+                    'timestamp': '2025-01-01T00:00:00Z',
+                }
+                for event_id in event_ids
+            ]}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_dedupe_key'}
+        )
+
+    def test_retried_events_are_not_queued_twice(self, apply_async):
+        self._post('evt-1', 'evt-2')
+
+        response = self._post('evt-1', 'evt-2', 'evt-3')
+
+        self.assertEqual(serialization.loads(response.content)['event_count'], 1)
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_a_pure_retry_is_accepted_without_queueing(self, apply_async):
+        self._post('evt-1')
+
+        response = self._post('evt-1')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(apply_async.call_count, 1)
+
+    def test_events_that_failed_to_queue_are_not_remembered(self, apply_async):
+        apply_async.side_effect = [RuntimeError("broker down"), None]
+
+        self.assertEqual(self._post('evt-1').status_code, 503)
+        self.assertEqual(serialization.loads(self._post('evt-1').content)['event_count'], 1)
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from celery.exceptions import Retry
+from kombu.serialization import dumps as kombu_dumps
+from apps.apikey.models import APIKey
+from core.services.event_envelope import (
+    ENVELOPE_VERSION,
+    FLAG_ZLIB,
+    EnvelopeError,
+    decode_batch,
+    encode_batch,
+)
+from core.tasks import process_event_batch_task
+from domain.internet.web.processers import InternetWebProcessor
+
+
+def _event(event_id, **overrides):
+    payload = InternetWebProcessor().validate_payload({
+        'event': 'page_view',
+        'session_id': 'session-1',
+        'tracker_token': 'cc_envelope_key',
+        'event_id': event_id,
+        'user_id': 'visitor-1',
+        'page_url': f'https://example.com/{event_id}',
+        'timestamp': '2025-01-01T00:00:00Z',
+        **overrides,
+    })
+    return {
+        'event_type': 'internet_web',
+        'payload': payload,
+        'api_key': 'cc_envelope_key',
+        'user_id': 'user-1',
+        'industry_category': 'internet',
+        'product': 'web',
+    }
+
+
+class EventEnvelopeTestCase(TestCase):
+    def test_round_trip_elides_nulls(self):
+        queued_at = datetime(2025, 1, 1, 0, 0, 5, tzinfo=timezone.utc)
+        envelope = encode_batch([_event('a'), _event('b')], 'user-1', 'key-id', queued_at=queued_at)
+
+        self.assertEqual(envelope[0], ENVELOPE_VERSION)
+        header, events = decode_batch(envelope)
+
+        self.assertEqual(header['t'], 'internet_web')
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['api_key_id'], 'key-id')
+        self.assertEqual(events[0]['user_id'], 'user-1')
+        self.assertEqual(events[0]['product'], 'web')
+        self.assertEqual(events[0]['queued_at'], queued_at)
+        self.assertEqual(events[1]['payload']['event_id'], 'b')
+        self.assertEqual(events[1]['payload']['timestamp'], datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.assertNotIn('user_agent', events[0]['payload'])
+
+    def test_mixed_event_types(self):
+        oil = {'event_type': 'oil_gas_lubricant', 'payload': {'run_id': 'r-1'}}
+        _, events = decode_batch(encode_batch([_event('a'), oil], 'user-1', 'key-id'))
+        self.assertEqual([e['event_type'] for e in events], ['internet_web', 'oil_gas_lubricant'])
+
+    def test_compression(self):
+        batch = [_event(f'evt-{i}') for i in range(50)]
+        plain = encode_batch(batch, 'user-1', 'key-id')
+        compressed = encode_batch(batch, 'user-1', 'key-id', compress_threshold=1024)
+
+        self.assertFalse(plain[1] & FLAG_ZLIB)
+        self.assertTrue(compressed[1] & FLAG_ZLIB)
+        self.assertLess(len(compressed), len(plain))
+        self.assertEqual(decode_batch(compressed)[1], decode_batch(plain)[1])
+
+    def test_unknown_version_is_rejected(self):
+        envelope = encode_batch([_event('a')], 'user-1', 'key-id')
+        with self.assertRaises(EnvelopeError):
+            decode_batch(bytes((ENVELOPE_VERSION + 1,)) + envelope[1:])
+
+    @mock.patch('core.services.session.session_service.SessionService.update_many')
+    def test_task_processes_envelope(self, update_session):
+        cache.clear()
+        api_key = APIKey.objects.create(key='cc_envelope_key', name='Envelope', user_id='user-1')
+        envelope = encode_batch([_event('a'), _event('b')], 'user-1', str(api_key.external_id))
+
+        result = process_event_batch_task.apply(args=[envelope]).get()
+
+        self.assertEqual(result['processed'], 2)
+        entries = update_session.call_args.args[0]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0][1].key, 'cc_envelope_key')
+
+    def test_retried_envelope_stays_msgpack(self):
+        envelope = encode_batch([_event('a')], 'user-1', 'key-id')
+        process_event_batch_task.push_request(called_directly=False, retries=0, args=[envelope], kwargs={})
+        self.addCleanup(process_event_batch_task.pop_request)
+
+        with mock.patch('core.tasks.process_events', side_effect=RuntimeError("database went away")), \
+                mock.patch.object(process_event_batch_task, 'apply_async') as apply_async:
+            with self.assertRaises(Retry):
+                process_event_batch_task.run(envelope)
+
+        args, options = apply_async.call_args.args[0], apply_async.call_args.kwargs
+        self.assertEqual(options['serializer'], 'msgpack')
+        # the re-sent message must encode; JSON would fail on the bytes
+        kombu_dumps([args, {}, {}], serializer=options['serializer'])
@@ -0,0 +1,113 @@
+from functools import partial
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from apps.common.testing import queued_event
+from apps.event.models import EventOutbox
+from core.services.apikey_service import APIKeyService
+from core.services.event_envelope import decode_batch
+from core.services.event_queue import EventQueueService
+from core.services.outbox_relay import OutboxRelay
+
+
+_event = partial(queued_event, api_key='cc_outbox_key')
+
+def _published_event_ids(apply_async) -> list:
+    batches = []
+    for call in apply_async.call_args_list:
+        _, events = decode_batch(call.kwargs['args'][0])
+        batches.append([event['payload']['event_id'] for event in events])
+    return batches
+
+
+@override_settings(EVENT_OUTBOX_ENABLED=True, EVENT_ENVELOPE_VERSION=1)
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class EventOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_outbox_key',
+            name='Outbox key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+        patcher = mock.patch.object(APIKeyService, 'record_usage_deferred')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _queue(self, *events):
+        EventQueueService().queue_events_batch('user-1', list(events), 'cc_outbox_key', str(self.api_key.external_id))
+
+    def test_batches_are_written_to_the_outbox_instead_of_the_broker(self, apply_async):
+        self._queue(_event(1), _event(2))
+
+        apply_async.assert_not_called()
+        rows = list(EventOutbox.objects.all())
+        self.assertEqual([row.payload['event_id'] for row in rows], ['evt-1', 'evt-2'])
+        self.assertEqual(rows[0].session_id, 'session-1')
+        self.assertEqual(rows[0].api_key_id, str(self.api_key.external_id))
+
+    def test_collector_accepts_events_while_the_broker_is_down(self, apply_async):
+        apply_async.side_effect = ConnectionError("broker unavailable")
+
+        response = self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': [
+                {**_event(1)['payload'], 'tracker_token': self.api_key.key, 'user_id': 'visitor-1'},
+            ]}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': self.api_key.key}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(EventOutbox.objects.count(), 1)
+
+    def test_relay_publishes_in_order_in_large_batches(self, apply_async):
+        self._queue(*[_event(i) for i in range(5)])
+
+        result = OutboxRelay(publish_batch_size=2).relay_once()
+
+        self.assertEqual(result, {'claimed': 5, 'published': 5, 'deferred': 0})
+        self.assertEqual(
+            _published_event_ids(apply_async),
+            [['evt-0', 'evt-1'], ['evt-2', 'evt-3'], ['evt-4']]
+        )
+        self.assertFalse(EventOutbox.objects.exists())
+
+    def test_failed_publish_backs_off_and_holds_the_session_back(self, apply_async):
+        self._queue(_event(1))
+        apply_async.side_effect = ConnectionError("broker unavailable")
+
+        result = OutboxRelay().relay_once()
+
+        self.assertEqual(result['deferred'], 1)
+        row = EventOutbox.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertIsNotNone(row.next_attempt_at)
+        self.assertIn('broker unavailable', row.last_error)
+
+        # a later event of the same session must not overtake the deferred one
+        apply_async.side_effect = None
+        self._queue(_event(2), _event(3, session_id='session-2'))
+        OutboxRelay().relay_once()
+
+        self.assertEqual(_published_event_ids(apply_async)[-1], ['evt-3'])
+        self.assertEqual(
+            sorted(EventOutbox.objects.values_list('payload__event_id', flat=True)),
+            ['evt-1', 'evt-2']
+        )
+
+    def test_relay_command_drains_the_outbox(self, apply_async):
+        self._queue(*[_event(i) for i in range(3)])
+        out = StringIO()
+
+        call_command('relay_outbox', '--once', '--batch', '2', stdout=out)
+
+        self.assertIn('Outbox backlog: 3 events', out.getvalue())
+        self.assertIn('Published 3 events, deferred 0', out.getvalue())
+        self.assertFalse(EventOutbox.objects.exists())
@@ -0,0 +1,47 @@
+from datetime import datetime
+from django.test import SimpleTestCase
+from domain.internet.web.processers import InternetWebProcessor
+from domain.internet.ads.processers import InternetAdsProcessor
+
+
+def _payload(event_id, **overrides):
+    payload = {
+        'event': 'page_view',
+        'session_id': 'session-1',
+        'tracker_token': 'cc_key',
+        'event_id': event_id,
+        'user_id': 'visitor-1',
+        'page_url': 'https://example.com/',
+        'timestamp': '2025-01-01T00:00:00Z',
+    }
+    payload.update(overrides)
+    return payload
+
+
+class BatchValidationTestCase(SimpleTestCase):
+    def test_valid_batch(self):
+        validated, errors = InternetWebProcessor().validate_batch([_payload('a'), _payload('b', queuedAt=1)])
+
+        self.assertEqual(errors, [])
+        self.assertEqual([p['event_id'] for p in validated], ['a', 'b'])
+        self.assertIsInstance(validated[0]['timestamp'], datetime)
+        self.assertEqual(validated[1]['queuedAt'], 1)
+
+    def test_invalid_items_are_reported_by_index(self):
+        validated, errors = InternetAdsProcessor().validate_batch([
+            _payload('a', platform='google'),
+            _payload('b', timestamp='not a date'),
+            {'event': 'click'},
+            _payload('d'),
+        ])
+
+        self.assertEqual([p['event_id'] for p in validated], ['a', 'd'])
+        self.assertEqual(validated[0]['platform'], 'google')
+        self.assertEqual([index for index, _ in errors], [1, 2])
+
+    def test_batch_matches_single_validation(self):
+        processor = InternetWebProcessor()
+        payload = _payload('a', custom_field='kept')
+
+        validated, _ = processor.validate_batch([payload])
+        self.assertEqual(validated[0], processor.validate_payload(payload))
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.apikey.models import APIKey
+from apps.common.testing import queued_event
+from apps.event.models import FailedEvent, ProcessedEvent
+from core.tasks import process_events, retry_failed_events
+
+
+def _payload(index: int) -> dict:
+    return queued_event(index)['payload']
+
+
+def _failed(index: int, **fields) -> FailedEvent:
+    defaults = {
+        'event_type': 'internet_web',
+        'payload': _payload(index),
+        'user_id': 'user-1',
+        'api_key': 'cc_retry_key',
+        'error_message': 'boom',
+        'next_retry_at': timezone.now() - timedelta(seconds=1),
+    }
+    defaults.update(fields)
+    return FailedEvent.objects.create(**defaults)
+
+
+@override_settings(FAILED_EVENT_RETRY_BASE_DELAY=60, FAILED_EVENT_RETRY_MAX_DELAY=3600)
+class FailedEventRetryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        APIKey.objects.create(
+            key='cc_retry_key',
+            name='Retry key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def test_worker_failures_are_recorded_with_their_context(self):
+        process_events([{
+            'event_type': 'unknown_product',
+            'payload': _payload(1),
+            'user_id': 'user-1',
+            'api_key': 'cc_retry_key',
+        }])
+
+        failed_event = FailedEvent.objects.get()
+        self.assertEqual(failed_event.event_type, 'unknown_product')
+        self.assertEqual(failed_event.user_id, 'user-1')
+        self.assertEqual(failed_event.api_key, 'cc_retry_key')
+        self.assertGreater(failed_event.next_retry_at, timezone.now())
+
+    @override_settings(FAILED_EVENT_RETRY_BATCH=2)
+    @mock.patch('core.tasks.process_event_batch_task.delay')
+    def test_due_events_are_claimed_and_resubmitted_in_batches(self, delay):
+        due = [_failed(i) for i in range(3)]
+        _failed(10, next_retry_at=timezone.now() + timedelta(hours=1))
+        _failed(11, status='resolved')
+
+        result = retry_failed_events()
+
+        self.assertEqual(result['submitted'], 3)
+        self.assertEqual([len(call.args[0]) for call in delay.call_args_list], [2, 1])
+        submitted_ids = {event['failed_event_id'] for call in delay.call_args_list for event in call.args[0]}
+        self.assertEqual(submitted_ids, {str(failed_event.id) for failed_event in due})
+        self.assertEqual(FailedEvent.objects.filter(status='processing', retry_count=1).count(), 3)
+        # claimed rows are not handed out again while the batch runs
+        self.assertEqual(retry_failed_events()['submitted'], 0)
+
+    @mock.patch('core.tasks.process_event_batch_task.delay')
+    def test_events_are_resolved_only_after_processing(self, delay):
+        _failed(1)
+
+        retry_failed_events()
+        self.assertEqual(FailedEvent.objects.get().status, 'processing')
+
+        process_events(delay.call_args.args[0])
+
+        failed_event = FailedEvent.objects.get()
+        self.assertEqual(failed_event.status, 'resolved')
+        self.assertIsNotNone(failed_event.resolved_at)
+        self.assertEqual(ProcessedEvent.objects.count(), 1)
+
+    @mock.patch('core.tasks.process_event_batch_task.delay')
+    def test_failed_retry_backs_off_and_is_eventually_abandoned(self, delay):
+        failed_event = _failed(1, event_type='unknown_product', max_retries=2)
+
+        retry_failed_events()
+        process_events(delay.call_args.args[0])
+
+        failed_event.refresh_from_db()
+        self.assertEqual(failed_event.status, 'pending')
+        # second attempt waits 60s * 2 ** retry_count
+        self.assertGreater(failed_event.next_retry_at, timezone.now() + timedelta(seconds=110))
+        self.assertEqual(FailedEvent.objects.count(), 1)
+
+        FailedEvent.objects.update(next_retry_at=timezone.now())
+        retry_failed_events()
+        process_events(delay.call_args.args[0])
+
+        failed_event.refresh_from_db()
+        self.assertEqual(failed_event.status, 'abandoned')
+        self.assertEqual(failed_event.retry_count, 2)
+
+    @mock.patch('core.tasks.process_event_batch_task.delay')
+    def test_stale_claims_are_retried_or_abandoned(self, delay):
+        expired = timezone.now() - timedelta(seconds=1)
+        retryable = _failed(1, status='processing', retry_count=1, next_retry_at=expired)
+        exhausted = _failed(2, status='processing', retry_count=3, next_retry_at=expired)
+
+        result = retry_failed_events()
+
+        self.assertEqual(result, {'submitted': 1, 'abandoned': 1})
+        retryable.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retryable.retry_count, 2)
+        self.assertEqual(exhausted.status, 'abandoned')
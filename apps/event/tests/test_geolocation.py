@@ -0,0 +1,142 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from apps.common import serialization
+from calculators.internet_website import InternetWebsiteCalculator
+from core.services.geolocation import GeoIndex, build_index, payload_regions
+from domain.internet.web.processers import InternetWebProcessor
+
+
+def _box(west, south, east, north) -> list:
+    return [(west, south), (east, south), (east, north), (west, north)]
+
+
+REGIONS = [
+    # a square country with a square enclave punched out of it
+    ('AA', [[_box(0, 0, 10, 10), _box(4, 4, 6, 6)]]),
+    ('BB', [[_box(4, 4, 6, 6)]]),
+    # straddles the antimeridian as two polygons
+    ('CC', [[_box(170, -20, 180, -10)], [_box(-180, -20, -170, -10)]]),
+    ('IT', [[_box(12.0, 41.5, 13.0, 42.5)]]),
+]
+
+
+def _feature(code, polygons) -> dict:
+    return {
+        'type': 'Feature',
+        'properties': {'ISO_A2': code},
+        'geometry': {
+            'type': 'MultiPolygon',
+            'coordinates': [[[list(point) for point in ring + ring[:1]] for ring in polygon] for polygon in polygons],
+        },
+    }
+
+
+class GeoIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = GeoIndex(build_index(REGIONS, cell_degrees=1, subcells=10))
+
+    def test_points_resolve_to_their_region(self):
+        cases = [
+            ((2.0, 2.0), 'AA'),
+            ((5.0, 5.0), 'BB'),
+            ((3.95, 5.0), 'AA'),
+            ((4.05, 5.0), 'BB'),
+            ((-15.0, 179.5), 'CC'),
+            ((-15.0, -179.5), 'CC'),
+            ((20.0, 20.0), None),
+            ((91.0, 0.0), None),
+        ]
+        for (latitude, longitude), code in cases:
+            with self.subTest(latitude=latitude, longitude=longitude):
+                self.assertEqual(self.index.lookup(latitude, longitude), code)
+
+    def test_uniform_cells_need_no_fine_block(self):
+        data = build_index([('AA', [[_box(0, 0, 10, 10)]])], cell_degrees=1, subcells=10)
+
+        self.assertEqual(len(data), len(build_index([], cell_degrees=1, subcells=10)) + 8)
+
+    def test_nearby_points_share_a_cache_entry(self):
+        index = GeoIndex(build_index(REGIONS, cell_degrees=1, subcells=10))
+
+        self.assertEqual(index.resolve_many([(2.0, 2.0), (2.001, 2.002), (5.0, 5.0)]), ['AA', 'AA', 'BB'])
+        self.assertEqual(index._cached_lookup.cache_info().hits, 1)
+
+
+class GeoRegionProcessingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        source = os.path.join(directory, 'boundaries.geojson')
+        self.index_path = os.path.join(directory, 'geo.idx')
+        with open(source, 'wb') as f:
+            f.write(serialization.dumps({
+                'type': 'FeatureCollection',
+                'features': [_feature(code, polygons) for code, polygons in REGIONS],
+            }))
+        call_command('build_geo_index', source, output=self.index_path, subcells=10, stdout=open(os.devnull, 'w'))
+
+    def _payload(self, **fields) -> dict:
+        payload = {
+            'event': 'page_view',
+            'event_id': 'evt-1',
+            'session_id': 'session-1',
+            'tracker_token': 'cc_geo_key',
+            'user_id': 'visitor-1',
+            'page_url': 'https://example.com/',
+            'timestamp': '2025-01-01T00:00:00Z',
+        }
+        payload.update(fields)
+        return InternetWebProcessor().validate_payload(payload)
+
+    def test_payloads_resolve_in_one_batch(self):
+        payloads = [
+            self._payload(latitude=42.0, longitude=12.5),
+            self._payload(geolocation={'lat': 2.0, 'lng': 2.0}),
+            self._payload(),
+            self._payload(latitude=-45.0, longitude=0.0),
+        ]
+
+        with override_settings(GEO_INDEX_PATH=self.index_path):
+            self.assertEqual(payload_regions(payloads, 'US'), ['IT', 'AA', 'US', 'US'])
+        self.assertEqual(payload_regions(payloads, 'US'), ['US'] * 4)
+
+    def test_points_off_the_globe_get_the_default(self):
+        payloads = [
+            self._payload(latitude=1e308, longitude=2.0),
+            self._payload(latitude=float('inf'), longitude=2.0),
+            self._payload(geolocation={'lat': 'NaN', 'lng': 2.0}),
+            self._payload(latitude=2.0, longitude=-540.0),
+        ]
+
+        with override_settings(GEO_INDEX_PATH=self.index_path):
+            self.assertEqual(payload_regions(payloads, 'US'), ['US'] * 4)
+            result = InternetWebProcessor().process(payloads[0])
+        self.assertEqual(result.metadata['region'], 'US')
+
+    def test_emissions_use_the_visitors_grid(self):
+        with override_settings(GEO_INDEX_PATH=self.index_path):
+            result = InternetWebProcessor().process(self._payload(latitude=42.0, longitude=12.5))
+
+        # Italy has no factor of its own and falls back to the EU average
+        expected = InternetWebsiteCalculator().calculate({
+            'bytes_transferred': int(0.5 * 1024 * 1024),
+            'device_type': 'desktop',
+            'country_code': 'EU',
+            'session_duration_minutes': 1.0,
+        })
+        self.assertEqual(result.metadata['region'], 'IT')
+        self.assertAlmostEqual(float(result.kg_co2_emitted), expected['total_emissions_kg'], places=12)
+
+
+class GridRegionFallbackTests(SimpleTestCase):
+    def test_most_specific_grid_factor_wins(self):
+        calculator = InternetWebsiteCalculator()
+        table = calculator.GRID_INTENSITY_DEFAULTS
+
+        self.assertEqual(calculator._grid_region('GB', table), 'GB')
+        self.assertEqual(calculator._grid_region('US-CA', table), 'US')
+        self.assertEqual(calculator._grid_region('IT', table), 'EU')
+        self.assertEqual(calculator._grid_region('JP', table), 'WORLD')
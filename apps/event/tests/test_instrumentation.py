@@ -0,0 +1,84 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from core.metrics import current_timings, span
+
+EVENTS_URL = '/api/v1/events/'
+
+
+class RequestInstrumentationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_instrumented_key',
+            name='Instrumented',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def _post_events(self):
+        body = {
+            'events': [{
+                'event': 'page_view',
+                'session_id': 'session-1',
+                'tracker_token': self.api_key.key,
+                'event_id': 'evt-1',
+                'user_id': 'visitor-1',
+                'page_url': 'https://example.com/',
+                'timestamp': '2025-01-01T00:00:00Z',
+            }]
+        }
+        return self.client.post(
+            EVENTS_URL,
+            serialization.dumps(body),
+            content_type='application/json',
+            headers={'X-Tracker-Token': self.api_key.key}
+        )
+
+    @override_settings(DEBUG=True)
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_server_timing_lists_collector_stages(self, apply_async):
+        response = self._post_events()
+
+        self.assertEqual(response.status_code, 202)
+        apply_async.assert_called_once()
+        stages = [entry.strip().split(';')[0] for entry in response['Server-Timing'].split(',')]
+        for stage in ('parse', 'auth', 'validate', 'sessions', 'publish', 'usage', 'db', 'total'):
+            self.assertIn(stage, stages)
+
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_no_server_timing_without_debug(self, apply_async):
+        response = self._post_events()
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(METRICS_ALLOW_UNAUTHENTICATED=True)
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_metrics_endpoint_exports_histograms(self, apply_async):
+        self._post_events()
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('carboncut_http_request_duration_seconds_bucket{', body)
+        self.assertIn('view="event-collect"', body)
+        self.assertIn('carboncut_http_stage_duration_seconds_count{stage="validate",view="event-collect"}', body)
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_without_a_token_fail_closed(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_span_outside_request_is_noop(self):
+        self.assertIsNone(current_timings())
+        with span('anything'):
+            pass
@@ -0,0 +1,100 @@
+from functools import partial
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.apikey.models import APIKey
+from apps.common.testing import queued_event
+from apps.event.models import EventOutbox, ProcessedEvent
+from core.db.events import EventOutboxData
+from core.services.event_queue import EventQueueService
+from core.services.local_queue import LocalQueueWorker
+
+
+_event = partial(queued_event, api_key='cc_local_key')
+
+@override_settings(EVENT_QUEUE_BACKEND='postgres')
+class LocalQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_local_key',
+            name='Local key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def _queue(self, count: int):
+        EventQueueService().queue_events_batch(
+            'user-1', [_event(i) for i in range(count)], 'cc_local_key', str(self.api_key.external_id)
+        )
+
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_events_stay_in_the_database(self, apply_async):
+        self._queue(2)
+
+        apply_async.assert_not_called()
+        self.assertEqual(EventOutbox.objects.count(), 2)
+
+    def test_worker_processes_a_lease_and_acks_it(self):
+        self._queue(3)
+
+        result = LocalQueueWorker(batch_size=10).run_once()
+
+        self.assertEqual(result, {'leased': 3, 'processed': 3, 'skipped': 0, 'failed': 0})
+        self.assertEqual(ProcessedEvent.objects.count(), 3)
+        self.assertFalse(EventOutbox.objects.exists())
+
+    def test_leased_rows_are_invisible_until_the_timeout(self):
+        self._queue(2)
+        outbox = EventOutboxData()
+
+        first_lease, rows = outbox.lease(10, visibility_timeout=60)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(outbox.lease(10, visibility_timeout=60)[1], [])
+
+        EventOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        second_lease, rows = outbox.lease(10, visibility_timeout=60)
+
+        self.assertEqual([row.attempts for row in rows], [2, 2])
+        # the expired lease no longer owns the rows
+        self.assertEqual(outbox.ack(first_lease), 0)
+        self.assertEqual(outbox.ack(second_lease), 2)
+
+    def test_failed_batch_is_left_for_redelivery(self):
+        self._queue(2)
+
+        with mock.patch('core.tasks.process_events', side_effect=RuntimeError("database went away")):
+            result = LocalQueueWorker().run_once()
+
+        self.assertEqual(result['processed'], 0)
+        self.assertEqual(EventOutbox.objects.filter(lease_id__isnull=False).count(), 2)
+
+    def test_rows_past_max_attempts_are_given_up(self):
+        self._queue(1)
+        EventOutbox.objects.update(attempts=5)
+
+        result = LocalQueueWorker(max_attempts=5).run_once()
+
+        self.assertEqual(result['failed'], 1)
+        self.assertFalse(ProcessedEvent.objects.exists())
+        self.assertFalse(EventOutbox.objects.exists())
+
+    def test_command_drains_the_queue(self):
+        self._queue(3)
+        out = StringIO()
+
+        call_command('run_event_worker', '--once', '--batch', '2', stdout=out)
+
+        self.assertIn('Processed 3 events', out.getvalue())
+        self.assertFalse(EventOutbox.objects.exists())
+
+    @override_settings(EVENT_QUEUE_BACKEND='celery')
+    def test_command_requires_the_postgres_backend(self):
+        with self.assertRaises(CommandError):
+            call_command('run_event_worker', '--once')
@@ -0,0 +1,229 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.apikey.models import APIKey, ConversionRule
+from apps.auth.models import User
+from apps.campaign.models import Campaign, CampaignEmission, UTMParameter
+from apps.event.models import FailedEvent, Session
+from apps.event.tests.test_dlq_drain import FakeSQS, _kombu_body
+from apps.common import serialization
+from apps.common.testing import QueryBudget, QueryBudgetMixin, sdk_payload
+from core.services.auth.jwt_service import JWTService
+from core.services.apikey_service import APIKeyService
+from core.tasks import (
+    flush_api_key_usage_task,
+    mark_inactive_sessions_task,
+    process_active_sessions_task,
+    process_dlq_messages,
+    process_event_batch_task,
+    retry_failed_events,
+)
+from domain.internet.web.processers import InternetWebProcessor
+
+# Statement budgets for the hot paths. per_item is what one more input item
+# (event, key, campaign, emission row) may cost; raise a budget only together
+# with the change that needs it.
+COLLECTOR_BUDGET = QueryBudget(base=6, per_item=0)
+CONFIG_BUDGET = QueryBudget(base=3)
+KEY_LIST_BUDGET = QueryBudget(base=3)
+CAMPAIGN_LIST_BUDGET = QueryBudget(base=2)
+CAMPAIGN_ANALYTICS_BUDGET = QueryBudget(base=4)
+# one user and one session per batch; each further user or session in a batch
+# adds a fixed few statements, not one set per event
+WORKER_BUDGET = QueryBudget(base=21, per_item=0)
+USAGE_FLUSH_BUDGET = QueryBudget(base=1)
+# the abandon sweep, one claimed batch of up to FAILED_EVENT_RETRY_BATCH rows
+# and the empty claim that ends the run
+RETRY_BUDGET = QueryBudget(base=9, per_item=0)
+# one bulk insert per drain round of DLQ_DRAIN_CONCURRENCY receives
+DLQ_BUDGET = QueryBudget(base=1, per_item=0)
+SESSION_SWEEP_BUDGET = QueryBudget(base=1)
+
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com')
+        self.token = JWTService().create_token(str(self.user.id), self.user.email)
+        self.api_key = APIKey.objects.create(
+            key='cc_budget_key',
+            name='Budget key',
+            user_id=str(self.user.id),
+            industry_category='internet',
+            product='web'
+        )
+        patcher = mock.patch.object(APIKeyService, 'record_usage_deferred')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _auth(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_event_collector(self, apply_async):
+        def run(size):
+            body = serialization.dumps({'events': [sdk_payload(i, 'cc_budget_key') for i in range(size)]})
+
+            def post():
+                response = self.client.post(
+                    '/api/v1/events/',
+                    body,
+                    content_type='application/json',
+                    headers={'X-Tracker-Token': self.api_key.key}
+                )
+                self.assertEqual(response.status_code, 202)
+            return post
+
+        self.assertQueryBudgetScales(COLLECTOR_BUDGET, run, sizes=(1, 25))
+
+    def test_key_config(self):
+        def run(size):
+            for i in range(size):
+                ConversionRule.objects.create(
+                    api_key=self.api_key, name=f'Rule {i}', url_pattern=f'/step-{i}'
+                )
+            cache.clear()
+            return lambda: self.client.get('/api/v1/keys/config', {'api_key': self.api_key.key})
+
+        self.assertQueryBudgetScales(CONFIG_BUDGET, run)
+
+    def test_key_list(self):
+        def run(size):
+            for i in range(size):
+                key = APIKey.objects.create(key=f'cc_list_{size}_{i}', name='Key', user_id=str(self.user.id))
+                ConversionRule.objects.create(api_key=key, name='Rule', url_pattern='/thanks')
+
+            def get():
+                response = self.client.get('/api/v1/keys/', headers=self._auth())
+                self.assertEqual(response.status_code, 200)
+            return get
+
+        self.assertQueryBudgetScales(KEY_LIST_BUDGET, run)
+
+    def test_campaign_list(self):
+        def run(size):
+            for i in range(size):
+                campaign = Campaign.objects.create(user=self.user, name=f'Campaign {size}-{i}')
+                UTMParameter.objects.create(campaign=campaign, user=self.user, value=f'source-{i}')
+
+            def get():
+                response = self.client.get('/api/v1/campaigns/', headers=self._auth())
+                self.assertEqual(response.status_code, 200)
+            return get
+
+        self.assertQueryBudgetScales(CAMPAIGN_LIST_BUDGET, run)
+
+    def test_campaign_analytics(self):
+        campaign = Campaign.objects.create(user=self.user, name='Analytics')
+
+        def run(size):
+            CampaignEmission.objects.filter(campaign=campaign).delete()
+            CampaignEmission.objects.bulk_create([
+                CampaignEmission(campaign=campaign, date=date.today() - timedelta(days=i), impressions=100)
+                for i in range(size)
+            ])
+
+            def get():
+                response = self.client.get(
+                    f'/api/v1/campaigns/{campaign.external_id}/analytics/',
+                    {'start_date': (date.today() - timedelta(days=60)).isoformat()},
+                    headers=self._auth()
+                )
+                self.assertEqual(response.status_code, 200)
+            return get
+
+        self.assertQueryBudgetScales(CAMPAIGN_ANALYTICS_BUDGET, run)
+
+    def test_event_batch_task(self):
+        processor = InternetWebProcessor()
+        offset = iter(range(0, 10_000, 100))
+
+        def run(size):
+            start = next(offset)
+            events = [
+                {
+                    'event_type': 'internet_web',
+                    'user_id': str(self.user.id),
+                    'api_key': self.api_key.key,
+                    'payload': processor.validate_payload(sdk_payload(start + i, 'cc_budget_key')),
+                }
+                for i in range(size)
+            ]
+
+            def process():
+                result = process_event_batch_task.apply(args=[events]).get()
+                self.assertEqual(result['processed'], size)
+            return process
+
+        self.assertQueryBudgetScales(WORKER_BUDGET, run)
+
+    def test_usage_flush_task(self):
+        def run(size):
+            keys = [
+                APIKey.objects.create(key=f'cc_usage_{size}_{i}', name='Key', user_id=str(self.user.id))
+                for i in range(size)
+            ]
+            counts = {str(key.external_id): 3 for key in keys}
+            return lambda: flush_api_key_usage_task.apply(args=[counts]).get()
+
+        self.assertQueryBudgetScales(USAGE_FLUSH_BUDGET, run)
+
+    @mock.patch('core.tasks.process_event_batch_task.delay')
+    def test_retry_failed_events(self, delay):
+        def run(size):
+            FailedEvent.objects.all().delete()
+            FailedEvent.objects.bulk_create([
+                FailedEvent(
+                    event_type='internet_web',
+                    payload=sdk_payload(i, 'cc_budget_key'),
+                    user_id=str(self.user.id),
+                    api_key=self.api_key.key,
+                    error_message='boom',
+                )
+                for i in range(size)
+            ])
+
+            def retry():
+                self.assertEqual(retry_failed_events.apply().get()['submitted'], size)
+            return retry
+
+        self.assertQueryBudgetScales(RETRY_BUDGET, run)
+
+    @override_settings(SQS_DLQ_URL='https://sqs.example.com/dlq', DLQ_DRAIN_CONCURRENCY=1)
+    def test_dlq_drain(self):
+        def run(size):
+            events = [
+                {'event_type': 'internet_web', 'user_id': str(self.user.id), 'api_key': self.api_key.key, 'payload': sdk_payload(i, 'cc_budget_key')}
+                for i in range(size)
+            ]
+            sqs = FakeSQS([_kombu_body([[event]]) for event in events])
+
+            def drain():
+                with mock.patch('boto3.client', return_value=sqs):
+                    self.assertEqual(process_dlq_messages.apply().get()['filed'], size)
+            return drain
+
+        self.assertQueryBudgetScales(DLQ_BUDGET, run)
+
+    def test_session_sweeps(self):
+        def run(size):
+            stale = timezone.now() - timedelta(hours=1)
+            Session.objects.bulk_create([
+                Session(
+                    session_id=f'sweep-{size}-{i}',
+                    api_key=self.api_key,
+                    user_id=str(self.user.id),
+                    first_event=stale,
+                    last_event=stale,
+                )
+                for i in range(size)
+            ])
+
+            return lambda: self.assertEqual(process_active_sessions_task.apply().get()['processed'], size)
+
+        self.assertQueryBudgetScales(SESSION_SWEEP_BUDGET, run)
+        self.assertWithinQueryBudget(SESSION_SWEEP_BUDGET, 11, mark_inactive_sessions_task.apply)
+        self.assertEqual(Session.objects.filter(status=Session.SessionStatus.INACTIVE).count(), 11)
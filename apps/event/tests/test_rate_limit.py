@@ -0,0 +1,134 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from core.services.rate_limit import SlidingWindowLimiter
+
+
+def _body(count: int) -> bytes:
+    return serialization.dumps({'events': [
+        {
+            'event': 'page_view',
+            'session_id': 'session-1',
+            'tracker_token': 'cc_limited_key',
+            'event_id': f'evt-{index}',
+            'user_id': 'visitor-1',
+            'page_url': f'https://example.com/{index}',
+            'timestamp': '2025-01-01T00:00:00Z',
+        }
+        for index in range(count)
+    ]})
+
+
+@mock.patch('core.services.rate_limit.time.time')
+class SlidingWindowLimiterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_refuses_once_the_window_is_full(self, now):
+        now.return_value = 600.0
+        limiter = SlidingWindowLimiter('test', limit=5, window=60)
+
+        self.assertTrue(limiter.hit('a', cost=3).allowed)
+        self.assertTrue(limiter.hit('a', cost=2).allowed)
+        result = limiter.hit('a')
+
+        self.assertFalse(result.allowed)
+        # the next window starts at 660 and has to decay to 4 by then
+        self.assertEqual(result.retry_after, 72)
+        self.assertTrue(limiter.hit('b').allowed)
+
+    def test_refused_hits_are_not_counted(self, now):
+        now.return_value = 600.0
+        limiter = SlidingWindowLimiter('test', limit=5, window=60)
+
+        limiter.hit('a', cost=4)
+        self.assertFalse(limiter.hit('a', cost=2).allowed)
+        self.assertTrue(limiter.hit('a', cost=1).allowed)
+
+    def test_previous_window_slides_out(self, now):
+        limiter = SlidingWindowLimiter('test', limit=10, window=60)
+        now.return_value = 600.0
+        limiter.hit('a', cost=10)
+
+        # a quarter into the next window three quarters of the old count still apply
+        now.return_value = 675.0
+        self.assertTrue(limiter.hit('a', cost=2).allowed)
+        result = limiter.hit('a', cost=2)
+
+        self.assertFalse(result.allowed)
+        # another 9s until 10 * (1 - 24 / 60) + 2 + 2 fits
+        self.assertEqual(result.retry_after, 9)
+
+        now.return_value = 684.0
+        self.assertTrue(limiter.hit('a', cost=2).allowed)
+
+    def test_zero_limit_is_unlimited(self, now):
+        now.return_value = 600.0
+        limiter = SlidingWindowLimiter('test', limit=0)
+
+        self.assertTrue(all(limiter.hit('a', cost=1000).allowed for _ in range(5)))
+
+
+@override_settings(RATE_LIMIT_PLANS={'free': 5, 'pro': 50}, RATE_LIMIT_IP_REQUESTS=100, RATE_LIMIT_NUM_PROXIES=0)
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class CollectorRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_limited_key',
+            name='Limited key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    def _post(self, count: int, **extra):
+        return self.client.post(
+            '/api/v1/events/',
+            _body(count),
+            content_type='application/json',
+            headers={'X-Tracker-Token': self.api_key.key},
+            **extra
+        )
+
+    def test_events_over_the_plan_quota_get_429(self, apply_async):
+        self.assertEqual(self._post(4).status_code, 202)
+
+        response = self._post(4)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(response['X-RateLimit-Limit'], '5')
+        self.assertEqual(apply_async.call_count, 1)
+
+    def test_quota_follows_the_plan(self, apply_async):
+        self.api_key.plan = 'pro'
+        self.api_key.save()
+
+        self.assertEqual(self._post(20).status_code, 202)
+        self.assertEqual(self._post(20).status_code, 202)
+
+    @override_settings(RATE_LIMIT_IP_REQUESTS=2)
+    def test_requests_over_the_ip_limit_get_429(self, apply_async):
+        self.assertEqual(self._post(1).status_code, 202)
+        self.assertEqual(self._post(1).status_code, 202)
+        self.assertEqual(self._post(1).status_code, 429)
+        self.assertEqual(self.client.get('/api/v1/keys/config', {'api_key': self.api_key.key}).status_code, 429)
+
+    @override_settings(RATE_LIMIT_IP_REQUESTS=1, RATE_LIMIT_NUM_PROXIES=None)
+    def test_ip_limit_is_off_until_the_proxy_count_is_set(self, apply_async):
+        self.assertEqual(self._post(1).status_code, 202)
+        self.assertEqual(self._post(1).status_code, 202)
+
+    @override_settings(RATE_LIMIT_IP_REQUESTS=1, RATE_LIMIT_NUM_PROXIES=1)
+    def test_ip_comes_from_the_trusted_proxy_header(self, apply_async):
+        self.assertEqual(self._post(1, HTTP_X_FORWARDED_FOR='10.0.0.1, 203.0.113.1').status_code, 202)
+        self.assertEqual(self._post(1, HTTP_X_FORWARDED_FOR='10.0.0.1, 203.0.113.2').status_code, 202)
+        self.assertEqual(self._post(1, HTTP_X_FORWARDED_FOR='10.0.0.9, 203.0.113.2').status_code, 429)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_limits_can_be_switched_off(self, apply_async):
+        self.assertEqual(self._post(4).status_code, 202)
+        self.assertEqual(self._post(4).status_code, 202)
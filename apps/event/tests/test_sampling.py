@@ -0,0 +1,151 @@
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from apps.apikey.models import APIKey
+from apps.common import serialization
+from core.services.sampling import keeps_session, sample_events, session_bucket
+from domain.internet.ads.processers import InternetAdsProcessor
+from domain.internet.web.processers import InternetWebProcessor
+
+
+def _payload(session_id: str, event_id: str = 'evt-1', **fields) -> dict:
+    payload = {
+        'event': 'page_view',
+        'session_id': session_id,
+        'tracker_token': 'cc_sampling_key',
+        'event_id': event_id,
+        'user_id': 'visitor-1',
+        'page_url': 'https://example.com/',
+        'timestamp': '2025-01-01T00:00:00Z',
+    }
+    payload.update(fields)
+    return payload
+
+
+def _sessions(rate: float, kept: bool, count: int = 1) -> list:
+    return [f'session-{i}' for i in range(1000) if keeps_session(f'session-{i}', rate) == kept][:count]
+
+
+class SessionSamplingTests(SimpleTestCase):
+    def test_hash_is_fnv1a_32(self):
+        # published FNV-1a test vectors; the SDK must agree with these
+        self.assertEqual(session_bucket(''), 0x811c9dc5)
+        self.assertEqual(session_bucket('a'), 0xe40c292c)
+        self.assertEqual(session_bucket('foobar'), 0xbf9cf968)
+
+    def test_whole_sessions_are_kept_or_dropped(self):
+        kept, dropped = _sessions(0.3, True)[0], _sessions(0.3, False)[0]
+        events = [
+            {'payload': _payload(kept, 'evt-1')},
+            {'payload': _payload(dropped, 'evt-2')},
+            {'payload': _payload(kept, 'evt-3')},
+        ]
+
+        sampled = sample_events(events, 0.3)
+
+        self.assertEqual([event['payload']['event_id'] for event in sampled], ['evt-1', 'evt-3'])
+        self.assertTrue(all(event['payload']['sampling_rate'] == 0.3 for event in sampled))
+
+    def test_kept_fraction_follows_the_rate(self):
+        kept = sum(keeps_session(f'session-{i}', 0.1) for i in range(20000))
+
+        self.assertAlmostEqual(kept / 20000, 0.1, delta=0.01)
+
+    def test_unsampled_keys_cannot_claim_a_rate(self):
+        events = [{'payload': _payload('session-1', sampling_rate=0.01)}]
+
+        sampled = sample_events(events, 1.0)
+
+        self.assertNotIn('sampling_rate', sampled[0]['payload'])
+
+
+class SampledEmissionTests(SimpleTestCase):
+    def test_emissions_are_scaled_by_the_inverse_rate(self):
+        processor = InternetWebProcessor()
+        payload = processor.validate_payload(_payload('session-1'))
+        full = processor.process(payload)
+
+        result = processor.process({**payload, 'sampling_rate': 0.25})
+
+        self.assertEqual(result.kg_co2_emitted, full.kg_co2_emitted * 4)
+        sampling = result.metadata['sampling']
+        self.assertEqual(sampling['rate'], 0.25)
+        self.assertEqual(sampling['observed_kg'], float(full.kg_co2_emitted))
+        low, high = sampling['ci95_narrowest_kg']
+        self.assertLessEqual(low, float(result.kg_co2_emitted))
+        self.assertGreater(high, float(result.kg_co2_emitted))
+
+    def test_unsampled_events_are_left_alone(self):
+        processor = InternetWebProcessor()
+
+        result = processor.process(processor.validate_payload(_payload('session-1')))
+
+        self.assertNotIn('sampling', result.metadata)
+
+
+@mock.patch('core.tasks.process_event_batch_task.apply_async')
+class CollectorSamplingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        APIKey.objects.create(
+            key='cc_sampling_key',
+            name='Sampling key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web',
+            sampling_rate=0.2
+        )
+
+    def _post(self, payloads):
+        return self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': payloads}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_sampling_key'}
+        )
+
+    def test_out_of_sample_sessions_are_not_queued(self, apply_async):
+        kept, dropped = _sessions(0.2, True)[0], _sessions(0.2, False)[0]
+
+        response = self._post([_payload(kept, 'evt-1'), _payload(dropped, 'evt-2')])
+
+        self.assertEqual(serialization.loads(response.content)['event_count'], 1)
+        apply_async.assert_called_once()
+
+    def test_a_batch_of_dropped_sessions_is_accepted(self, apply_async):
+        dropped = _sessions(0.2, False, 2)
+
+        response = self._post([_payload(dropped[0], 'evt-1'), _payload(dropped[1], 'evt-2')])
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(serialization.loads(response.content)['event_count'], 0)
+        apply_async.assert_not_called()
+
+    def test_ads_keys_are_scaled_like_web_keys(self, apply_async):
+        APIKey.objects.create(
+            key='cc_sampling_ads',
+            name='Sampling ads key',
+            user_id='user-1',
+            industry_category='internet',
+            product='ads',
+            sampling_rate=0.2
+        )
+        kept = _sessions(0.2, True)[0]
+        payload = _payload(kept, 'evt-ads', tracker_token='cc_sampling_ads', utm_params={'utm_source': 'google'})
+
+        self.client.post(
+            '/api/v1/events/',
+            serialization.dumps({'events': [payload]}),
+            content_type='application/json',
+            headers={'X-Tracker-Token': 'cc_sampling_ads'}
+        )
+        # delay() hands apply_async the task arguments positionally
+        queued = apply_async.call_args.args[0][0][0]['payload']
+        self.assertEqual(queued['sampling_rate'], 0.2)
+
+        processor = InternetAdsProcessor()
+        sampled = processor.process(processor.validate_payload(queued))
+        unsampled = processor.process(processor.validate_payload(payload))
+        self.assertEqual(sampled.kg_co2_emitted, unsampled.kg_co2_emitted * 5)
+        self.assertEqual(sampled.metadata['sampling']['rate'], 0.2)
@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.test import SimpleTestCase
+from kombu.serialization import dumps, loads
+from apps.common import serialization
+from apps.common.response import ORJSONResponse, response_factory
+from domain.internet.web.processers import InternetWebProcessor
+
+
+class SerializationTestCase(SimpleTestCase):
+    def test_native_types(self):
+        external_id = uuid.uuid4()
+        data = {
+            'timestamp': datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc),
+            'amount': Decimal('0.000123'),
+            'id': external_id,
+        }
+
+        self.assertEqual(serialization.loads(serialization.dumps(data)), {
+            'timestamp': '2025-01-01T12:30:00+00:00',
+            'amount': '0.000123',
+            'id': str(external_id),
+        })
+
+    def test_sort_keys(self):
+        self.assertEqual(serialization.dumps({'b': 1, 'a': 2}, sort_keys=True), b'{"a":2,"b":1}')
+
+    def test_kombu_round_trip(self):
+        content_type, content_encoding, body = dumps(([{'event_type': 'internet_web'}], {}), serializer='orjson')
+
+        self.assertEqual(content_type, serialization.CONTENT_TYPE)
+        self.assertEqual(
+            loads(body, content_type, content_encoding, accept=[serialization.CONTENT_TYPE]),
+            [[{'event_type': 'internet_web'}], {}]
+        )
+
+    def test_response(self):
+        response = response_factory(data={'kg': Decimal('1.5')}, message='ok')
+
+        self.assertIsInstance(response, ORJSONResponse)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(serialization.loads(response.content)['data'], {'kg': '1.5'})
+
+        with self.assertRaises(TypeError):
+            ORJSONResponse([1, 2])
+
+    def test_processor_accepts_serialized_timestamp(self):
+        processor = InternetWebProcessor()
+        payload = processor.validate_payload({
+            'event': 'page_view',
+            'session_id': 'session-1',
+            'tracker_token': 'cc_key',
+            'event_id': 'evt-1',
+            'user_id': 'visitor-1',
+            'page_url': 'https://example.com/',
+            'timestamp': '2025-01-01T00:00:00Z',
+        })
+
+        result = processor.process(serialization.loads(serialization.dumps(payload)))
+        self.assertEqual(result.metadata['timestamp'], '2025-01-01T00:00:00+00:00')
@@ -0,0 +1,242 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.apikey.models import APIKey
+from apps.common.testing import queued_event
+from apps.event.models import EventOutbox, ProcessedEvent
+from core.db.events import EventOutboxData
+from core.services.event_envelope import encode_batch
+from core.services.event_queue import EventQueueService
+from core.services.local_queue import LocalQueueWorker
+from core.services.tenant_scheduling import (
+    DeficitRoundRobin,
+    TenantInFlightLimiter,
+    batch_owner,
+    partition_for,
+    partition_queue,
+)
+from core.tasks import process_event_batch_task
+
+
+def _event(index: int, user_id: str = 'user-1', session_id: str = 'session-1') -> dict:
+    # per-user event ids, or users' events would dedupe against each other
+    return queued_event(index, user_id, session_id, api_key=f'cc_{user_id}', event_id=f'{user_id}-evt-{index}')
+
+
+class PartitionTests(SimpleTestCase):
+    def test_partition_is_stable_and_in_range(self):
+        partitions = [partition_for(f'user-{index}', 8) for index in range(200)]
+
+        self.assertEqual(partitions, [partition_for(f'user-{index}', 8) for index in range(200)])
+        self.assertEqual(set(partitions), set(range(8)))
+
+    def test_partitioning_is_off_by_default(self):
+        self.assertIsNone(partition_queue('user-1', 'key-1'))
+
+    @override_settings(EVENT_QUEUE_PARTITIONS=4, EVENT_QUEUE_PARTITION_PREFIX='events')
+    def test_queue_follows_the_user(self):
+        self.assertEqual(partition_queue('user-1', 'key-1'), partition_queue('user-1', 'key-2'))
+        self.assertEqual(partition_queue('user-1'), f"events-{partition_for('user-1', 4)}")
+
+    @override_settings(EVENT_QUEUE_PARTITIONS=4, EVENT_QUEUE_PARTITION_KEY='api_key')
+    def test_queue_can_follow_the_api_key(self):
+        self.assertEqual(partition_queue('user-1', 'key-1'), partition_queue('user-2', 'key-1'))
+
+
+class DeficitRoundRobinTests(SimpleTestCase):
+    def test_lease_is_split_evenly(self):
+        scheduler = DeficitRoundRobin(quantum=10)
+
+        self.assertEqual(scheduler.allocate(['a', 'b'], 100), {'a': 50, 'b': 50})
+
+    def test_weights_scale_the_share(self):
+        scheduler = DeficitRoundRobin(quantum=10, weights={'a': 3})
+
+        self.assertEqual(scheduler.allocate(['a', 'b'], 80), {'a': 60, 'b': 20})
+
+    def test_capped_tenants_get_nothing(self):
+        scheduler = DeficitRoundRobin(quantum=10)
+
+        self.assertEqual(scheduler.allocate(['a', 'b'], 100, caps={'a': 0}), {'b': 100})
+        self.assertNotIn('a', scheduler.deficits)
+
+    def test_small_weights_accumulate_credit(self):
+        scheduler = DeficitRoundRobin(quantum=1, weights={'a': 0.5})
+
+        self.assertEqual(scheduler.allocate(['a'], 1), {})
+        self.assertEqual(scheduler.allocate(['a'], 1), {'a': 1})
+
+    def test_drained_tenants_lose_their_credit(self):
+        scheduler = DeficitRoundRobin(quantum=10, weights={'a': 0.5})
+        grants = scheduler.allocate(['a', 'b'], 7)
+
+        scheduler.settle(grants, {'b': grants.get('b', 0)})
+
+        self.assertNotIn('a', scheduler.deficits)
+
+    def test_credit_outlives_a_page_without_the_tenant(self):
+        scheduler = DeficitRoundRobin(quantum=10)
+        scheduler.allocate(['a', 'b'], 12)
+
+        scheduler.allocate(['c'], 10)
+
+        self.assertEqual(scheduler.deficits, {'b': 8})
+
+
+class TenantInFlightLimiterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_disabled_by_default(self):
+        limiter = TenantInFlightLimiter()
+
+        self.assertFalse(limiter.enabled)
+        self.assertTrue(all(limiter.acquire('user-1') for _ in range(10)))
+
+    def test_limits_batches_per_tenant(self):
+        limiter = TenantInFlightLimiter(limit=2, ttl=60)
+
+        self.assertTrue(limiter.acquire('user-1'))
+        self.assertTrue(limiter.acquire('user-1'))
+        self.assertFalse(limiter.acquire('user-1'))
+        self.assertTrue(limiter.acquire('user-2'))
+
+        limiter.release('user-1')
+        self.assertTrue(limiter.acquire('user-1'))
+
+    def test_releases_after_an_expiry_do_not_free_extra_slots(self):
+        limiter = TenantInFlightLimiter(limit=1, ttl=60)
+        limiter.acquire('user-1')
+        # user-1's count expired mid-flight and another batch started since
+        cache.delete(limiter._key('user-1'))
+        self.assertTrue(limiter.acquire('user-1'))
+
+        limiter.release('user-1')
+        limiter.release('user-1')
+
+        self.assertEqual(cache.get(limiter._key('user-1')), 0)
+        self.assertTrue(limiter.acquire('user-1'))
+        self.assertFalse(limiter.acquire('user-1'))
+
+
+class TenantRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            key='cc_user-1',
+            name='Tenant key',
+            user_id='user-1',
+            industry_category='internet',
+            product='web'
+        )
+
+    @override_settings(EVENT_QUEUE_PARTITIONS=4)
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_batches_are_published_to_the_tenant_partition(self, apply_async):
+        EventQueueService().queue_events_batch('user-1', [_event(1)], 'cc_user-1', str(self.api_key.external_id))
+
+        self.assertEqual(apply_async.call_args.kwargs['queue'], partition_queue('user-1'))
+
+    @override_settings(EVENT_QUEUE_PARTITIONS=4, EVENT_QUEUE_PARTITION_KEY='api_key', EVENT_ENVELOPE_VERSION=0)
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_legacy_batches_carry_their_api_key_id(self, apply_async):
+        api_key_id = str(self.api_key.external_id)
+        EventQueueService().queue_events_batch('user-1', [_event(1)], 'cc_user-1', api_key_id)
+
+        events = apply_async.call_args.kwargs['args'][0]
+        self.assertEqual(batch_owner(events), ('user-1', api_key_id))
+        self.assertEqual(apply_async.call_args.kwargs['queue'], partition_queue(*batch_owner(events)))
+
+    @override_settings(EVENT_TENANT_MAX_IN_FLIGHT=1, EVENT_TENANT_REQUEUE_DELAY=5)
+    @mock.patch('core.tasks.process_event_batch_task.apply_async')
+    def test_batches_over_the_in_flight_limit_are_requeued(self, apply_async):
+        envelope = encode_batch([_event(1)], user_id='user-1', api_key_id=str(self.api_key.external_id))
+        TenantInFlightLimiter().acquire('user-1')
+
+        result = process_event_batch_task.apply(args=[envelope]).get()
+
+        self.assertEqual(result['status'], 'deferred')
+        self.assertEqual(apply_async.call_args.kwargs['countdown'], 5)
+        self.assertEqual(apply_async.call_args.kwargs['serializer'], 'msgpack')
+        self.assertFalse(ProcessedEvent.objects.exists())
+
+    @override_settings(EVENT_TENANT_MAX_IN_FLIGHT=1)
+    def test_slot_is_released_after_the_batch(self):
+        envelope = encode_batch([_event(1)], user_id='user-1', api_key_id=str(self.api_key.external_id))
+
+        process_event_batch_task.apply(args=[envelope]).get()
+
+        self.assertEqual(ProcessedEvent.objects.count(), 1)
+        self.assertTrue(TenantInFlightLimiter().acquire('user-1'))
+
+
+@override_settings(EVENT_QUEUE_BACKEND='postgres', EVENT_QUEUE_TENANT_QUANTUM=2)
+class FairLeaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for user_id in ('user-1', 'user-2'):
+            APIKey.objects.create(
+                key=f'cc_{user_id}',
+                name=f'{user_id} key',
+                user_id=user_id,
+                industry_category='internet',
+                product='web'
+            )
+
+    def test_backfill_does_not_crowd_out_other_tenants(self):
+        outbox = EventOutboxData()
+        outbox.append([_event(i, 'user-1') for i in range(50)])
+        outbox.append([_event(i, 'user-2', 'session-2') for i in range(4)])
+
+        result = LocalQueueWorker(batch_size=8).run_once()
+
+        self.assertEqual(result['leased'], 8)
+        self.assertEqual(ProcessedEvent.objects.filter(user_id='user-2').count(), 4)
+        self.assertEqual(EventOutbox.objects.filter(user_id='user-1').count(), 46)
+
+    @override_settings(EVENT_TENANT_MAX_IN_FLIGHT=1)
+    def test_tenants_at_their_lease_limit_are_skipped(self):
+        outbox = EventOutboxData()
+        outbox.append([_event(i, 'user-1') for i in range(4)])
+        outbox.lease(1, visibility_timeout=60)
+        outbox.append([_event(i, 'user-2', 'session-2') for i in range(2)])
+
+        result = LocalQueueWorker(batch_size=10).run_once()
+
+        self.assertEqual(result['leased'], 2)
+        self.assertEqual(EventOutbox.objects.filter(user_id='user-1').count(), 4)
+
+    def test_every_tenant_is_reached_when_one_lease_cannot_serve_them_all(self):
+        outbox = EventOutboxData()
+        for user in range(1, 7):
+            APIKey.objects.get_or_create(
+                key=f'cc_user-{user}',
+                defaults={
+                    'name': f'user-{user} key',
+                    'user_id': f'user-{user}',
+                    'industry_category': 'internet',
+                    'product': 'web'
+                }
+            )
+            outbox.append([_event(i, f'user-{user}', f'session-{user}') for i in range(3)])
+
+        # a lease of 4 rows serves two users at a quantum of 2
+        worker = LocalQueueWorker(batch_size=4)
+        for _ in range(3):
+            worker.run_once()
+
+        self.assertEqual(
+            sorted(set(ProcessedEvent.objects.values_list('user_id', flat=True))),
+            [f'user-{user}' for user in range(1, 7)]
+        )
+
+    def test_pending_tenants_page_through_every_user(self):
+        outbox = EventOutboxData()
+        for user in range(1, 6):
+            outbox.append([_event(0, f'user-{user}', f'session-{user}')])
+
+        pages = [outbox.pending_tenants(2)]
+        for _ in range(2):
+            pages.append(outbox.pending_tenants(2, after=pages[-1][-1]))
+
+        self.assertEqual(pages, [['user-1', 'user-2'], ['user-3', 'user-4'], ['user-5', 'user-1']])
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from core.tasks import process_event_batch_task
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class WorkerMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _event(self, run_id, **overrides):
+        now = timezone.now()
+        event = {
+            'event_type': 'oil_gas_lubricant',
+            'user_id': 'user-1',
+            'queued_at': (now - timedelta(seconds=5)).isoformat(),
+            'payload': {
+                'machine_id': 'machine-1',
+                'run_id': run_id,
+                'volume_liters': 10.0,
+                'started_at': now - timedelta(hours=1),
+                'ended_at': now,
+                'machine_type': 'generic',
+                'location': '',
+            },
+        }
+        event.update(overrides)
+        return event
+
+    @mock.patch('core.tasks._log_failed_event')
+    def test_outcomes_lag_and_stages(self, log_failed_event):
+        labels = {'event_type': 'oil_gas_lubricant'}
+        processed = _sample('carboncut_worker_events_total', outcome='processed', **labels)
+        skipped = _sample('carboncut_worker_events_total', outcome='skipped', **labels)
+        unknown = _sample('carboncut_worker_events_total', event_type='unknown_type', outcome='failed')
+        lag_count = _sample('carboncut_worker_event_lag_seconds_count', **labels)
+        lag_sum = _sample('carboncut_worker_event_lag_seconds_sum', **labels)
+        ledger = _sample('carboncut_worker_stage_duration_seconds_count', stage='ledger_batch', **labels)
+        dedupe = _sample('carboncut_worker_stage_duration_seconds_count', stage='dedupe_batch', **labels)
+        batches = _sample('carboncut_worker_batch_size_count')
+
+        process_event_batch_task.apply(args=[[
+            self._event('run-1'),
+            self._event('run-1'),
+            self._event('run-2', event_type='unknown_type'),
+        ]]).get()
+
+        self.assertEqual(_sample('carboncut_worker_events_total', outcome='processed', **labels) - processed, 1)
+        self.assertEqual(_sample('carboncut_worker_events_total', outcome='skipped', **labels) - skipped, 1)
+        self.assertEqual(_sample('carboncut_worker_events_total', event_type='unknown_type', outcome='failed') - unknown, 1)
+        self.assertEqual(_sample('carboncut_worker_event_lag_seconds_count', **labels) - lag_count, 2)
+        self.assertGreaterEqual(_sample('carboncut_worker_event_lag_seconds_sum', **labels) - lag_sum, 10)
+        self.assertEqual(_sample('carboncut_worker_stage_duration_seconds_count', stage='ledger_batch', **labels) - ledger, 1)
+        self.assertEqual(_sample('carboncut_worker_stage_duration_seconds_count', stage='dedupe_batch', **labels) - dedupe, 1)
+        self.assertEqual(_sample('carboncut_worker_batch_size_count') - batches, 1)
+
+    @mock.patch('core.db.carbon.CarbonData.save_transactions', side_effect=RuntimeError('deadlock'))
+    def test_failed_batch_write_falls_back_to_one_by_one(self, save_transactions):
+        from apps.event.models import CarbonTransaction, ProcessedEvent
+
+        result = process_event_batch_task.apply(args=[[self._event('run-1'), self._event('run-2')]]).get()
+
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(ProcessedEvent.objects.count(), 2)
+        self.assertEqual(CarbonTransaction.objects.count(), 2)
+
+    @mock.patch('core.tasks._Ledger._api_key_obj', return_value=mock.Mock())
+    @mock.patch('core.services.session.session_service.SessionService.update_many', side_effect=RuntimeError('timeout'))
+    def test_failed_session_update_keeps_the_recorded_events(self, update_many, api_key_obj):
+        from apps.event.models import FailedEvent, ProcessedEvent
+
+        events = [self._event('run-1', api_key='cc_test_key'), self._event('run-2', api_key='cc_test_key')]
+        result = process_event_batch_task.apply(args=[events]).get()
+
+        update_many.assert_called_once()
+        self.assertEqual((result['processed'], result['skipped']), (2, 0))
+        self.assertEqual(ProcessedEvent.objects.count(), 2)
+        self.assertFalse(FailedEvent.objects.exists())
@@ -0,0 +1,32 @@
+"""Calculator microbenchmarks; no database or Django setup needed."""
+from typing import List
+from calculators import InternetAdsCalculator, InternetWebsiteCalculator, OilGasLubricantCalculator
+from .harness import measure, result
+
+CASES = [
+    ('internet_website', InternetWebsiteCalculator, {
+        'bytes_transferred': 2_300_000,
+        'device_type': 'mobile',
+        'country_code': 'US',
+        'session_duration_minutes': 1.5,
+    }),
+    ('internet_ads', InternetAdsCalculator, {
+        'platform': 'google_ads',
+        'ad_format': 'static_display',
+        'impressions': 1,
+        'device_type': 'desktop',
+        'country_code': 'US',
+    }),
+    ('oil_gas_lubricant', OilGasLubricantCalculator, {
+        'volume_liters': 42.0,
+    }),
+]
+
+
+def run(repeat: int = 2000, **kwargs) -> List[dict]:
+    results = []
+    for name, calculator_class, calc_input in CASES:
+        calculator = calculator_class()
+        stats = measure(lambda: calculator.calculate(calc_input), repeat=repeat, warmup=50)
+        results.append(result('calculators', name, stats))
+    return results
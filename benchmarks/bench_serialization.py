@@ -0,0 +1,104 @@
+"""
+Compare stdlib/kombu JSON against the orjson layer on realistic SDK batches.
+
+    python benchmarks/bench_serialization.py --events 50 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.core.serializers.json import DjangoJSONEncoder
+from kombu.utils import json as kombu_json
+from apps.common import serialization
+
+
+def build_batch(event_count: int) -> list:
+    now = datetime.now(timezone.utc)
+    events = []
+    for i in range(event_count):
+        events.append({
+            'event_type': 'internet_web',
+            'api_key': 'cc_benchmark_key',
+            'user_id': 'user-1',
+            'industry_category': 'internet',
+            'product': 'web',
+            'queued_at': now,
+            'payload': {
+                'event': 'page_view' if i % 4 else 'ping',
+                'session_id': f'session-{i % 7}',
+                'tracker_token': 'cc_benchmark_key',
+                'event_id': str(uuid.uuid4()),
+                'user_id': f'visitor-{i % 13}',
+                'page_url': f'https://example.com/products/{i}?utm_source=newsletter',
+                'referrer': 'https://www.google.com/',
+                'timestamp': now - timedelta(seconds=i),
+                'utm_params': {'utm_source': 'newsletter', 'utm_medium': 'email'},
+                'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 '
+                              '(KHTML, like Gecko) Version/17.0 Safari/605.1.15',
+                'screen_resolution': '1440x900',
+                'viewport_size': '1440x789',
+                'language': 'en-US',
+                'timezone': 'Europe/Berlin',
+                'page_title': f'Product {i}',
+                'bytesPerPageView': 1843200 + i,
+                'resource_types': {'script': 14, 'img': 32, 'css': 4},
+                'time_spent_seconds': 30,
+                'conversion_value': Decimal('19.99'),
+            },
+        })
+    return events
+
+
+def _bench(label: str, func, repeat: int) -> float:
+    per_call = min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
+    print(f"  {label:<28} {per_call * 1e6:>10.1f} us")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=50, help='events per batch')
+    parser.add_argument('--repeat', type=int, default=200, help='calls per timing run')
+    args = parser.parse_args()
+
+    batch = build_batch(args.events)
+    task_body = ((batch,), {}, {'callbacks': None, 'errbacks': None, 'chain': None, 'chord': None})
+    request_body = json.dumps(batch, cls=DjangoJSONEncoder).encode('utf-8')
+
+    kombu_encoded = kombu_json.dumps(task_body)
+    orjson_encoded = serialization.dumps(task_body)
+
+    print(f"Batch of {args.events} events")
+    print(f"  kombu json message size      {len(kombu_encoded):>10} bytes")
+    print(f"  orjson message size          {len(orjson_encoded):>10} bytes")
+
+    print("\nCollector request parse")
+    baseline = _bench('json.loads', lambda: json.loads(request_body), args.repeat)
+    fast = _bench('orjson loads', lambda: serialization.loads(request_body), args.repeat)
+    print(f"  speedup                      {baseline / fast:>10.1f}x")
+
+    print("\nAPI response render")
+    baseline = _bench('DjangoJSONEncoder', lambda: json.dumps(batch, cls=DjangoJSONEncoder).encode('utf-8'), args.repeat)
+    fast = _bench('orjson dumps', lambda: serialization.dumps(batch), args.repeat)
+    print(f"  speedup                      {baseline / fast:>10.1f}x")
+
+    print("\nCelery message encode")
+    baseline = _bench('kombu json', lambda: kombu_json.dumps(task_body), args.repeat)
+    fast = _bench('orjson', lambda: serialization.dumps(task_body), args.repeat)
+    print(f"  speedup                      {baseline / fast:>10.1f}x")
+
+    print("\nCelery message decode")
+    baseline = _bench('kombu json', lambda: kombu_json.loads(kombu_encoded), args.repeat)
+    fast = _bench('orjson', lambda: serialization.loads(orjson_encoded), args.repeat)
+    print(f"  speedup                      {baseline / fast:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Worker benchmark: process_event_batch_task run eagerly against the configured
+database, both from the legacy list and from a msgpack envelope.
+"""
+import itertools
+from typing import List
+from .generators import ads_batch, oil_batch, sdk_batch
+from .harness import measure, result
+
+
+def _queued_events(processor, event_type: str, payloads: List[dict], api_key) -> List[dict]:
+    validated, errors = processor.validate_batch(payloads)
+    if errors:
+        raise RuntimeError(f"Generated payloads failed validation: {errors[:3]}")
+    return [
+        {
+            'event_type': event_type,
+            'payload': payload,
+            'api_key': api_key.key if api_key else None,
+            'user_id': 'bench-user',
+            'industry_category': api_key.industry_category if api_key else None,
+            'product': api_key.product if api_key else None,
+        }
+        for payload in validated
+    ]
+
+
+def run(repeat: int = 10, batch_size: int = 100, **kwargs) -> List[dict]:
+    from apps.apikey.models import APIKey
+    from core.services.apikey_service import APIKeyService
+    from core.services.event_envelope import encode_batch
+    from core.tasks import process_event_batch_task
+    from domain.registry import EventProcessorRegistry
+
+    web_key = APIKey.objects.create(
+        key='cc_bench_worker_web', name='Worker benchmark (web)', user_id='bench-user',
+        industry_category='internet', product='web'
+    )
+    ads_key = APIKey.objects.create(
+        key='cc_bench_worker_ads', name='Worker benchmark (ads)', user_id='bench-user',
+        industry_category='internet', product='ads'
+    )
+    web_key_domain = APIKeyService().get_api_key_by_id(str(web_key.external_id), 'bench-user')
+
+    cases = [
+        ('internet_web', lambda seed: sdk_batch(batch_size, web_key.key, seed=seed), web_key),
+        ('internet_ads', lambda seed: ads_batch(batch_size, ads_key.key, seed=seed), ads_key),
+        ('oil_gas_lubricant', lambda seed: oil_batch(batch_size, seed=seed), None),
+    ]
+    seeds = itertools.count(1)
+    batch = {}
+    results = []
+
+    def process():
+        outcome = process_event_batch_task.apply(args=[batch['events']]).get()
+        if outcome['failed']:
+            raise RuntimeError(f"{outcome['failed']} events failed")
+
+    for event_type, generate, api_key in cases:
+        processor = EventProcessorRegistry.get_processor(event_type)
+
+        # fresh event ids per call, otherwise everything after the first call is a dedupe hit
+        def setup():
+            batch['events'] = _queued_events(processor, event_type, generate(next(seeds)), api_key)
+
+        stats = measure(process, repeat=repeat, setup=setup, items_per_call=batch_size)
+        results.append(result('worker', f'{event_type}.list', stats, batch_size=batch_size))
+
+    def setup_duplicates():
+        batch['events'] = _queued_events(
+            EventProcessorRegistry.get_processor('internet_web'), 'internet_web', sdk_batch(batch_size, web_key.key), web_key
+        )
+
+    setup_duplicates()
+    process_event_batch_task.apply(args=[batch['events']]).get()
+    stats = measure(process, repeat=repeat, setup=setup_duplicates, items_per_call=batch_size)
+    results.append(result('worker', 'internet_web.duplicates', stats, batch_size=batch_size))
+
+    def setup_envelope():
+        events = _queued_events(
+            EventProcessorRegistry.get_processor('internet_web'), 'internet_web', sdk_batch(batch_size, web_key.key, seed=next(seeds)), web_key
+        )
+        batch['events'] = encode_batch(events, 'bench-user', web_key_domain.id)
+
+    stats = measure(process, repeat=repeat, setup=setup_envelope, items_per_call=batch_size)
+    results.append(result('worker', 'internet_web.envelope', stats, batch_size=batch_size))
+
+    return results
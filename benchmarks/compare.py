@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare base.json head.json --threshold 0.10
+
+Exits with status 1 when any benchmark's p50 got slower than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def _index(path: str) -> dict:
+    with open(path) as f:
+        document = json.load(f)
+    return document.get('meta', {}), {f"{row['suite']}.{row['name']}": row for row in document['results']}
+
+
+def compare(base: dict, head: dict, threshold: float):
+    rows = []
+    regressions = []
+    for name in sorted(set(base) | set(head)):
+        if name not in base or name not in head:
+            rows.append((name, base.get(name, {}).get('p50_ms'), head.get(name, {}).get('p50_ms'), None))
+            continue
+        before, after = base[name]['p50_ms'], head[name]['p50_ms']
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare benchmark results')
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed p50 slowdown (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    base_meta, base = _index(args.base)
+    head_meta, head = _index(args.head)
+    rows, regressions = compare(base, head, args.threshold)
+
+    print(f"base {base_meta.get('revision')}  ->  head {head_meta.get('revision')}")
+    print(f"{'benchmark':<44} {'base p50':>10} {'head p50':>10} {'change':>9}")
+    for name, before, after, change in rows:
+        before_text = f'{before:.3f}' if before is not None else '-'
+        after_text = f'{after:.3f}' if after is not None else '-'
+        change_text = f'{change:+.1%}' if change is not None else 'n/a'
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<44} {before_text:>10} {after_text:>10} {change_text:>9}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Deterministic synthetic events shaped like SDKEventPayload, AdsEventPayload and
+OilEventPayload. The same seed always yields the same batch so results are
+comparable between commits.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 '
+    '(KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 '
+    '(KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 '
+    '(KHTML, like Gecko) Version/17.0 Safari/605.1.15',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Mobile Safari/537.36',
+]
+SCREENS = ['1920x1080', '1440x900', '390x844', '820x1180', '412x915']
+SDK_EVENTS = ['page_view'] * 6 + ['ping'] * 3 + ['click', 'conversion']
+AD_PLATFORMS = ['google', 'facebook', 'linkedin', 'twitter', 'tiktok']
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def sdk_event(rng: random.Random, tracker_token: str, index: int, sessions: int = 20) -> dict:
+    event = rng.choice(SDK_EVENTS)
+    payload = {
+        'event': event,
+        'session_id': f'session-{rng.randrange(sessions)}',
+        'tracker_token': tracker_token,
+        'event_id': _uuid(rng),
+        'user_id': f'visitor-{rng.randrange(sessions * 3)}',
+        'page_url': f'https://shop.example.com/products/{rng.randrange(500)}?ref=home',
+        'referrer': rng.choice(['', 'https://www.google.com/', 'https://news.example.org/']),
+        'timestamp': (BASE_TIME + timedelta(seconds=index)).isoformat(),
+        'utm_params': {'utm_source': 'newsletter', 'utm_medium': 'email'} if rng.random() < 0.3 else {},
+        'user_agent': rng.choice(USER_AGENTS),
+        'screen_resolution': rng.choice(SCREENS),
+        'viewport_size': '1280x720',
+        'language': 'en-US',
+        'timezone': 'Europe/Berlin',
+        'page_title': f'Product {index}',
+    }
+    if event == 'page_view':
+        payload['bytesPerPageView'] = rng.randint(300_000, 4_000_000)
+        payload['resourceCount'] = rng.randint(10, 120)
+    elif event == 'ping':
+        payload['time_spent_seconds'] = 30
+        payload['is_visible'] = True
+    elif event == 'click':
+        payload['bytesPerClick'] = rng.randint(500, 20_000)
+    else:
+        payload['conversion_type'] = 'purchase'
+        payload['conversion_value'] = round(rng.uniform(5, 300), 2)
+        payload['bytesPerConversion'] = rng.randint(1_000, 50_000)
+    return payload
+
+
+def ads_event(rng: random.Random, tracker_token: str, index: int, sessions: int = 20) -> dict:
+    payload = sdk_event(rng, tracker_token, index, sessions)
+    platform = rng.choice(AD_PLATFORMS)
+    payload['utm_params'] = {
+        'utm_source': platform,
+        'utm_campaign': f'campaign-{rng.randrange(10)}',
+        'utm_content': f'ad-{rng.randrange(50)}',
+    }
+    payload['platform'] = platform
+    return payload
+
+
+def oil_event(rng: random.Random, index: int) -> dict:
+    started_at = BASE_TIME + timedelta(minutes=index * 15)
+    return {
+        'machine_id': f'machine-{rng.randrange(25)}',
+        'run_id': _uuid(rng),
+        'volume_liters': round(rng.uniform(0.5, 250), 3),
+        'started_at': started_at.isoformat(),
+        'ended_at': (started_at + timedelta(minutes=rng.randint(5, 240))).isoformat(),
+        'machine_type': rng.choice(['generic', 'compressor', 'turbine']),
+        'location': rng.choice(['', 'site-a', 'site-b']),
+    }
+
+
+def sdk_batch(size: int, tracker_token: str = 'cc_bench_web', seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [sdk_event(rng, tracker_token, i) for i in range(size)]
+
+
+def ads_batch(size: int, tracker_token: str = 'cc_bench_ads', seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [ads_event(rng, tracker_token, i) for i in range(size)]
+
+
+def oil_batch(size: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [oil_event(rng, i) for i in range(size)]
@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int,
+    warmup: int = 1,
+    items_per_call: int = 1,
+    setup: Optional[Callable[[], object]] = None
+) -> Dict[str, float]:
+    """Time func() `repeat` times; setup() runs before every call and is not timed"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        'calls': repeat,
+        'items_per_call': items_per_call,
+        'mean_ms': mean * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p95_ms': samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000,
+        'min_ms': samples[0] * 1000,
+        'items_per_sec': items_per_call / mean if mean else 0.0,
+    }
+
+
+def result(suite: str, name: str, stats: Dict[str, float], **params) -> dict:
+    return {'suite': suite, 'name': name, 'params': params, **stats}
+
+
+def setup_django(settings_module: Optional[str] = None, migrate: bool = True):
+    """
+    Configure Django against a throwaway test database (SQLite in memory or a
+    test_ prefixed Postgres database, depending on the settings).
+    Returns the state teardown_django() needs.
+    """
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    if settings_module:
+        os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+
+    if not migrate:
+        for database in settings.DATABASES.values():
+            database.setdefault('TEST', {})['MIGRATE'] = False
+
+    from django.test.utils import setup_databases, setup_test_environment
+
+    setup_test_environment()
+    return setup_databases(verbosity=0, interactive=False)
+
+
+def teardown_django(old_config):
+    from django.test.utils import teardown_databases, teardown_test_environment
+
+    teardown_databases(old_config, verbosity=0)
+    teardown_test_environment()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results: List[dict], path: Optional[str]):
+    document = {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    body = json.dumps(document, indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(body)
+    else:
+        print(body)
+
+
+def print_table(results: List[dict]):
+    print(f"{'benchmark':<44} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>12}", file=sys.stderr)
+    for row in results:
+        label = f"{row['suite']}.{row['name']}"
+        print(
+            f"{label:<44} {row['p50_ms']:>10.3f} {row['p95_ms']:>10.3f} {row['items_per_sec']:>12.0f}",
+            file=sys.stderr
+        )
@@ -0,0 +1,53 @@
+"""
+Run the ingestion benchmarks and write JSON results.
+
+    python -m benchmarks.run --output results/HEAD.json
+    python -m benchmarks.run --suite calculators --suite worker --settings config.settings.local
+    python -m benchmarks.compare results/base.json results/HEAD.json
+
+The collector and worker suites create a throwaway test database from the
+given settings (SQLite in memory, or test_<name> on Postgres).
+"""
+import argparse
+import sys
+from .harness import print_table, setup_django, teardown_django, write_results
+
+SUITES = ('calculators', 'collector', 'worker')
+DATABASE_SUITES = ('collector', 'worker')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingestion pipeline benchmarks')
+    parser.add_argument('--suite', action='append', choices=SUITES, help='suite to run (repeatable, default: all)')
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--settings', help='Django settings module for the database suites')
+    parser.add_argument('--no-migrate', action='store_true', help='create test tables from models instead of migrations')
+    parser.add_argument('--repeat', type=int, help='override the per-suite repeat count')
+    parser.add_argument('--batch-size', type=int, default=100, help='events per worker batch')
+    args = parser.parse_args(argv)
+
+    suites = args.suite or list(SUITES)
+    options = {'batch_size': args.batch_size}
+    if args.repeat:
+        options['repeat'] = args.repeat
+
+    results = []
+    old_config = None
+    try:
+        if any(suite in DATABASE_SUITES for suite in suites):
+            old_config = setup_django(args.settings, migrate=not args.no_migrate)
+
+        for suite in suites:
+            module = __import__(f'benchmarks.bench_{suite}', fromlist=['run'])
+            print(f"Running {suite}...", file=sys.stderr)
+            results.extend(module.run(**options))
+    finally:
+        if old_config is not None:
+            teardown_django(old_config)
+
+    print_table(results)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
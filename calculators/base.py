@@ -5,6 +5,13 @@ from enum import Enum
 from pydantic import BaseModel
 
 
+# countries without a grid factor of their own use the EU average
+EU_MEMBER_STATES = frozenset({
+    'AT', 'BE', 'BG', 'CY', 'CZ', 'DE', 'DK', 'EE', 'ES', 'FI', 'FR', 'GR', 'HR', 'HU',
+    'IE', 'IT', 'LT', 'LU', 'LV', 'MT', 'NL', 'PL', 'PT', 'RO', 'SE', 'SI', 'SK',
+})
+
+
 class DeviceType(str, Enum):
     MOBILE = 'mobile'
     DESKTOP = 'desktop'
@@ -43,6 +50,20 @@ class BaseEmissionCalculator(ABC):
             return Decimal('0')
         return Decimal(str(value))
     
+    def _grid_region(self, region: str, grid_intensities: Dict[str, Decimal]) -> str:
+        """
+        The most specific key of grid_intensities for a region code: the
+        subdivision ('US-CA'), its country, 'EU' for EU members, then 'WORLD'
+        """
+        if region in grid_intensities:
+            return region
+        country = region.split('-', 1)[0]
+        if country in grid_intensities:
+            return country
+        if country in EU_MEMBER_STATES and 'EU' in grid_intensities:
+            return 'EU'
+        return 'WORLD'
+    
     def _to_kg(self, grams: Decimal) -> Decimal:
         return grams / Decimal('1000')
     
@@ -63,4 +84,22 @@ class BaseEmissionCalculator(ABC):
 
         if from_unit != EmissionUnit.KILOGRAMS:
             value = self._convert_unit(value, from_unit, EmissionUnit.KILOGRAMS)
-        return self._convert_unit(value, EmissionUnit.KILOGRAMS, to_unit)
\ No newline at end of file
+        return self._convert_unit(value, EmissionUnit.KILOGRAMS, to_unit)
+
+class MemoizedCalculator:
+    """
+    Wraps a calculator for one batch: inputs that repeat (same bytes, device,
+    region...) are calculated once. Results are shared between callers and
+    must not be mutated.
+    """
+    
+    def __init__(self, calculator: BaseEmissionCalculator):
+        self.calculator = calculator
+        self._results: Dict[tuple, Dict[str, Any]] = {}
+    
+    def calculate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        key = tuple(sorted(input_data.items()))
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = self.calculator.calculate(input_data)
+        return result
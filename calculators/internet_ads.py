@@ -262,10 +262,9 @@ class InternetAdsCalculator(BaseEmissionCalculator):
                 return default
     
     def _get_grid_emission_factor(self, region: str) -> Decimal:
-        grid_intensity_g = self.GRID_INTENSITY_DEFAULTS.get(
-            region,
-            self.GRID_INTENSITY_DEFAULTS['WORLD']
-        )
+        grid_intensity_g = self.GRID_INTENSITY_DEFAULTS[
+            self._grid_region(region, self.GRID_INTENSITY_DEFAULTS)
+        ]
         return grid_intensity_g / Decimal('1000')
     
     def _get_ef_source(self, region: str) -> str:
@@ -276,4 +275,4 @@ class InternetAdsCalculator(BaseEmissionCalculator):
             'FR': 'IEA 2023',
             'EU': 'IEA 2023',
         }
-        return sources.get(region, 'IEA 2023 World Average')
\ No newline at end of file
+        return sources.get(self._grid_region(region, self.GRID_INTENSITY_DEFAULTS), 'IEA 2023 World Average')
\ No newline at end of file
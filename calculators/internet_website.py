@@ -40,7 +40,7 @@ class InternetWebsiteCalculator(BaseEmissionCalculator):
         }
 
     def _get_grid_emission_factor(self, region: str) -> Decimal:
-        grid_intensity_g = self.GRID_INTENSITY_DEFAULTS.get(
-            region, self.GRID_INTENSITY_DEFAULTS['WORLD']
-        )
+        grid_intensity_g = self.GRID_INTENSITY_DEFAULTS[
+            self._grid_region(region, self.GRID_INTENSITY_DEFAULTS)
+        ]
         return grid_intensity_g / Decimal('1000')
\ No newline at end of file
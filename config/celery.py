@@ -31,6 +31,9 @@ boto3.client = _patched_client
 
 app.autodiscover_tasks()
 
+# worker metrics server and multiprocess cleanup
+import core.metrics.celery  # noqa: E402,F401
+
 app.conf.beat_schedule = {
     'process-active-sessions': {
         'task': 'core.tasks.process_active_sessions_task',
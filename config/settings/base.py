@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 from pathlib import Path
 import os
+import json
 import logging.config
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -28,6 +29,7 @@ for app in os.listdir(os.path.join(BASE_DIR, "apps")):
         INSTALLED_APPS.append(f'apps.{app}.apps.{app.replace("_", " ").title().replace(" ", "")}Config')
 
 MIDDLEWARE = [
+    'core.rules.middleware.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +74,150 @@ REST_FRAMEWORK = {
     },
 }
 
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    # per process: fine for development, but rate limits, in-flight caps, the
+    # admission lag signal and snapshot invalidation stop being shared (see
+    # core.checks)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Public endpoint rate limits: sliding windows of RATE_LIMIT_WINDOW seconds,
+# counted in the RATE_LIMIT_CACHE cache (Redis when REDIS_URL is set, so every
+# web worker shares the counters). RATE_LIMIT_PLANS maps an API key's plan to
+# the events it may send per window, 0 meaning unlimited; RATE_LIMIT_IP_REQUESTS
+# caps requests per client IP. RATE_LIMIT_NUM_PROXIES is the number of trusted
+# proxies appending to X-Forwarded-For (0 when clients connect directly); the
+# IP limit stays off until it is set, since behind a load balancer every client
+# would otherwise share the balancer's address
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_CACHE = os.getenv('RATE_LIMIT_CACHE', 'default')
+RATE_LIMIT_WINDOW = int(os.getenv('RATE_LIMIT_WINDOW', 60))
+RATE_LIMIT_PLANS = json.loads(os.getenv('RATE_LIMIT_PLANS', '{"free": 6000, "pro": 60000, "enterprise": 0}'))
+RATE_LIMIT_IP_REQUESTS = int(os.getenv('RATE_LIMIT_IP_REQUESTS', 1200))
+RATE_LIMIT_NUM_PROXIES = int(os.getenv('RATE_LIMIT_NUM_PROXIES')) if os.getenv('RATE_LIMIT_NUM_PROXIES') else None
+
+# Collector admission control. Queue pressure is sampled every
+# ADMISSION_SAMPLE_INTERVAL seconds; the thresholds are comma separated
+# "sample pings, trim page views, reject" levels for the backlog (broker
+# messages, or event_outbox rows with the outbox) and for the worker lag in
+# seconds. A threshold of 0 never triggers
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'false').lower() == 'true'
+ADMISSION_SAMPLE_INTERVAL = float(os.getenv('ADMISSION_SAMPLE_INTERVAL', 5))
+ADMISSION_DEPTH_THRESHOLDS = [float(value) for value in os.getenv('ADMISSION_DEPTH_THRESHOLDS', '5000,20000,100000').split(',')]
+ADMISSION_LAG_THRESHOLDS = [float(value) for value in os.getenv('ADMISSION_LAG_THRESHOLDS', '30,120,600').split(',')]
+ADMISSION_LAG_TTL = int(os.getenv('ADMISSION_LAG_TTL', 120))
+ADMISSION_PING_SAMPLE_RATE = float(os.getenv('ADMISSION_PING_SAMPLE_RATE', 0.25))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 30))
+
+# Edge dedupe of repeated (API key, event_id) pairs before enqueue: 'local'
+# keeps rotating per-process sets, 'cache' shares them through the cache
+# across web workers, 'off' disables it
+EVENT_DEDUPE_BACKEND = os.getenv('EVENT_DEDUPE_BACKEND', 'local')
+EVENT_DEDUPE_WINDOW = int(os.getenv('EVENT_DEDUPE_WINDOW', 300))
+EVENT_DEDUPE_MAX_KEYS = int(os.getenv('EVENT_DEDUPE_MAX_KEYS', 500000))
+
+# Ad platform reports (events/ads): rows per request, each charged as one
+# event against the key's rate limit
+ADS_REPORT_MAX_ROWS = int(os.getenv('ADS_REPORT_MAX_ROWS', 5000))
+
+# Offline reverse geocoding for grid factors (build_geo_index). Without an
+# index, events fall back to the processors' default region
+GEO_INDEX_PATH = os.getenv('GEO_INDEX_PATH')
+GEO_CACHE_SIZE = int(os.getenv('GEO_CACHE_SIZE', 65536))
+
+# Tracker config snapshots (keys/config)
+APIKEY_CONFIG_CACHE_TTL = int(os.getenv('APIKEY_CONFIG_CACHE_TTL', 3600))
+APIKEY_CONFIG_NEGATIVE_CACHE_TTL = int(os.getenv('APIKEY_CONFIG_NEGATIVE_CACHE_TTL', 60))
+APIKEY_CONFIG_MAX_AGE = int(os.getenv('APIKEY_CONFIG_MAX_AGE', 60))
+APIKEY_CONFIG_STALE_WHILE_REVALIDATE = int(os.getenv('APIKEY_CONFIG_STALE_WHILE_REVALIDATE', 300))
+if not REDIS_URL:
+    # each process caches its own snapshots and a key's save signal only
+    # invalidates the saving process's copy, so others must expire theirs quickly
+    APIKEY_CONFIG_CACHE_TTL = min(APIKEY_CONFIG_CACHE_TTL, int(os.getenv('APIKEY_CONFIG_LOCAL_CACHE_TTL', 5)))
+    APIKEY_CONFIG_NEGATIVE_CACHE_TTL = min(APIKEY_CONFIG_NEGATIVE_CACHE_TTL, APIKEY_CONFIG_CACHE_TTL)
+APIKEY_USAGE_FLUSH_INTERVAL = int(os.getenv('APIKEY_USAGE_FLUSH_INTERVAL', 30))
+
+# Queue message format: 1 = msgpack envelope, 0 = legacy list of dicts. Workers
+# decode both; set 1 on the producers once every worker has been upgraded
+EVENT_ENVELOPE_VERSION = int(os.getenv('EVENT_ENVELOPE_VERSION', 0))
+EVENT_ENVELOPE_COMPRESS_THRESHOLD = int(os.getenv('EVENT_ENVELOPE_COMPRESS_THRESHOLD', 4096))
+
+# Bearer token required by /metrics. Without one the endpoint answers 404 unless
+# DEBUG is on or METRICS_ALLOW_UNAUTHENTICATED is set, which is only safe when
+# /metrics is reachable from the scraper's network alone
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN')
+METRICS_ALLOW_UNAUTHENTICATED = os.getenv('METRICS_ALLOW_UNAUTHENTICATED', 'false').lower() == 'true'
+
+# Port for the Celery worker's metrics server (disabled when unset). Run workers
+# with PROMETHEUS_MULTIPROC_DIR so samples from every pool process are exported
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', 0)) or None
+WORKER_EVENT_LOG_SAMPLE_RATE = float(os.getenv('WORKER_EVENT_LOG_SAMPLE_RATE', 0.01))
+
+# Transactional outbox: the collector writes events to event_outbox and
+# `manage.py relay_outbox` publishes them, so ingest survives broker outages
+EVENT_OUTBOX_ENABLED = os.getenv('EVENT_OUTBOX_ENABLED', 'false').lower() == 'true'
+EVENT_OUTBOX_RELAY_BATCH = int(os.getenv('EVENT_OUTBOX_RELAY_BATCH', 1000))
+EVENT_OUTBOX_PUBLISH_BATCH = int(os.getenv('EVENT_OUTBOX_PUBLISH_BATCH', 200))
+EVENT_OUTBOX_MAX_BACKOFF = int(os.getenv('EVENT_OUTBOX_MAX_BACKOFF', 300))
+EVENT_OUTBOX_POLL_INTERVAL = float(os.getenv('EVENT_OUTBOX_POLL_INTERVAL', 1.0))
+
+# 'celery' publishes through the broker (SQS). 'postgres' keeps events in the
+# event_outbox table and `manage.py run_event_worker` consumes it directly, for
+# single-node deployments without a broker
+EVENT_QUEUE_BACKEND = os.getenv('EVENT_QUEUE_BACKEND', 'celery')
+EVENT_QUEUE_BATCH_SIZE = int(os.getenv('EVENT_QUEUE_BATCH_SIZE', 500))
+EVENT_QUEUE_VISIBILITY_TIMEOUT = int(os.getenv('EVENT_QUEUE_VISIBILITY_TIMEOUT', 300))
+EVENT_QUEUE_MAX_ATTEMPTS = int(os.getenv('EVENT_QUEUE_MAX_ATTEMPTS', 5))
+EVENT_QUEUE_POLL_INTERVAL = float(os.getenv('EVENT_QUEUE_POLL_INTERVAL', 0.2))
+
+# Tenant fairness. EVENT_QUEUE_PARTITIONS > 1 routes each tenant's batches to
+# one of the "<prefix>-<n>" queues (tenant = user id, or the API key with
+# EVENT_QUEUE_PARTITION_KEY = 'api_key'). EVENT_TENANT_MAX_IN_FLIGHT caps the
+# batches one tenant may have in progress (0 = no cap); the local queue worker
+# also shares every lease by weighted deficit round robin
+EVENT_QUEUE_PARTITIONS = int(os.getenv('EVENT_QUEUE_PARTITIONS', 1))
+EVENT_QUEUE_PARTITION_KEY = os.getenv('EVENT_QUEUE_PARTITION_KEY', 'user_id')
+EVENT_QUEUE_PARTITION_PREFIX = os.getenv('EVENT_QUEUE_PARTITION_PREFIX', 'events')
+EVENT_QUEUE_TENANT_QUANTUM = int(os.getenv('EVENT_QUEUE_TENANT_QUANTUM', 50))
+EVENT_TENANT_WEIGHTS = json.loads(os.getenv('EVENT_TENANT_WEIGHTS', '{}'))
+EVENT_TENANT_MAX_IN_FLIGHT = int(os.getenv('EVENT_TENANT_MAX_IN_FLIGHT', 0))
+EVENT_TENANT_IN_FLIGHT_TTL = int(os.getenv('EVENT_TENANT_IN_FLIGHT_TTL', 600))
+EVENT_TENANT_REQUEUE_DELAY = int(os.getenv('EVENT_TENANT_REQUEUE_DELAY', 5))
+
+# Failed event retries: claimed FAILED_EVENT_RETRY_BATCH at a time (up to
+# FAILED_EVENT_RETRY_MAX_BATCHES per run), backing off exponentially from
+# FAILED_EVENT_RETRY_BASE_DELAY seconds
+FAILED_EVENT_RETRY_BATCH = int(os.getenv('FAILED_EVENT_RETRY_BATCH', 500))
+FAILED_EVENT_RETRY_MAX_BATCHES = int(os.getenv('FAILED_EVENT_RETRY_MAX_BATCHES', 200))
+FAILED_EVENT_RETRY_BASE_DELAY = int(os.getenv('FAILED_EVENT_RETRY_BASE_DELAY', 60))
+FAILED_EVENT_RETRY_MAX_DELAY = int(os.getenv('FAILED_EVENT_RETRY_MAX_DELAY', 6 * 3600))
+FAILED_EVENT_PROCESSING_TIMEOUT = int(os.getenv('FAILED_EVENT_PROCESSING_TIMEOUT', 900))
+
+# Dead-letter queue drain (process_dlq_messages). The budget should stay below
+# the beat interval so runs do not overlap
+SQS_DLQ_URL = os.getenv('SQS_DLQ_URL')
+DLQ_DRAIN_TIME_BUDGET = int(os.getenv('DLQ_DRAIN_TIME_BUDGET', 300))
+DLQ_DRAIN_CONCURRENCY = int(os.getenv('DLQ_DRAIN_CONCURRENCY', 4))
+
+# Collector traffic capture for replay_events (disabled when EVENT_CAPTURE_DIR is unset)
+EVENT_CAPTURE_DIR = os.getenv('EVENT_CAPTURE_DIR')
+EVENT_CAPTURE_MAX_BYTES = int(os.getenv('EVENT_CAPTURE_MAX_BYTES', 64 * 1024 * 1024))
+EVENT_CAPTURE_ROTATE_SECONDS = int(os.getenv('EVENT_CAPTURE_ROTATE_SECONDS', 3600))
+EVENT_CAPTURE_MAX_FILES = int(os.getenv('EVENT_CAPTURE_MAX_FILES', 48))
+EVENT_CAPTURE_SAMPLE_RATE = float(os.getenv('EVENT_CAPTURE_SAMPLE_RATE', 1.0))
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
 
@@ -46,21 +46,32 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
     'predefined_queues': {
         'celery': {
             'url': f'{AWS_ENDPOINT_URL}/000000000000/celery',
-        }
+        },
+        **{
+            f'{EVENT_QUEUE_PARTITION_PREFIX}-{index}': {
+                'url': f'{AWS_ENDPOINT_URL}/000000000000/{EVENT_QUEUE_PARTITION_PREFIX}-{index}',
+            }
+            for index in range(EVENT_QUEUE_PARTITIONS if EVENT_QUEUE_PARTITIONS > 1 else 0)
+        },
     },
 }
 
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_RESULT_BACKEND = 'db+sqlite:///celery_results.db'
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
+# 'orjson' is registered with kombu in EventConfig.ready(); plain json stays
+# accepted so messages queued before a deploy still decode. Event batches are
+# sent as msgpack envelopes (core.services.event_envelope)
+CELERY_ACCEPT_CONTENT = ['orjson', 'msgpack', 'json']
+CELERY_TASK_SERIALIZER = 'orjson'
+CELERY_RESULT_SERIALIZER = 'orjson'
 CELERY_TIMEZONE = 'UTC'
 
 SQS_QUEUE_URL = f'{AWS_ENDPOINT_URL}/000000000000/carbon-events-queue'
+SQS_DLQ_URL = f'{AWS_ENDPOINT_URL}/000000000000/carbon-events-dlq'
 
 # Override middleware to include CORS and remove CSRF for local dev
 MIDDLEWARE = [
+    'core.rules.middleware.instrumentation.RequestInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
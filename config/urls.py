@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
+from core.api.controllers.metrics import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('core.api.urls')),
-]
\ No newline at end of file
+    path('metrics', MetricsView.as_view(), name='metrics'),
+]
@@ -0,0 +1,97 @@
+import uuid
+import logging
+from django.conf import settings
+from django.views import View
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from pydantic import TypeAdapter, ValidationError
+from rest_framework import status
+from typing import List
+from apps.common import serialization
+from apps.common.response import ORJSONResponse
+from core.models.campaign import AdReportRow
+from core.services.apikey_service import APIKeyService
+from core.services.campaign_service import CampaignService
+from core.services import rate_limit
+from core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+AdReportRows = TypeAdapter(List[AdReportRow])
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AdReportView(View):
+    """
+    Ad platform report ingestion for `ads` keys: per campaign, hour, platform,
+    format, device and country counts instead of one event per impression.
+    """
+
+    def post(self, request):
+        try:
+            ip_limit = rate_limit.check_ip(request)
+            if not ip_limit.allowed:
+                return rate_limit.too_many_requests(ip_limit)
+
+            try:
+                data = serialization.loads(request.body)
+            except serialization.JSONDecodeError:
+                return ORJSONResponse({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+
+            api_key = request.headers.get('X-Tracker-Token') or data.get('api_key')
+            if not api_key:
+                return ORJSONResponse({'error': 'API key required'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            with span('auth'):
+                api_key_obj = APIKeyService().validate_api_key(api_key)
+            if not api_key_obj:
+                return ORJSONResponse({'error': 'Invalid or inactive API key'}, status=status.HTTP_401_UNAUTHORIZED)
+            if api_key_obj.product != 'ads':
+                return ORJSONResponse(
+                    {'error': 'Ad reports need an API key for the ads product'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            rows = data.get('rows')
+            if not isinstance(rows, list) or not rows:
+                return ORJSONResponse({'error': 'rows must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(rows) > settings.ADS_REPORT_MAX_ROWS:
+                return ORJSONResponse(
+                    {'error': f'At most {settings.ADS_REPORT_MAX_ROWS} rows per request'},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+
+            with span('ratelimit'):
+                key_limit = rate_limit.check_api_key(request, api_key_obj, len(rows))
+            if not key_limit.allowed:
+                return rate_limit.too_many_requests(key_limit)
+
+            try:
+                with span('validate'):
+                    report_rows = AdReportRows.validate_python(rows)
+            except ValidationError as e:
+                return ORJSONResponse(
+                    {'error': 'Invalid report rows', 'details': e.errors(include_url=False, include_context=False)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            report_id = data.get('report_id') or uuid.uuid4().hex
+            with span('ledger'):
+                result = CampaignService().ingest_ad_report(api_key_obj.user_id, report_rows, report_id)
+
+            APIKeyService().record_usage_deferred(api_key_obj.id)
+
+            return ORJSONResponse({
+                'status': 'recorded',
+                'report_id': report_id,
+                'rows': result['rows'],
+                'rejected': [{'index': index, 'error': error} for index, error in result['rejected']],
+                'kg_co2_delta': float(result['kg_co2_delta']),
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Ad report ingestion error: {e}", exc_info=True)
+            return ORJSONResponse({
+                'error': 'Internal server error',
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -8,6 +8,8 @@ from apps.auth.permissions import IsAuthenticated
 from apps.common.response import response_factory
 from core.services.apikey_service import APIKeyService, ConversionRuleService
 from core.services.script_verification import ScriptVerificationService
+from core.services.event_dedupe import duplicate_stats
+from core.services.bot_filter import bot_stats
 from apps.apikey.schemas import (
     CreateAPIKeyRequest, APIKeyResponse, APIKeyDetailResponse,
 )
@@ -65,6 +67,12 @@ class APIKeyView(APIView):
             user = request.user
             
             api_keys = controller.apikey_service.get_user_api_keys(str(user.id))
+            rule_counts = controller.conversion_service.count_api_key_rules(
+                [key.id for key in api_keys],
+                active_only=True
+            )
+            dedupe_stats = duplicate_stats([key.id for key in api_keys])
+            bots = bot_stats([key.id for key in api_keys])
             
             api_keys_data = [
                 APIKeyResponse(
@@ -75,11 +83,14 @@ class APIKeyView(APIView):
                     is_active=key.is_active,
                     industry_category=key.industry_category,
                     product=key.product,
+                    plan=key.plan,
+                    sampling_rate=key.sampling_rate,
+                    bot_filter=key.bot_filter,
                     last_used_at=key.last_used_at.isoformat() if key.last_used_at else None,
                     created_at=key.created_at.isoformat(),
-                    conversion_rules_count=len(
-                        controller.conversion_service.get_api_key_rules(key.id, active_only=True)
-                    )
+                    conversion_rules_count=rule_counts.get(key.id, 0),
+                    duplicate_rate=dedupe_stats[key.id]['duplicate_rate'],
+                    bot_rate=bots[key.id]['bot_rate']
                 ).dict() for key in api_keys
             ]
             
@@ -1,10 +1,15 @@
 import logging
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
-from core.services.apikey_service import APIKeyService, ConversionRuleService
+from apps.common.response import ORJSONResponse
+from core.services.apikey_service import APIKeyService, APIKeyConfigService
+from core.services import rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +17,14 @@ logger = logging.getLogger(__name__)
 class APIKeyConfigView(View):
     def get(self, request):
         try:
+            ip_limit = rate_limit.check_ip(request)
+            if not ip_limit.allowed:
+                return rate_limit.too_many_requests(ip_limit)
+
             api_key = request.GET.get('api_key') or request.GET.get('tracker_token')
-            
+
             if not api_key:
-                return JsonResponse(
+                return ORJSONResponse(
                     {
                         'success': False,
                         'error': 'API key is required',
@@ -25,12 +34,12 @@ class APIKeyConfigView(View):
                 )
 
             api_key = api_key.rstrip('/')
-            
-            apikey_service = APIKeyService()
-            api_key_obj = apikey_service.validate_api_key(api_key)
-            
-            if not api_key_obj:
-                return JsonResponse(
+
+            config_service = APIKeyConfigService()
+            snapshot = config_service.get_snapshot(api_key)
+
+            if not snapshot:
+                return ORJSONResponse(
                     {
                         'success': False,
                         'error': 'Invalid or inactive API key',
@@ -38,54 +47,39 @@ class APIKeyConfigView(View):
                     },
                     status=status.HTTP_401_UNAUTHORIZED
                 )
-            
-            conversion_service = ConversionRuleService()
-            rules = conversion_service.get_api_key_rules(
-                api_key_obj.id,
-                active_only=True
+
+            APIKeyService().record_usage_deferred(snapshot.api_key_id)
+
+            if self._etag_matches(request, snapshot.etag):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(snapshot.body, content_type='application/json')
+
+            response['ETag'] = snapshot.etag
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.APIKEY_CONFIG_MAX_AGE,
+                stale_while_revalidate=settings.APIKEY_CONFIG_STALE_WHILE_REVALIDATE
             )
-            
-            conversion_rules = [
-                {
-                    'id': rule.id,
-                    'name': rule.name,
-                    'rule_type': rule.rule_type,
-                    'url_pattern': rule.url_pattern,
-                    'match_type': rule.match_type,
-                    'css_selector': rule.css_selector,
-                    'element_text': rule.element_text,
-                    'form_id': rule.form_id,
-                    'custom_event_name': rule.custom_event_name,
-                    'track_value': rule.track_value,
-                    'value_selector': rule.value_selector,
-                    'default_value': float(rule.default_value) if rule.default_value else None,
-                    'priority': rule.priority
-                }
-                for rule in rules
-            ]
-            
-            apikey_service.record_usage(api_key_obj)
+            return response
 
-            industry_type = getattr(api_key_obj, 'industry_type', None) or 'internet';
-            product = getattr(api_key_obj,'product',None);
-            
-            return JsonResponse({
-                'success': True,
-                'tracking_enabled': api_key_obj.is_active,
-                'domain': api_key_obj.domain,
-                'industry_type': industry_type,
-                'product':product,
-                'conversion_rules': conversion_rules,
-                'total_rules': len(conversion_rules)
-            })
-            
         except Exception as e:
             logger.error(f"Error fetching API key config: {e}", exc_info=True)
-            return JsonResponse(
+            return ORJSONResponse(
                 {
                     'success': False,
                     'error': 'Internal server error',
                     'tracking_enabled': False
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+    def _etag_matches(self, request, etag: str) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+
+        # CDNs weaken ETags when they re-encode the body, so compare weakly
+        candidates = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        return '*' in candidates or etag in candidates
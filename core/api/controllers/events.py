@@ -3,16 +3,24 @@ from core.services.event_dispatcher import EventDispatcher
 from core.services.session.session_service import SessionService
 from core.services.event_queue import EventQueueService
 from core.services.apikey_service import APIKeyService
+from core.services.event_capture import capture_batch
+from core.services import rate_limit
+from core.services.admission import get_admission_controller
+from core.services.event_dedupe import get_deduplicator
+from core.services.sampling import sample_events
+from core.services.bot_filter import filter_bots
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
+from apps.common import serialization
+from apps.common.response import ORJSONResponse
 from core.db.events import ProcessedEventData
 from core.db.carbon import CarbonData
+from core.metrics import span
 from rest_framework import status
 from typing import Dict, Any, List
 from django.views import View
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -103,10 +111,27 @@ SDK_EVENT_TYPES = ['page_view', 'conversion', 'ping', 'click']
 class EventCollectorView(View):
     def post(self, request):
         try:
+            with span('ratelimit'):
+                ip_limit = rate_limit.check_ip(request)
+            if not ip_limit.allowed:
+                return rate_limit.too_many_requests(ip_limit)
+            
+            admission = get_admission_controller()
+            with span('admission'):
+                retry_after = admission.retry_after()
+            if retry_after:
+                response = ORJSONResponse({
+                    'error': 'Event ingestion is temporarily overloaded',
+                    'retry_after': retry_after
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                response['Retry-After'] = str(retry_after)
+                return response
+            
             try:
-                data = json.loads(request.body)
-            except json.JSONDecodeError:
-                return JsonResponse(
+                with span('parse'):
+                    data = serialization.loads(request.body)
+            except serialization.JSONDecodeError:
+                return ORJSONResponse(
                     {'error': 'Invalid JSON'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
@@ -119,20 +144,32 @@ class EventCollectorView(View):
             )
             
             if not api_key:
-                return JsonResponse(
+                return ORJSONResponse(
                     {'error': 'API key required'},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             
             apikey_service = APIKeyService()
-            api_key_obj = apikey_service.validate_api_key(api_key)
+            with span('auth'):
+                api_key_obj = apikey_service.validate_api_key(api_key)
             
             if not api_key_obj:
-                return JsonResponse(
+                return ORJSONResponse(
                     {'error': 'Invalid or inactive API key'},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             
+            events = data.get('events')
+            with span('ratelimit'):
+                key_limit = rate_limit.check_api_key(
+                    request, api_key_obj, len(events) if isinstance(events, list) else 1
+                )
+            if not key_limit.allowed:
+                return rate_limit.too_many_requests(
+                    key_limit,
+                    f"Event quota for this API key exceeded, retry in {key_limit.retry_after} seconds"
+                )
+            
             industry = api_key_obj.industry_category or 'internet'
             product = api_key_obj.product or 'web'
             domain_event_type = f"{industry}_{product}"
@@ -141,7 +178,7 @@ class EventCollectorView(View):
             processor = dispatcher.get_processor(domain_event_type)
             
             if not processor:
-                return JsonResponse(
+                return ORJSONResponse(
                     {
                         'error': f'Unknown domain: {domain_event_type}',
                         'supported_domains': dispatcher.list_supported_events()
@@ -150,19 +187,50 @@ class EventCollectorView(View):
                 )
             
             queue_service = EventQueueService()
-            events = data.get('events')
+            deduplicator = get_deduplicator()
+            pending = []
+            # products whose emissions are not scaled back up are never sampled
+            sampling_rate = api_key_obj.sampling_rate if processor.SAMPLES_SESSIONS else 1.0
             
             try:
                 if events:
-                    validated_events = self._validate_batch(events, processor, domain_event_type, api_key_obj, api_key)
-                    result = queue_service.queue_events_batch(api_key_obj.user_id, validated_events, api_key)
+                    with span('validate'):
+                        validated_events = self._validate_batch(events, processor, domain_event_type, api_key_obj, api_key)
+                    with span('bot_filter'):
+                        validated_events = filter_bots(api_key_obj.id, validated_events, api_key_obj.bot_filter)
+                    with span('capture'):
+                        capture_batch(validated_events)
+                    with span('sampling'):
+                        validated_events = sample_events(validated_events, sampling_rate)
+                    with span('dedupe'):
+                        pending = deduplicator.filter(api_key_obj.id, validated_events, processor.REFERENCE_FIELD)
+                    with span('admission'):
+                        validated_events = admission.shape(pending)
+                    if validated_events:
+                        result = queue_service.queue_events_batch(api_key_obj.user_id, validated_events, api_key, api_key_obj.id)
+                    else:
+                        # only bots, repeats, out-of-sample sessions, or everything was shed under load
+                        result = {'events': []}
                 else:
-                    validated_payload = processor.validate_payload(data)
-                    result = queue_service.queue_event(api_key_obj.user_id, domain_event_type, validated_payload, api_key)
+                    with span('validate'):
+                        validated_payload = processor.validate_payload(data)
+                    with span('bot_filter'):
+                        humans = filter_bots(api_key_obj.id, [{'payload': validated_payload}], api_key_obj.bot_filter)
+                    with span('sampling'):
+                        sampled = sample_events(humans, sampling_rate)
+                    with span('dedupe'):
+                        pending = deduplicator.filter(api_key_obj.id, sampled, processor.REFERENCE_FIELD)
+                    with span('admission'):
+                        admitted = admission.shape(pending)
+                    if admitted:
+                        result = queue_service.queue_event(api_key_obj.user_id, domain_event_type, validated_payload, api_key, api_key_obj.id)
+                    else:
+                        result = {'events': []}
 
-                apikey_service.record_usage(api_key_obj)
+                with span('usage'):
+                    apikey_service.record_usage_deferred(api_key_obj.id)
                 
-                return JsonResponse({
+                return ORJSONResponse({
                     'status': 'queued',
                     'message': 'Events have been queued for processing',
                     'batch_id': result.get('batch_id'),
@@ -171,7 +239,9 @@ class EventCollectorView(View):
                 
             except Exception as queue_error:
                 logger.error(f"Queue service unavailable: {queue_error}", exc_info=True)
-                return JsonResponse({
+                # nothing was queued; let the SDK's retry through the dedupe
+                deduplicator.forget(api_key_obj.id, pending, processor.REFERENCE_FIELD)
+                return ORJSONResponse({
                     'error': 'Event queue service is currently unavailable',
                     'message': 'Please ensure LocalStack/SQS and Celery worker are running',
                     'details': str(queue_error)
@@ -179,35 +249,34 @@ class EventCollectorView(View):
             
         except Exception as e:
             logger.error(f"Event collection error: {e}", exc_info=True)
-            return JsonResponse({
+            return ORJSONResponse({
                 'error': 'Internal server error',
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def _validate_batch(self, events, processor, domain_event_type, api_key_obj, api_key):
-        validated_events = []
-        for event in events:
-            try:
-                validated_payload = processor.validate_payload(event)
-                validated_events.append({
-                    'event_type': domain_event_type,
-                    'payload': validated_payload,
-                    'api_key': api_key,
-                    'user_id': api_key_obj.user_id,
-                    'industry_category': api_key_obj.industry_category,
-                    'product': api_key_obj.product
-                })
-            except Exception as e:
-                logger.error(f"Event validation failed: {e}")
-                continue
-        return validated_events
+        validated_payloads, errors = processor.validate_batch(events)
+        for index, error in errors:
+            logger.error(f"Event validation failed at index {index}: {error}")
+        
+        return [
+            {
+                'event_type': domain_event_type,
+                'payload': validated_payload,
+                'api_key': api_key,
+                'user_id': api_key_obj.user_id,
+                'industry_category': api_key_obj.industry_category,
+                'product': api_key_obj.product
+            }
+            for validated_payload in validated_payloads
+        ]
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class SupportedEventsView(View):
     def get(self, request):
         dispatcher = EventDispatcher()
-        return JsonResponse({
+        return ORJSONResponse({
             'supported_domains': dispatcher.list_supported_events(),
             'sdk_event_types': SDK_EVENT_TYPES,
             'total_domains': len(dispatcher.list_supported_events())
@@ -0,0 +1,21 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from core.metrics import render_latest
+
+
+class MetricsView(View):
+    def get(self, request):
+        token = settings.METRICS_AUTH_TOKEN
+        if token:
+            provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(provided, token):
+                return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        elif not (settings.DEBUG or settings.METRICS_ALLOW_UNAUTHENTICATED):
+            # fail closed: without a token the endpoint does not exist
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+        
+        body, content_type = render_latest()
+        return HttpResponse(body, content_type=content_type)
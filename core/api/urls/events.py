@@ -3,8 +3,10 @@ from core.api.controllers.events import (
     EventCollectorView,
     SupportedEventsView
 )
+from core.api.controllers.ads import AdReportView
 
 urlpatterns = [
     path('', EventCollectorView.as_view(), name='event-collect'),
     path('supported/', SupportedEventsView.as_view(), name='event-supported'),
+    path('ads/', AdReportView.as_view(), name='event-ads-report'),
 ]
\ No newline at end of file
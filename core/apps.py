@@ -6,6 +6,7 @@ class CoreConfig(AppConfig):
     verbose_name = 'Carbon Core'
     
     def ready(self):
+        from core import checks
         from domain.internet.web import processers as web_processers
         from domain.internet.ads import processers as ads_processers
         from domain.oil import processers as oil_processers
@@ -13,4 +14,7 @@ class CoreConfig(AppConfig):
         from domain.registry import EventProcessorRegistry
         import logging
         logger = logging.getLogger(__name__)
-        logger.info(f"Registered event processors: {EventProcessorRegistry.list_event_types()}")
\ No newline at end of file
+        logger.info(f"Registered event processors: {EventProcessorRegistry.list_event_types()}")
+        # gunicorn and celery never run the system checks; say it in every process
+        for warning in checks.shared_cache_check(None):
+            logger.warning(f"{warning.msg} {warning.hint}")
\ No newline at end of file
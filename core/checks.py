@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Rate limits, tenant in-flight caps, the admission lag signal and API key
+    snapshot invalidation all live in the default cache; with the per-process
+    fallback every web and worker process enforces its own copy
+    """
+    if settings.DEBUG or settings.REDIS_URL:
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if not backend.endswith('LocMemCache'):
+        return []
+    return [
+        Warning(
+            'REDIS_URL is not set, so the default cache is local to each process.',
+            hint=(
+                'Rate limits, in-flight caps and admission control are enforced per process, '
+                'and API key snapshots are cached for at most APIKEY_CONFIG_LOCAL_CACHE_TTL seconds. '
+                'Set REDIS_URL in production.'
+            ),
+            id='core.W001',
+        )
+    ]
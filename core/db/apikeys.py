@@ -1,8 +1,9 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
+from collections import defaultdict
 from core.models.apikey import APIKey, ConversionRule
+from django.utils import timezone
 import logging
-from time import timezone
 logger = logging.getLogger(__name__)
 
 class APIKeyData:
@@ -82,6 +83,25 @@ class APIKeyData:
         orm_key = DjangoAPIKey.objects.get(external_id=api_key.id)
         return self._to_domain(orm_key)
     
+    def bulk_increment_usage(self, usage_counts: Dict[str, int]) -> int:
+        from django.db.models import F
+        from apps.apikey.models import APIKey as DjangoAPIKey
+        
+        keys_by_count = defaultdict(list)
+        for key_id, count in usage_counts.items():
+            if count > 0:
+                keys_by_count[count].append(key_id)
+        
+        now = timezone.now()
+        updated = 0
+        for count, key_ids in keys_by_count.items():
+            updated += DjangoAPIKey.objects.filter(external_id__in=key_ids).update(
+                usage_count=F('usage_count') + count,
+                last_used_at=now
+            )
+        
+        return updated
+    
     def _to_domain(self, orm_key) -> APIKey:
         return APIKey(
             id=str(orm_key.external_id),
@@ -94,6 +114,9 @@ class APIKeyData:
             domain=orm_key.domain,
             industry_category=orm_key.industry_category,
             product=orm_key.product,
+            plan=orm_key.plan,
+            sampling_rate=orm_key.sampling_rate,
+            bot_filter=orm_key.bot_filter,
             created_at=orm_key.created_at,
             updated_at=orm_key.updated_at
         )
@@ -112,7 +135,7 @@ class ConversionRuleData:
         from apps.apikey.models import ConversionRule as DjangoConversionRule, APIKey as DjangoAPIKey
         try:
             orm_key = DjangoAPIKey.objects.get(external_id=api_key_id)
-            queryset = DjangoConversionRule.objects.filter(api_key=orm_key)
+            queryset = DjangoConversionRule.objects.filter(api_key=orm_key).select_related('api_key')
             
             if active_only:
                 queryset = queryset.filter(is_active=True)
@@ -121,6 +144,17 @@ class ConversionRuleData:
         except DjangoAPIKey.DoesNotExist:
             return []
     
+    def count_by_api_keys(self, api_key_ids: List[str], active_only: bool = False) -> Dict[str, int]:
+        from apps.apikey.models import ConversionRule as DjangoConversionRule
+        from django.db.models import Count
+        
+        queryset = DjangoConversionRule.objects.filter(api_key__external_id__in=api_key_ids)
+        if active_only:
+            queryset = queryset.filter(is_active=True)
+        
+        rows = queryset.values('api_key__external_id').annotate(total=Count('id'))
+        return {str(row['api_key__external_id']): row['total'] for row in rows}
+    
     def create(self, api_key_id: str, rule_data: dict) -> ConversionRule:
         from apps.apikey.models import ConversionRule as DjangoConversionRule, APIKey as DjangoAPIKey
         
@@ -174,6 +208,23 @@ class ConversionRuleData:
         
         return self._to_domain(orm_rule)
     
+    def bulk_increment_conversions(self, conversion_counts: Dict[str, int]) -> int:
+        from django.db.models import F, Case, When, Value, IntegerField
+        from apps.apikey.models import ConversionRule as DjangoConversionRule
+        
+        increments = Case(
+            *[When(external_id=rule_id, then=Value(count)) for rule_id, count in conversion_counts.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        
+        return DjangoConversionRule.objects.filter(
+            external_id__in=list(conversion_counts.keys())
+        ).update(
+            conversion_count=F('conversion_count') + increments,
+            last_triggered_at=timezone.now()
+        )
+    
     def _to_domain(self, orm_rule) -> ConversionRule:
         return ConversionRule(
             id=str(orm_rule.external_id),
@@ -1,4 +1,4 @@
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from datetime import datetime, date
 from decimal import Decimal
 from core.models.campaign import Campaign, CampaignEmission, UTMParameter
@@ -120,6 +120,15 @@ class CampaignData:
         except DjangoCampaign.DoesNotExist:
             return False
     
+    def get_ids_by_external_ids(self, user_id: str, external_ids: List[str]) -> Dict[str, int]:
+        from apps.campaign.models import Campaign as DjangoCampaign
+        
+        rows = DjangoCampaign.objects.filter(
+            user_id=user_id,
+            external_id__in=external_ids
+        ).values_list('external_id', 'id')
+        return {str(external_id): campaign_id for external_id, campaign_id in rows}
+    
     def find_matching_campaign(self, user_id: str, utm_params: dict) -> Optional[Campaign]:
         from apps.campaign.models import Campaign as DjangoCampaign
         
@@ -225,6 +234,67 @@ class CampaignEmissionData:
         
         return count
     
+    def replace_rollups(self, rollups: List[dict]) -> Decimal:
+        """
+        Set rollup rows to the given counts and emissions, keyed on the
+        unique_together fields. A resent report row changes nothing; a
+        corrected one replaces the old figures. Returns the change in
+        total_emissions_g across all rows, for the ledger.
+        
+        The campaigns are locked first: row locks only cover rollups that
+        already exist, so two first reports for a campaign would both insert
+        (and with hour NULL the unique key does not stop them).
+        """
+        from django.db import transaction
+        from django.utils import timezone
+        from apps.campaign.models import Campaign as DjangoCampaign
+        from apps.campaign.models import CampaignEmission as DjangoEmission
+        
+        key_fields = ('campaign_id', 'date', 'hour', 'country', 'region', 'device_type', 'platform', 'ad_format')
+        by_key = {tuple(rollup[name] for name in key_fields): rollup for rollup in rollups}
+        if not by_key:
+            return Decimal('0')
+        
+        value_fields = [name for name in next(iter(by_key.values())) if name not in key_fields]
+        delta = Decimal('0')
+        now = timezone.now()
+        with transaction.atomic():
+            # in id order, so reports sharing campaigns cannot deadlock
+            list(
+                DjangoCampaign.objects.select_for_update()
+                .filter(id__in={key[0] for key in by_key})
+                .order_by('id')
+                .values_list('id', flat=True)
+            )
+            existing = {
+                tuple(getattr(emission, name) for name in key_fields): emission
+                for emission in DjangoEmission.objects.select_for_update().filter(
+                    campaign_id__in={key[0] for key in by_key},
+                    date__in={key[1] for key in by_key}
+                )
+            }
+            
+            to_create, to_update = [], []
+            for key, rollup in by_key.items():
+                emission = existing.get(key)
+                if emission is None:
+                    to_create.append(DjangoEmission(**rollup))
+                    delta += rollup['total_emissions_g']
+                    continue
+                delta += rollup['total_emissions_g'] - emission.total_emissions_g
+                for name in value_fields:
+                    setattr(emission, name, rollup[name])
+                # bulk_update skips auto_now
+                emission.updated_at = now
+                to_update.append(emission)
+            
+            if to_create:
+                DjangoEmission.objects.bulk_create(to_create)
+            if to_update:
+                DjangoEmission.objects.bulk_update(to_update, value_fields + ['updated_at'])
+        
+        return delta
+    
     def _to_domain(self, django_emission) -> CampaignEmission:
         return CampaignEmission(
             id=django_emission.id,
@@ -236,6 +306,8 @@ class CampaignEmissionData:
             region=django_emission.region,
             city=django_emission.city,
             device_type=django_emission.device_type,
+            platform=django_emission.platform,
+            ad_format=django_emission.ad_format,
             page_views=django_emission.page_views,
             clicks=django_emission.clicks,
             conversions=django_emission.conversions,
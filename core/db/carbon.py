@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 from decimal import Decimal
 from datetime import datetime
 from core.models.carbon_account import CarbonBalance, CarbonTransaction
@@ -22,6 +22,45 @@ class CarbonData:
         
         return self._balance_to_domain(orm_balance)
     
+    def lock_balances(self, user_ids: Iterable[str]) -> Dict[str, CarbonBalance]:
+        """
+        Balances of user_ids, created when missing and row-locked until the
+        surrounding transaction ends. Locks are taken in user_id order.
+        """
+        from apps.event.models import CarbonBalance as DjangoCarbonBalance
+        
+        user_ids = sorted(set(user_ids))
+        
+        def locked():
+            return {
+                orm.user_id: orm
+                for orm in DjangoCarbonBalance.objects.select_for_update().filter(
+                    user_id__in=user_ids
+                ).order_by('user_id')
+            }
+        
+        orm_balances = locked()
+        missing = [user_id for user_id in user_ids if user_id not in orm_balances]
+        if missing:
+            DjangoCarbonBalance.objects.bulk_create(
+                [DjangoCarbonBalance(user_id=user_id) for user_id in missing],
+                ignore_conflicts=True
+            )
+            orm_balances = locked()
+        
+        return {user_id: self._balance_to_domain(orm) for user_id, orm in orm_balances.items()}
+    
+    def save_locked_balances(self, balances: Iterable[CarbonBalance]):
+        """Write back balances read with lock_balances in the same transaction"""
+        from apps.event.models import CarbonBalance as DjangoCarbonBalance
+        
+        for balance in balances:
+            DjangoCarbonBalance.objects.filter(user_id=balance.user_id).update(
+                total_emissions_kg=balance.total_emissions_kg,
+                balance_kg=balance.balance_kg,
+                last_transaction_at=balance.last_transaction_at,
+            )
+    
     def save_balance(self, balance: CarbonBalance):
         from apps.event.models import CarbonBalance as DjangoCarbonBalance
         
@@ -54,6 +93,23 @@ class CarbonData:
             metadata=transaction.metadata,
         )
     
+    def save_transactions(self, transactions: List[CarbonTransaction]):
+        from apps.event.models import CarbonTransaction as DjangoCarbonTransaction
+        
+        DjangoCarbonTransaction.objects.bulk_create([
+            DjangoCarbonTransaction(
+                user_id=transaction.user_id,
+                transaction_type=transaction.transaction_type,
+                amount_kg=transaction.amount_kg,
+                balance_before=transaction.balance_before,
+                balance_after=transaction.balance_after,
+                reference_id=transaction.reference_id or '',
+                reference_type=transaction.metadata.get('event_type', 'emission'),
+                metadata=transaction.metadata,
+            )
+            for transaction in transactions
+        ])
+    
     def get_transactions(self, user_id: str, limit: int = 100) -> List[CarbonTransaction]:
         from apps.event.models import CarbonTransaction as DjangoCarbonTransaction
         
@@ -1,7 +1,7 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Set, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
-from core.models.event import ProcessedEvent, ActiveSession
+from core.models.event import ProcessedEvent, ActiveSession, OutboxEvent, FailedEvent
 from django.db import IntegrityError, transaction
 import logging
 
@@ -15,6 +15,34 @@ class ProcessedEventData:
             reference_type=reference_type
         ).exists()
     
+    def processed_references(self, references: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """The (reference_id, reference_type) pairs already in the ledger, in one query"""
+        from apps.event.models import ProcessedEvent as DjangoProcessedEvent
+        
+        reference_ids = {reference_id for reference_id, _ in references}
+        if not reference_ids:
+            return set()
+        found = DjangoProcessedEvent.objects.filter(
+            reference_id__in=reference_ids
+        ).values_list('reference_id', 'reference_type')
+        return set(found) & set(references)
+    
+    def mark_processed_many(self, events: List[Dict[str, Any]]):
+        """Insert ledger rows (mark_processed keyword arguments) in one statement"""
+        from apps.event.models import ProcessedEvent as DjangoProcessedEvent
+        
+        DjangoProcessedEvent.objects.bulk_create([
+            DjangoProcessedEvent(
+                reference_id=event['reference_id'],
+                reference_type=event['reference_type'],
+                user_id=event['user_id'],
+                event_type=event['event_type'],
+                kg_co2_emitted=event['kg_co2_emitted'],
+                metadata=event.get('metadata') or {}
+            )
+            for event in events
+        ])
+    
     def mark_processed(
         self,
         reference_id: str,
@@ -106,6 +134,7 @@ class ActiveSessionData:
     def update_activity(
         self,
         session_id: str,
+        event_count: int = 1
     ) -> None:
         from apps.event.models import ActiveSession as DjangoActiveSession
         from django.utils import timezone
@@ -115,7 +144,7 @@ class ActiveSessionData:
             session_id=session_id
         ).update(
             last_event_at=timezone.now(),
-            event_count=F('event_count') + 1
+            event_count=F('event_count') + event_count
         )
     
     def get_active_sessions(
@@ -169,4 +198,326 @@ class ActiveSessionData:
             event_count=orm_session.event_count,
             status=orm_session.status,
             last_processed_at=orm_session.last_processed_at,
-        )
\ No newline at end of file
+        )
+class EventOutboxData:
+    def append(
+        self,
+        events: List[dict],
+        api_key_id: Optional[str] = None
+    ) -> int:
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.utils import timezone
+        
+        now = timezone.now()
+        rows = [
+            DjangoEventOutbox(
+                event_type=event['event_type'],
+                payload=event['payload'],
+                user_id=event['user_id'],
+                api_key=event.get('api_key') or '',
+                api_key_id=str(api_key_id or ''),
+                session_id=event['payload'].get('session_id') or None,
+                industry_category=event.get('industry_category'),
+                product=event.get('product'),
+                created_at=event.get('queued_at') or now,
+            )
+            for event in events
+        ]
+        DjangoEventOutbox.objects.bulk_create(rows)
+        return len(rows)
+    
+    def claim(self, limit: int) -> List[OutboxEvent]:
+        """
+        Lock the oldest publishable rows; must run inside a transaction.
+        Sessions with a row waiting out a backoff are held back entirely so
+        their events keep their order.
+        """
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.db.models import Q
+        from django.utils import timezone
+        
+        now = timezone.now()
+        backing_off = DjangoEventOutbox.objects.filter(
+            next_attempt_at__gt=now,
+            session_id__isnull=False
+        ).values('session_id')
+        
+        orm_rows = (
+            DjangoEventOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .exclude(session_id__in=backing_off)
+            .order_by('id')[:limit]
+        )
+        return [self._to_domain(row) for row in orm_rows]
+    
+    def lease(
+        self,
+        limit: int,
+        visibility_timeout: int,
+        grants: Optional[Dict[str, int]] = None
+    ) -> tuple[str, List[OutboxEvent]]:
+        """
+        Lease the oldest visible rows to one consumer. Leased rows stay invisible
+        for visibility_timeout seconds; unless acked by then they are handed out again.
+        With `grants` ({user_id: rows}) each tenant gets at most its grant, oldest first.
+        """
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.db.models import F, Q
+        from django.utils import timezone
+        import uuid
+        
+        now = timezone.now()
+        lease_id = uuid.uuid4()
+        
+        with transaction.atomic():
+            visible = (
+                DjangoEventOutbox.objects
+                .select_for_update(skip_locked=True)
+                .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+                .order_by('id')
+            )
+            if grants is None:
+                ids = list(visible.values_list('id', flat=True)[:limit])
+            else:
+                # FOR UPDATE rules out a window function, so one query per tenant
+                ids = [
+                    row_id
+                    for user_id, grant in grants.items()
+                    for row_id in visible.filter(user_id=user_id).values_list('id', flat=True)[:grant]
+                ]
+            if not ids:
+                return str(lease_id), []
+            
+            DjangoEventOutbox.objects.filter(id__in=ids).update(
+                lease_id=lease_id,
+                next_attempt_at=now + timedelta(seconds=visibility_timeout),
+                attempts=F('attempts') + 1
+            )
+        
+        orm_rows = DjangoEventOutbox.objects.filter(lease_id=lease_id).order_by('id')
+        return str(lease_id), [self._to_domain(row) for row in orm_rows]
+    
+    def pending_tenants(self, limit: int, after: Optional[str] = None) -> List[str]:
+        """
+        Up to `limit` users with visible rows waiting to be leased, in user_id
+        order starting after `after` and wrapping around, so a caller that
+        passes the last user it got pages through every tenant in turn
+        """
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.db.models import Q
+        from django.utils import timezone
+        
+        pending = (
+            DjangoEventOutbox.objects
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()))
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+        if after is None:
+            return list(pending[:limit])
+        
+        tenants = list(pending.filter(user_id__gt=after)[:limit])
+        if len(tenants) < limit:
+            tenants += [
+                user_id for user_id in pending.filter(user_id__lte=after)[:limit - len(tenants)]
+                if user_id not in tenants
+            ]
+        return tenants
+    
+    def leases_by_tenant(self) -> Dict[str, int]:
+        """Number of unexpired leases holding rows of each user"""
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.db.models import Count
+        from django.utils import timezone
+        
+        rows = (
+            DjangoEventOutbox.objects
+            .filter(lease_id__isnull=False, next_attempt_at__gt=timezone.now())
+            .order_by()
+            .values('user_id')
+            .annotate(leases=Count('lease_id', distinct=True))
+        )
+        return {row['user_id']: row['leases'] for row in rows}
+    
+    def ack(self, lease_id: str) -> int:
+        """Remove every row of a lease in one statement"""
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        
+        deleted, _ = DjangoEventOutbox.objects.filter(lease_id=lease_id).delete()
+        return deleted
+    
+    def delete(self, ids: List[int]) -> int:
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        
+        deleted, _ = DjangoEventOutbox.objects.filter(id__in=ids).delete()
+        return deleted
+    
+    def defer(
+        self,
+        ids: List[int],
+        retry_at: datetime,
+        error: str
+    ) -> None:
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        from django.db.models import F
+        
+        DjangoEventOutbox.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=retry_at,
+            last_error=error
+        )
+    
+    def backlog(self) -> int:
+        from apps.event.models import EventOutbox as DjangoEventOutbox
+        
+        return DjangoEventOutbox.objects.count()
+    
+    def _to_domain(self, orm_row) -> OutboxEvent:
+        return OutboxEvent(
+            id=orm_row.id,
+            event_type=orm_row.event_type,
+            payload=orm_row.payload,
+            user_id=orm_row.user_id,
+            api_key=orm_row.api_key,
+            api_key_id=orm_row.api_key_id,
+            session_id=orm_row.session_id,
+            industry_category=orm_row.industry_category,
+            product=orm_row.product,
+            created_at=orm_row.created_at,
+            attempts=orm_row.attempts,
+        )
+
+class FailedEventData:
+    def record(
+        self,
+        event_type: str,
+        payload: dict,
+        user_id: str,
+        api_key: str,
+        error_message: str,
+        error_traceback: str = '',
+        message_id: str = '',
+        retry_at: Optional[datetime] = None
+    ) -> None:
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        
+        DjangoFailedEvent.objects.create(
+            event_type=event_type,
+            payload=payload,
+            user_id=user_id or '',
+            api_key=api_key or '',
+            error_message=error_message,
+            error_traceback=error_traceback,
+            original_queue_message_id=message_id or '',
+            next_retry_at=retry_at,
+        )
+    
+    def bulk_record(self, failures: List[dict]) -> int:
+        """Insert many failures at once; each dict holds FailedEvent field values"""
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        
+        rows = [DjangoFailedEvent(**failure) for failure in failures]
+        DjangoFailedEvent.objects.bulk_create(rows)
+        return len(rows)
+    
+    def claim_due(self, limit: int, processing_timeout: int) -> List[FailedEvent]:
+        """
+        Claim up to `limit` events whose retry is due and mark them processing.
+        Claimed rows become due again after processing_timeout seconds, so a
+        retry batch that never reports back does not strand them.
+        """
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        from django.db.models import F, Q
+        from django.utils import timezone
+        
+        now = timezone.now()
+        
+        with transaction.atomic():
+            ids = list(
+                DjangoFailedEvent.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(next_retry_at__lte=now) | Q(next_retry_at__isnull=True),
+                    status__in=('pending', 'processing'),
+                    retry_count__lt=F('max_retries'),
+                )
+                .order_by(F('next_retry_at').asc(nulls_first=True))
+                .values_list('id', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            
+            DjangoFailedEvent.objects.filter(id__in=ids).update(
+                status='processing',
+                retry_count=F('retry_count') + 1,
+                last_retry_at=now,
+                next_retry_at=now + timedelta(seconds=processing_timeout)
+            )
+        
+        return [self._to_domain(e) for e in DjangoFailedEvent.objects.filter(id__in=ids)]
+    
+    def abandon_exhausted(self) -> int:
+        """Give up on claimed events whose last attempt never reported back"""
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        from django.db.models import F
+        from django.utils import timezone
+        
+        return DjangoFailedEvent.objects.filter(
+            status='processing',
+            next_retry_at__lte=timezone.now(),
+            retry_count__gte=F('max_retries')
+        ).update(status='abandoned', next_retry_at=None)
+    
+    def resolve(self, ids: List[str]) -> int:
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        from django.utils import timezone
+        
+        return DjangoFailedEvent.objects.filter(id__in=ids, status='processing').update(
+            status='resolved',
+            resolved_at=timezone.now(),
+            next_retry_at=None
+        )
+    
+    def reschedule(
+        self,
+        failed_event_id: str,
+        error_message: str,
+        error_traceback: str,
+        base_delay: int,
+        max_delay: int
+    ) -> Optional[str]:
+        """Schedule the next attempt with exponential backoff; returns the new status"""
+        from apps.event.models import FailedEvent as DjangoFailedEvent
+        from django.utils import timezone
+        
+        orm_event = DjangoFailedEvent.objects.filter(id=failed_event_id).first()
+        if not orm_event:
+            return None
+        
+        orm_event.error_message = error_message
+        orm_event.error_traceback = error_traceback
+        if orm_event.retry_count >= orm_event.max_retries:
+            orm_event.status = 'abandoned'
+            orm_event.next_retry_at = None
+        else:
+            delay = min(base_delay * 2 ** orm_event.retry_count, max_delay)
+            orm_event.status = 'pending'
+            orm_event.next_retry_at = timezone.now() + timedelta(seconds=delay)
+        
+        orm_event.save(update_fields=['error_message', 'error_traceback', 'status', 'next_retry_at'])
+        return orm_event.status
+    
+    def _to_domain(self, orm_event) -> FailedEvent:
+        return FailedEvent(
+            id=str(orm_event.id),
+            event_type=orm_event.event_type,
+            payload=orm_event.payload,
+            user_id=orm_event.user_id,
+            api_key=orm_event.api_key,
+            retry_count=orm_event.retry_count,
+            max_retries=orm_event.max_retries,
+            status=orm_event.status,
+            next_retry_at=orm_event.next_retry_at,
+        )
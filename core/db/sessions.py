@@ -63,6 +63,29 @@ class SessionData:
         
         return [self._to_domain(s) for s in orm_sessions]
     
+    def mark_inactive(self, timeout_seconds: int) -> int:
+        """Set active sessions without an event for timeout_seconds inactive, in one UPDATE"""
+        from apps.event.models import Session as DjangoSession
+        from django.utils import timezone
+        
+        cutoff_time = timezone.now() - timedelta(seconds=timeout_seconds)
+        
+        return DjangoSession.objects.filter(
+            status=DjangoSession.SessionStatus.ACTIVE,
+            last_event__lt=cutoff_time
+        ).update(status=DjangoSession.SessionStatus.INACTIVE)
+    
+    def mark_active_processed(self) -> int:
+        """Stamp active sessions with events since their last processing run, in one UPDATE"""
+        from apps.event.models import Session as DjangoSession
+        from django.db.models import F, Q
+        from django.utils import timezone
+        
+        return DjangoSession.objects.filter(
+            Q(last_processed_at__isnull=True) | Q(last_processed_at__lt=F('last_event')),
+            status=DjangoSession.SessionStatus.ACTIVE
+        ).update(last_processed_at=timezone.now())
+    
     def _to_domain(self, orm_session) -> Session:
         from dateutil import parser
         
@@ -0,0 +1,12 @@
+from .registry import collect_registry, render_latest
+from .spans import RequestTimings, activate, current_timings, deactivate, span
+
+__all__ = [
+    'collect_registry',
+    'render_latest',
+    'RequestTimings',
+    'activate',
+    'current_timings',
+    'deactivate',
+    'span',
+]
@@ -0,0 +1,34 @@
+import os
+import logging
+from celery.signals import worker_ready, worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Serve worker metrics from the main worker process when WORKER_METRICS_PORT is set"""
+    from django.conf import settings
+    from prometheus_client import start_http_server
+    from .registry import collect_registry, is_multiprocess
+
+    port = getattr(settings, 'WORKER_METRICS_PORT', None)
+    if not port:
+        return
+
+    if not is_multiprocess():
+        # prefork children keep their own registries; without a shared
+        # directory only samples from this process would be visible
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set; worker metrics only cover the main process")
+
+    start_http_server(port, registry=collect_registry())
+    logger.info(f"Worker metrics listening on :{port}")
+
+
+@worker_process_shutdown.connect
+def mark_process_dead(pid=None, **kwargs):
+    from .registry import is_multiprocess
+
+    if is_multiprocess():
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
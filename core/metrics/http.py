@@ -0,0 +1,77 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+REQUEST_LATENCY = Histogram(
+    'carboncut_http_request_duration_seconds',
+    'Time spent handling a request',
+    ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_STAGE_LATENCY = Histogram(
+    'carboncut_http_stage_duration_seconds',
+    'Time spent in a named stage of a request',
+    ['view', 'stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_DB_QUERIES = Histogram(
+    'carboncut_http_db_queries',
+    'Database queries issued per request',
+    ['view'],
+    buckets=QUERY_BUCKETS
+)
+
+REQUEST_DB_LATENCY = Histogram(
+    'carboncut_http_db_duration_seconds',
+    'Time spent in database queries per request',
+    ['view'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_SIZE = Histogram(
+    'carboncut_http_request_size_bytes',
+    'Request body size',
+    ['view'],
+    buckets=SIZE_BUCKETS
+)
+
+RESPONSE_SIZE = Histogram(
+    'carboncut_http_response_size_bytes',
+    'Response body size',
+    ['view'],
+    buckets=SIZE_BUCKETS
+)
+
+RATE_LIMITED_TOTAL = Counter(
+    'carboncut_http_rate_limited_total',
+    'Requests refused with 429 by the public endpoint rate limits',
+    ['view', 'scope']
+)
+
+ADMISSION_DECISIONS_TOTAL = Counter(
+    'carboncut_http_admission_decisions_total',
+    'Collector admission control outcomes: events admitted, sampled out or trimmed, and requests rejected',
+    ['decision']
+)
+
+ADMISSION_PRESSURE_LEVEL = Gauge(
+    'carboncut_http_admission_pressure_level',
+    'Queue pressure level from the last admission control sample (0 = normal, 3 = rejecting)',
+    multiprocess_mode='max'
+)
+
+EDGE_DEDUPE_TOTAL = Counter(
+    'carboncut_http_edge_dedupe_events_total',
+    'Collector events checked by the edge dedupe, by outcome',
+    ['outcome']
+)
+
+BOT_FILTER_TOTAL = Counter(
+    'carboncut_http_bot_filter_events_total',
+    'Collector events checked by the bot filter: human, tagged or dropped',
+    ['outcome']
+)
@@ -0,0 +1,20 @@
+import os
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+
+def is_multiprocess() -> bool:
+    # gunicorn/celery prefork: every process writes its samples under this dir
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def collect_registry() -> CollectorRegistry:
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest():
+    return generate_latest(collect_registry()), CONTENT_TYPE_LATEST
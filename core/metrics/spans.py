@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+
+class RequestTimings:
+    """Per-request stage durations and database usage, collected by span() and the query wrapper"""
+
+    __slots__ = ('started_at', 'stages', 'db_queries', 'db_seconds')
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def record_query(self, execute, sql, params, many, context):
+        # signature required by connection.execute_wrapper()
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - started_at
+
+    def server_timing(self) -> str:
+        entries = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in self.stages.items()]
+        entries.append(f'db;desc="{self.db_queries} queries";dur={self.db_seconds * 1000:.2f}')
+        entries.append(f'total;dur={self.elapsed() * 1000:.2f}')
+        return ', '.join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('request_timings', default=None)
+
+
+def activate(timings: RequestTimings) -> Token:
+    return _current.set(timings)
+
+
+def deactivate(token: Token):
+    _current.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block against the current request; a no-op outside instrumented requests"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage, time.perf_counter() - started_at)
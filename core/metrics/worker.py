@@ -0,0 +1,48 @@
+from prometheus_client import Counter, Histogram
+from .http import LATENCY_BUCKETS
+
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0, 3600.0)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+EVENTS_TOTAL = Counter(
+    'carboncut_worker_events_total',
+    'Events handled by process_event_batch_task',
+    ['event_type', 'outcome']
+)
+
+EVENT_LAG = Histogram(
+    'carboncut_worker_event_lag_seconds',
+    'Time between EventQueueService stamping queued_at and the worker picking the event up',
+    ['event_type'],
+    buckets=LAG_BUCKETS
+)
+
+STAGE_LATENCY = Histogram(
+    'carboncut_worker_stage_duration_seconds',
+    'Time spent per event in each processing stage; processor_batch covers one event type of a batch, and dedupe_batch, ledger_batch and session_batch a whole batch (event_type "mixed" when it spans several)',
+    ['event_type', 'stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+BATCH_SIZE = Histogram(
+    'carboncut_worker_batch_size',
+    'Events per process_event_batch_task call',
+    buckets=BATCH_SIZE_BUCKETS
+)
+
+BATCH_LATENCY = Histogram(
+    'carboncut_worker_batch_duration_seconds',
+    'Wall time of one process_event_batch_task call',
+    buckets=LATENCY_BUCKETS
+)
+
+FAILED_EVENTS_TOTAL = Counter(
+    'carboncut_worker_failed_events_total',
+    'FailedEvent rows written by the worker',
+    ['event_type']
+)
+
+TENANT_DEFERRED_TOTAL = Counter(
+    'carboncut_worker_tenant_deferred_total',
+    'Batches requeued because their tenant was at EVENT_TENANT_MAX_IN_FLIGHT'
+)
@@ -1,8 +1,8 @@
 from .user import User, OAuthCredential, AuthToken
 from .carbon_account import CarbonBalance, CarbonTransaction
 from .session import Session, SessionEvent
-from .apikey import APIKey, ConversionRule
-from .event import ProcessedEvent, ActiveSession
+from .apikey import APIKey, APIKeyConfigSnapshot, ConversionRule
+from .event import ProcessedEvent, ActiveSession, OutboxEvent, FailedEvent
 
 __all__ = [
     'User',
@@ -13,7 +13,10 @@ __all__ = [
     'Session',
     'SessionEvent',
     'APIKey',
+    'APIKeyConfigSnapshot',
     'ConversionRule',
     'ProcessedEvent',
     'ActiveSession',
+    'OutboxEvent',
+    'FailedEvent',
 ]
\ No newline at end of file
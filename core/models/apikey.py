@@ -15,9 +15,24 @@ class APIKey:
     domain: str = '*'
     industry_category: Optional[str] = None
     product: Optional[str] = None
+    plan: str = 'free'
+    sampling_rate: float = 1.0
+    bot_filter: str = 'tag'
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
 
+@dataclass
+class APIKeyConfigSnapshot:
+    api_key_id: str
+    user_id: str
+    version: str
+    config: dict
+    body: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
 @dataclass
 class ConversionRule:
     id: str
@@ -54,6 +54,8 @@ class CampaignEmission(BaseModel):
     region: str = ''
     city: str = ''
     device_type: str = 'desktop'
+    platform: str = ''
+    ad_format: str = ''
     
     page_views: int = 0
     clicks: int = 0
@@ -101,4 +103,20 @@ class GoogleAdsImpressionData(BaseModel):
     device_type: str
     impressions: int
     clicks: int
-    cost_micros: int
\ No newline at end of file
+    cost_micros: int
+
+
+class AdReportRow(BaseModel):
+    """One row of an ad platform report: counts for a campaign, hour and audience slice"""
+    campaign_id: UUID
+    date: date
+    hour: Optional[int] = Field(default=None, ge=0, le=23)
+    platform: str = 'google_ads'
+    ad_format: str = 'static_display'
+    device_type: str = 'desktop'
+    country: str = Field(default='US', min_length=2, max_length=2)
+    region: str = ''
+    impressions: int = Field(default=0, ge=0)
+    clicks: int = Field(default=0, ge=0)
+    conversions: int = Field(default=0, ge=0)
+    cost_micros: int = Field(default=0, ge=0)
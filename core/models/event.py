@@ -22,4 +22,30 @@ class ActiveSession:
     event_count: int = 0
     status: str = 'active'  
     created_at: datetime = field(default_factory=datetime.now)
-    last_processed_at: Optional[datetime] = None
\ No newline at end of file
+    last_processed_at: Optional[datetime] = None
+
+@dataclass
+class OutboxEvent:
+    id: int
+    event_type: str
+    payload: dict
+    user_id: str
+    api_key: str
+    api_key_id: str
+    session_id: Optional[str]
+    industry_category: str
+    product: str
+    created_at: datetime
+    attempts: int = 0
+
+@dataclass
+class FailedEvent:
+    id: str
+    event_type: str
+    payload: dict
+    user_id: str
+    api_key: str
+    retry_count: int
+    max_retries: int
+    status: str = 'pending'
+    next_retry_at: Optional[datetime] = None
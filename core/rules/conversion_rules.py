@@ -0,0 +1,180 @@
+import re
+import logging
+import threading
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+logger = logging.getLogger(__name__)
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton: one pass over the text finds every pattern."""
+
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(value)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> set:
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class ConversionRuleMatcher:
+    """
+    All active URL rules of one API key compiled into lookup structures:
+    hash lookups for exact and query_param, length-bucketed prefix/suffix
+    indexes, one Aho-Corasick automaton for contains and a combined regex
+    used as a fast reject before the individual regex rules run.
+    """
+
+    def __init__(self, rules: List[dict]):
+        self._priority: Dict[str, int] = {}
+        self._exact: Dict[str, List[str]] = defaultdict(list)
+        self._prefixes: Dict[int, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self._suffixes: Dict[int, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self._query_params: Dict[str, List[Tuple[Optional[str], str]]] = defaultdict(list)
+        self._regexes: List[Tuple[re.Pattern, str]] = []
+        contains = []
+
+        for rule in rules:
+            pattern = rule.get('url_pattern')
+            if rule.get('rule_type', 'url') != 'url' or not pattern:
+                continue
+
+            rule_id = rule['id']
+            match_type = rule.get('match_type') or 'contains'
+
+            if match_type == 'exact':
+                self._exact[pattern].append(rule_id)
+            elif match_type == 'starts_with':
+                self._prefixes[len(pattern)][pattern].append(rule_id)
+            elif match_type == 'ends_with':
+                self._suffixes[len(pattern)][pattern].append(rule_id)
+            elif match_type == 'regex':
+                try:
+                    self._regexes.append((re.compile(pattern), rule_id))
+                except re.error as e:
+                    logger.warning(f"Skipping conversion rule {rule_id} with invalid regex: {e}")
+                    continue
+            elif match_type == 'query_param':
+                key, sep, value = pattern.lstrip('?').partition('=')
+                self._query_params[key].append((value if sep else None, rule_id))
+            else:
+                contains.append((pattern, rule_id))
+
+            self._priority[rule_id] = rule.get('priority') or 0
+
+        self._contains = AhoCorasick(contains) if contains else None
+        self._regex_prefilter = self._combine_regexes()
+
+    def _combine_regexes(self) -> Optional[re.Pattern]:
+        if len(self._regexes) < 2:
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{regex.pattern})' for regex, _ in self._regexes))
+        except re.error:
+            # numbered backreferences do not survive concatenation
+            return None
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._priority)
+
+    def match(self, page_url: str) -> List[str]:
+        if not page_url or not self._priority:
+            return []
+
+        parts = urlsplit(page_url)
+        candidates = {page_url, parts.path} if parts.path else {page_url}
+        matched = set()
+
+        for candidate in candidates:
+            matched.update(self._exact.get(candidate, ()))
+            for length, prefixes in self._prefixes.items():
+                matched.update(prefixes.get(candidate[:length], ()))
+            for length, suffixes in self._suffixes.items():
+                if length <= len(candidate):
+                    matched.update(suffixes.get(candidate[-length:], ()))
+
+        if self._contains:
+            matched.update(self._contains.search(page_url))
+
+        if self._regexes and (self._regex_prefilter is None or self._regex_prefilter.search(page_url)):
+            matched.update(rule_id for regex, rule_id in self._regexes if regex.search(page_url))
+
+        if self._query_params and parts.query:
+            for key, value in parse_qsl(parts.query, keep_blank_values=True):
+                for expected, rule_id in self._query_params.get(key, ()):
+                    if expected is None or expected == value:
+                        matched.add(rule_id)
+
+        return sorted(matched, key=lambda rule_id: -self._priority[rule_id])
+
+
+class ConversionMatcherCache:
+    """Compiled matchers per API key, recompiled when the config snapshot version changes."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._matchers: OrderedDict = OrderedDict()
+
+    def get(self, api_key_id: str, version: str, rules: List[dict]) -> ConversionRuleMatcher:
+        with self._lock:
+            entry = self._matchers.get(api_key_id)
+            if entry and entry[0] == version:
+                self._matchers.move_to_end(api_key_id)
+                return entry[1]
+
+        matcher = ConversionRuleMatcher(rules)
+
+        with self._lock:
+            self._matchers[api_key_id] = (version, matcher)
+            self._matchers.move_to_end(api_key_id)
+            while len(self._matchers) > self.max_size:
+                self._matchers.popitem(last=False)
+        return matcher
+
+
+matcher_cache = ConversionMatcherCache()
@@ -0,0 +1,69 @@
+import logging
+from django.conf import settings
+from django.db import connection
+from core.metrics import spans
+from core.metrics.http import (
+    REQUEST_DB_LATENCY,
+    REQUEST_DB_QUERIES,
+    REQUEST_LATENCY,
+    REQUEST_SIZE,
+    REQUEST_STAGE_LATENCY,
+    RESPONSE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records latency, per-stage spans, query count and body sizes for every
+    request, and adds a Server-Timing header when DEBUG is on.
+    """
+    EXCLUDED_PATHS = ('/metrics',)
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if request.path in self.EXCLUDED_PATHS:
+            return self.get_response(request)
+        
+        timings = spans.RequestTimings()
+        token = spans.activate(timings)
+        try:
+            with connection.execute_wrapper(timings.record_query):
+                response = self.get_response(request)
+        finally:
+            spans.deactivate(token)
+        
+        try:
+            self._observe(request, response, timings)
+        except Exception as e:
+            logger.warning(f"Failed to record request metrics: {e}")
+        
+        if settings.DEBUG:
+            response['Server-Timing'] = timings.server_timing()
+        
+        return response
+    
+    def _observe(self, request, response, timings: spans.RequestTimings):
+        view = self._view_label(request)
+        
+        REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(timings.elapsed())
+        for stage, seconds in timings.stages.items():
+            REQUEST_STAGE_LATENCY.labels(view, stage).observe(seconds)
+        REQUEST_DB_QUERIES.labels(view).observe(timings.db_queries)
+        REQUEST_DB_LATENCY.labels(view).observe(timings.db_seconds)
+        
+        content_length = request.META.get('CONTENT_LENGTH')
+        if content_length and content_length.isdigit():
+            REQUEST_SIZE.labels(view).observe(int(content_length))
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+    
+    def _view_label(self, request) -> str:
+        # named routes keep label cardinality bounded; unmatched paths share one label
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        return match.view_name or match.route or 'unnamed'
@@ -1,4 +1,4 @@
-from .session_manager import SessionManager
+from .session.session_manager import SessionManager
 from .carbon_accounting import CarbonAccountingService
 from .offset_manager import OffsetManager
 
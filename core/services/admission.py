@@ -0,0 +1,191 @@
+"""
+Admission control for the collector.
+
+Queue pressure is sampled at most every ADMISSION_SAMPLE_INTERVAL seconds per
+process, never per request: the backlog (SQS ApproximateNumberOfMessages, or
+the event_outbox row count when events go through the outbox) and the worst
+enqueue-to-process lag the workers reported for their last batch. The larger
+of the two readings picks a pressure level, and each level degrades ingest a
+little further:
+
+1. ping events are sampled at ADMISSION_PING_SAMPLE_RATE; kept pings fold the
+   rate into their sampling_rate, so the worker scales their whole result
+   (bytes and time on page) by the inverse and session emissions stay unbiased
+2. page_view events lose descriptive detail the emission calculation does not use
+3. requests are refused with 503 and Retry-After
+"""
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from core.metrics.http import ADMISSION_DECISIONS_TOTAL, ADMISSION_PRESSURE_LEVEL
+
+logger = logging.getLogger(__name__)
+
+WORKER_LAG_KEY = 'admission:worker_lag'
+
+NORMAL = 0
+SAMPLE_PINGS = 1
+TRIM_PAGE_VIEWS = 2
+REJECT = 3
+
+# page_view fields that describe the page but feed no emission factor
+PAGE_VIEW_DETAIL_FIELDS = (
+    'page_title',
+    'language',
+    'timezone',
+    'viewport_size',
+    'resourceType',
+    'resourceCount',
+    'resource_types',
+    'trackingRequestBytes',
+    'trackingRequestBody',
+    'location_accuracy',
+)
+
+
+@dataclass
+class Pressure:
+    level: int = NORMAL
+    depth: Optional[int] = None
+    lag: Optional[float] = None
+
+
+def report_worker_lag(seconds: Optional[float]):
+    """Called by the worker after each batch with the largest lag it saw"""
+    if seconds is None or not settings.ADMISSION_CONTROL_ENABLED:
+        return
+    cache.set(WORKER_LAG_KEY, seconds, settings.ADMISSION_LAG_TTL)
+
+
+def _level_for(value: Optional[float], thresholds: List[float]) -> int:
+    if value is None:
+        return NORMAL
+    return sum(1 for threshold in thresholds[:REJECT] if threshold > 0 and value >= threshold)
+
+
+class AdmissionController:
+    def __init__(self, sample_interval: float = None):
+        self.sample_interval = settings.ADMISSION_SAMPLE_INTERVAL if sample_interval is None else sample_interval
+        self._pressure = Pressure()
+        self._sampled_at = float('-inf')
+        self._lock = threading.Lock()
+        self._sqs = None
+
+    def pressure(self) -> Pressure:
+        if time.monotonic() - self._sampled_at < self.sample_interval:
+            return self._pressure
+
+        # one thread samples, the others keep using the last reading
+        if not self._lock.acquire(blocking=False):
+            return self._pressure
+        try:
+            depth = self._backlog()
+            lag = cache.get(WORKER_LAG_KEY)
+            level = max(
+                _level_for(depth, settings.ADMISSION_DEPTH_THRESHOLDS),
+                _level_for(lag, settings.ADMISSION_LAG_THRESHOLDS)
+            )
+            if level != self._pressure.level:
+                logger.warning(f"Admission pressure level {self._pressure.level} -> {level} (backlog {depth}, lag {lag})")
+            self._pressure = Pressure(level, depth, lag)
+            self._sampled_at = time.monotonic()
+            ADMISSION_PRESSURE_LEVEL.set(level)
+        finally:
+            self._lock.release()
+        return self._pressure
+
+    def retry_after(self) -> int:
+        """Seconds a refused request should wait, or 0 to let it in"""
+        if not settings.ADMISSION_CONTROL_ENABLED or self.pressure().level < REJECT:
+            return 0
+        ADMISSION_DECISIONS_TOTAL.labels('rejected').inc()
+        return settings.ADMISSION_RETRY_AFTER
+
+    def shape(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sample and trim validated queue events for the current pressure level"""
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return events
+
+        level = self.pressure().level
+        if level < SAMPLE_PINGS:
+            ADMISSION_DECISIONS_TOTAL.labels('admitted').inc(len(events))
+            return events
+
+        admitted = []
+        sampled_out = trimmed = 0
+        rate = settings.ADMISSION_PING_SAMPLE_RATE
+        for event in events:
+            payload = event['payload']
+            subtype = payload.get('event')
+            if subtype == 'ping' and rate < 1:
+                if random.random() >= rate:
+                    sampled_out += 1
+                    continue
+                # on top of any session sampling: kept with probability of both
+                payload['sampling_rate'] = payload.get('sampling_rate', 1.0) * rate
+            elif level >= TRIM_PAGE_VIEWS and subtype == 'page_view':
+                for name in PAGE_VIEW_DETAIL_FIELDS:
+                    payload.pop(name, None)
+                trimmed += 1
+            admitted.append(event)
+
+        if sampled_out:
+            ADMISSION_DECISIONS_TOTAL.labels('ping_sampled_out').inc(sampled_out)
+        if trimmed:
+            ADMISSION_DECISIONS_TOTAL.labels('page_view_trimmed').inc(trimmed)
+        ADMISSION_DECISIONS_TOTAL.labels('admitted').inc(len(admitted))
+        return admitted
+
+    def _backlog(self) -> Optional[int]:
+        try:
+            if settings.EVENT_OUTBOX_ENABLED or settings.EVENT_QUEUE_BACKEND == 'postgres':
+                from core.db.events import EventOutboxData
+
+                return EventOutboxData().backlog()
+            return self._sqs_backlog()
+        except Exception as e:
+            # no reading is treated as no pressure; a broken probe must not shed traffic
+            logger.warning(f"Could not sample queue backlog: {e}")
+            return None
+
+    def _sqs_backlog(self) -> Optional[int]:
+        queue_urls = [
+            queue['url']
+            for queue in getattr(settings, 'CELERY_BROKER_TRANSPORT_OPTIONS', {}).get('predefined_queues', {}).values()
+        ]
+        if not queue_urls:
+            return None
+
+        if self._sqs is None:
+            import boto3
+
+            self._sqs = boto3.client(
+                'sqs',
+                endpoint_url=settings.AWS_ENDPOINT_URL,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=settings.AWS_DEFAULT_REGION,
+            )
+        depth = 0
+        for queue_url in queue_urls:
+            attributes = self._sqs.get_queue_attributes(
+                QueueUrl=queue_url,
+                AttributeNames=['ApproximateNumberOfMessages']
+            )['Attributes']
+            depth += int(attributes.get('ApproximateNumberOfMessages', 0))
+        return depth
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
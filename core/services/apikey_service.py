@@ -1,12 +1,88 @@
+import atexit
 import logging
+import os
 import secrets
 import hashlib
-from typing import List, Optional
-from core.models.apikey import APIKey, ConversionRule
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from apps.common import serialization
+from core.models.apikey import APIKey, APIKeyConfigSnapshot, ConversionRule
 from core.db.apikeys import APIKeyData, ConversionRuleData
+from core.rules.conversion_rules import matcher_cache
+from core.services.sampling import sampling_config
 
 logger = logging.getLogger(__name__)
 
+
+class APIKeyUsageBuffer:
+    """
+    Per-process usage counter flushed to the worker in one task per interval.
+    A request past the interval flushes inline; otherwise a daemon thread
+    flushes an idle process's counts, and the atexit hook the rest on a clean
+    shutdown. A killed process loses at most one interval of hits.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._last_flush = time.monotonic()
+        self._flusher_pid = None
+
+    def record(self, api_key_id: str):
+        pending = None
+        interval = self.flush_interval
+        if interval is None:
+            interval = settings.APIKEY_USAGE_FLUSH_INTERVAL
+
+        with self._lock:
+            self._start_flusher(interval)
+            self._counts[api_key_id] += 1
+            now = time.monotonic()
+            if now - self._last_flush >= interval:
+                pending, self._counts = self._counts, Counter()
+                self._last_flush = now
+
+        if pending:
+            self._flush(pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        if pending:
+            self._flush(pending)
+
+    def _start_flusher(self, interval: float):
+        # per pid: a thread started before a fork does not exist in the child
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_when_idle, args=(interval,), name='apikey-usage-flush', daemon=True).start()
+
+    def _flush_when_idle(self, interval: float):
+        while True:
+            time.sleep(interval)
+            if time.monotonic() - self._last_flush >= interval:
+                self.flush()
+
+    def _flush(self, pending: Counter):
+        from core.tasks import flush_api_key_usage_task
+        try:
+            flush_api_key_usage_task.delay(dict(pending))
+        except Exception as e:
+            logger.warning(f"Could not flush API key usage, keeping {sum(pending.values())} hits buffered: {e}")
+            with self._lock:
+                self._counts.update(pending)
+
+
+usage_buffer = APIKeyUsageBuffer()
+atexit.register(usage_buffer.flush)
+
 class APIKeyService:
     def __init__(self):
         self.api_keys = APIKeyData()
@@ -42,6 +118,88 @@ class APIKeyService:
     
     def record_usage(self, api_key: APIKey) -> APIKey:
         return self.api_keys.increment_usage(api_key)
+    
+    def record_usage_deferred(self, api_key_id: str) -> None:
+        usage_buffer.record(api_key_id)
+
+
+class APIKeyConfigService:
+    CACHE_PREFIX = 'apikey_config'
+
+    def __init__(self):
+        self.api_keys = APIKeyData()
+        self.conversion_rules = ConversionRuleData()
+
+    def get_snapshot(self, key: str) -> Optional[APIKeyConfigSnapshot]:
+        cache_key = self._cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached or None
+
+        snapshot = self.build_snapshot(key)
+        if snapshot:
+            cache.set(cache_key, snapshot, settings.APIKEY_CONFIG_CACHE_TTL)
+        else:
+            cache.set(cache_key, False, settings.APIKEY_CONFIG_NEGATIVE_CACHE_TTL)
+        return snapshot
+
+    def build_snapshot(self, key: str) -> Optional[APIKeyConfigSnapshot]:
+        api_key = self.api_keys.get_by_key(key)
+        if not api_key:
+            return None
+
+        rules = self.conversion_rules.get_by_api_key(api_key.id, active_only=True)
+        conversion_rules = [
+            {
+                'id': rule.id,
+                'name': rule.name,
+                'rule_type': rule.rule_type,
+                'url_pattern': rule.url_pattern,
+                'match_type': rule.match_type,
+                'css_selector': rule.css_selector,
+                'element_text': rule.element_text,
+                'form_id': rule.form_id,
+                'custom_event_name': rule.custom_event_name,
+                'track_value': rule.track_value,
+                'value_selector': rule.value_selector,
+                'default_value': float(rule.default_value) if rule.default_value else None,
+                'priority': rule.priority
+            }
+            for rule in rules
+        ]
+
+        industry_type = getattr(api_key, 'industry_type', None) or 'internet'
+        config = {
+            'success': True,
+            'tracking_enabled': api_key.is_active,
+            'domain': api_key.domain,
+            'industry_type': industry_type,
+            'product': api_key.product,
+            'conversion_rules': conversion_rules,
+            'total_rules': len(conversion_rules),
+            'sampling': sampling_config(api_key.sampling_rate)
+        }
+
+        version = hashlib.sha256(self._serialize(config)).hexdigest()[:16]
+        config['version'] = version
+
+        return APIKeyConfigSnapshot(
+            api_key_id=api_key.id,
+            user_id=api_key.user_id,
+            version=version,
+            config=config,
+            body=self._serialize(config)
+        )
+
+    def invalidate(self, key: str) -> None:
+        cache.delete(self._cache_key(key))
+
+    def _serialize(self, config: dict) -> bytes:
+        return serialization.dumps(config, sort_keys=True)
+
+    def _cache_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return f"{self.CACHE_PREFIX}:{digest}"
 
 
 class ConversionRuleService:
@@ -54,6 +212,9 @@ class ConversionRuleService:
     def get_api_key_rules(self, api_key_id: str, active_only: bool = False) -> List[ConversionRule]:
         return self.rules.get_by_api_key(api_key_id, active_only)
     
+    def count_api_key_rules(self, api_key_ids: List[str], active_only: bool = False) -> Dict[str, int]:
+        return self.rules.count_by_api_keys(api_key_ids, active_only)
+    
     def get_rule_by_id(self, rule_id: str) -> Optional[ConversionRule]:
         return self.rules.get_by_id(rule_id)
     
@@ -64,4 +225,21 @@ class ConversionRuleService:
         return self.rules.delete(rule_id)
     
     def record_conversion(self, rule: ConversionRule) -> ConversionRule:
-        return self.rules.increment_conversion(rule)
\ No newline at end of file
+        return self.rules.increment_conversion(rule)
+    
+    def match_page_view(self, key: str, page_url: str) -> List[str]:
+        snapshot = APIKeyConfigService().get_snapshot(key)
+        if not snapshot or not snapshot.config['conversion_rules']:
+            return []
+        
+        matcher = matcher_cache.get(
+            snapshot.api_key_id,
+            snapshot.version,
+            snapshot.config['conversion_rules']
+        )
+        return matcher.match(page_url)
+    
+    def record_conversions(self, conversion_counts: Dict[str, int]) -> int:
+        if not conversion_counts:
+            return 0
+        return self.rules.bulk_increment_conversions(conversion_counts)
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Crawler and monitoring traffic filtering at the collector.
+
+An event reads as a bot when its user agent matches the combined bot pattern
+(crawlers, headless browsers, HTTP libraries, uptime and datacenter health
+checks; see domain.internet.devices) or when it claims a browser user agent
+but sends a page_view without a screen_resolution, which the browser SDK
+always reports. Events without any user agent come from server-side senders
+and are left alone.
+
+Each API key picks what happens to bots (APIKey.bot_filter):
+- 'drop': never queued, so they cost no broker, worker or database time
+- 'tag' (default): queued with payload['bot'] set to the reason, recorded in
+  metadata, so existing keys keep their totals until they opt into 'drop'
+- 'off'
+"""
+import logging
+from typing import Any, Dict, List, Optional
+from core.metrics.http import BOT_FILTER_TOTAL
+from core.services.key_counters import DailyKeyCounters
+from domain.internet.devices import classify_user_agent
+
+logger = logging.getLogger(__name__)
+
+OFF = 'off'
+TAG = 'tag'
+DROP = 'drop'
+
+STATS = DailyKeyCounters('bot_filter_stats', ('events', 'bots'))
+
+
+def bot_reason(payload: Dict[str, Any]) -> Optional[str]:
+    """Why a validated payload looks automated, or None"""
+    user_agent = payload.get('user_agent')
+    if not user_agent:
+        return None
+    if classify_user_agent(user_agent).is_bot:
+        return 'user_agent'
+    if payload.get('event') == 'page_view' and not payload.get('screen_resolution'):
+        return 'no_screen'
+    return None
+
+
+def filter_bots(api_key_id: str, events: List[Dict[str, Any]], mode: str) -> List[Dict[str, Any]]:
+    """Drop or tag the bot events of a batch according to the key's mode"""
+    if mode == OFF:
+        # the tag is ours to set, not the client's
+        for event in events:
+            event['payload'].pop('bot', None)
+        return events
+
+    kept = []
+    bots = 0
+    for event in events:
+        payload = event['payload']
+        payload.pop('bot', None)
+        reason = bot_reason(payload)
+        if reason is None:
+            kept.append(event)
+            continue
+        bots += 1
+        if mode == TAG:
+            payload['bot'] = reason
+            kept.append(event)
+
+    if events:
+        BOT_FILTER_TOTAL.labels('human').inc(len(events) - bots)
+    if bots:
+        BOT_FILTER_TOTAL.labels('dropped' if mode == DROP else 'tagged').inc(bots)
+        logger.debug(f"{'Dropped' if mode == DROP else 'Tagged'} {bots} bot events for API key {api_key_id}")
+    STATS.record(api_key_id, events=len(events), bots=bots)
+    return kept
+
+
+def bot_stats(api_key_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Today's (UTC) events checked and bots filtered per key, in one cache round trip"""
+    return {
+        api_key_id: {**counts, 'bot_rate': counts['bots'] / counts['events'] if counts['events'] else 0.0}
+        for api_key_id, counts in STATS.today(api_key_ids).items()
+    }
@@ -7,9 +7,13 @@ from core.models.campaign import (
     CreateCampaignRequest,
     UpdateCampaignRequest,
     GoogleAdsImpressionData,
+    AdReportRow,
     UTMParameter
 )
 from core.db.campaigns import CampaignData, CampaignEmissionData
+from core.db.carbon import CarbonData
+from core.services.carbon_accounting import CarbonAccountingService
+from calculators import InternetAdsCalculator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -122,6 +126,96 @@ class CampaignService:
         logger.info(f"Synced {count} emission records for campaign {campaign_id}")
         return count, f"Successfully synced {count} records"
 
+    
+    def ingest_ad_report(self, user_id: str, rows: List[AdReportRow], report_id: str) -> Dict[str, Any]:
+        """
+        Record ad report rows as CampaignEmission rollups and book the change
+        in emissions on the ledger as one transaction, so cost grows with
+        report rows rather than impressions. Rows replace what an earlier
+        report said about the same slice.
+        """
+        from django.db import transaction
+        
+        campaign_ids = self.campaign_repo.get_ids_by_external_ids(
+            user_id, list({str(row.campaign_id) for row in rows})
+        )
+        calculator = InternetAdsCalculator()
+        rollups = []
+        rejected = []
+        
+        for index, row in enumerate(rows):
+            campaign_id = campaign_ids.get(str(row.campaign_id))
+            if campaign_id is None:
+                rejected.append((index, f"Unknown campaign {row.campaign_id}"))
+                continue
+            
+            result = calculator.calculate({
+                'platform': row.platform,
+                'ad_format': row.ad_format,
+                'impressions': row.impressions,
+                'clicks': row.clicks,
+                'conversions': row.conversions,
+                'device_type': row.device_type,
+                'country_code': row.country,
+            })
+            factors = result['factors']
+            breakdown = result['breakdown']
+            
+            rollups.append({
+                'campaign_id': campaign_id,
+                'date': row.date,
+                'hour': row.hour,
+                'country': factors['country'],
+                'region': row.region,
+                'device_type': factors['device_type'],
+                'platform': factors['platform'],
+                'ad_format': factors['ad_format'],
+                'impressions': row.impressions,
+                'ad_clicks': row.clicks,
+                'conversions': row.conversions,
+                'cost_micros': row.cost_micros,
+                'impression_emissions_g': self._grams(breakdown['impressions_kg']),
+                'click_emissions_g': self._grams(breakdown['clicks_kg']),
+                'conversion_emissions_g': self._grams(breakdown['conversions_kg']),
+                'total_emissions_g': self._grams(result['total_emissions_kg']),
+            })
+        
+        delta_kg = Decimal('0')
+        with transaction.atomic():
+            delta_g = self.emission_repo.replace_rollups(rollups)
+            if delta_g:
+                delta_kg = delta_g / 1000
+                carbon_data = CarbonData()
+                balance = carbon_data.get_balance(user_id)
+                carbon_transaction = CarbonAccountingService().record_emission(
+                    balance=balance,
+                    amount_kg=delta_kg,
+                    reference_id=report_id,
+                    metadata={
+                        'event_type': 'internet_ads_report',
+                        'rows': len(rollups),
+                        'impressions': sum(rollup['impressions'] for rollup in rollups),
+                        'campaigns': sorted(external_id for external_id, campaign_id in campaign_ids.items()),
+                    }
+                )
+                carbon_data.save_transaction(carbon_transaction)
+                carbon_data.save_balance(balance)
+        
+        for campaign_id in {rollup['campaign_id'] for rollup in rollups}:
+            self.update_campaign_metrics(campaign_id)
+        
+        logger.info(f"Ad report {report_id}: {len(rollups)} rows, {delta_kg}kg CO2e booked for user {user_id}")
+        return {
+            'rows': len(rollups),
+            'rejected': rejected,
+            'kg_co2_delta': delta_kg,
+        }
+    
+    @staticmethod
+    def _grams(kg: float) -> Decimal:
+        # the rollup columns hold 6 decimal places; round here so deltas are exact
+        return (Decimal(str(kg)) * 1000).quantize(Decimal('0.000001'))
+
 
 class CampaignAnalyticsService:
     def __init__(self):
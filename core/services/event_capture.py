@@ -0,0 +1,160 @@
+"""
+Traffic capture for replay.
+
+The collector tees every validated batch into gzip compressed NDJSON files
+under EVENT_CAPTURE_DIR, one line per batch:
+
+    {"t": <capture time, unix seconds>, "events": [<queued event dicts>]}
+
+Files rotate by size and age and only the newest EVENT_CAPTURE_MAX_FILES are
+kept. Each line is sync-flushed, so a file that is still being written (or was
+cut short by a crash) can be read up to its last complete line. The replay_events
+management command feeds these files back into process_event_batch_task.
+"""
+import os
+import gzip
+import glob
+import time
+import random
+import zlib
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from django.conf import settings
+from apps.common import serialization
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = 'events-'
+FILE_SUFFIX = '.ndjson.gz'
+
+
+class EventCaptureWriter:
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        rotate_seconds: int,
+        max_files: int,
+        sample_rate: float = 1.0
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._raw = None
+        self._file = None
+        self._opened_at = 0.0
+        self._sequence = 0
+
+    def write(self, events: List[Dict[str, Any]]) -> bool:
+        """Append one batch; returns False when the batch was sampled out"""
+        if not events or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return False
+
+        line = serialization.dumps({'t': time.time(), 'events': events}) + b'\n'
+        with self._lock:
+            if self._should_rotate():
+                self._rotate()
+            self._file.write(line)
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close_current()
+
+    def _should_rotate(self) -> bool:
+        if self._file is None:
+            return True
+        if self._raw.tell() >= self.max_bytes:
+            return True
+        return time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self._close_current()
+        os.makedirs(self.directory, exist_ok=True)
+
+        # time first so a plain sort of the names is capture order
+        self._sequence += 1
+        name = f"{FILE_PREFIX}{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._sequence:04d}{FILE_SUFFIX}"
+        self._raw = open(os.path.join(self.directory, name), 'ab')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        self._opened_at = time.monotonic()
+        self._prune()
+
+    def _close_current(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+        self._file = None
+        self._raw = None
+
+    def _prune(self):
+        files = capture_files([self.directory])
+        for path in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove old capture file {path}: {e}")
+
+
+_writer: Optional[EventCaptureWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_capture_writer() -> Optional[EventCaptureWriter]:
+    """The process-wide writer, or None when capture is disabled"""
+    global _writer
+
+    if not settings.EVENT_CAPTURE_DIR:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = EventCaptureWriter(
+                    directory=settings.EVENT_CAPTURE_DIR,
+                    max_bytes=settings.EVENT_CAPTURE_MAX_BYTES,
+                    rotate_seconds=settings.EVENT_CAPTURE_ROTATE_SECONDS,
+                    max_files=settings.EVENT_CAPTURE_MAX_FILES,
+                    sample_rate=settings.EVENT_CAPTURE_SAMPLE_RATE
+                )
+    return _writer
+
+
+def capture_batch(events: List[Dict[str, Any]]):
+    """Tee a validated batch to disk; capture problems never fail the request"""
+    writer = get_capture_writer()
+    if writer is None:
+        return
+    try:
+        writer.write(events)
+    except Exception as e:
+        logger.warning(f"Event capture failed: {e}")
+
+
+def capture_files(paths: List[str]) -> List[str]:
+    """Expand files and directories into capture files in capture order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, f'{FILE_PREFIX}*{FILE_SUFFIX}')))
+        else:
+            files.append(path)
+    return sorted(files, key=os.path.basename)
+
+
+def read_captures(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Yield captured batches from files and directories, oldest first"""
+    for path in capture_files(paths):
+        with gzip.open(path, 'rb') as file:
+            try:
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    yield serialization.loads(line)
+            except (EOFError, zlib.error):
+                # the file is still being written or was cut short
+                logger.debug(f"Capture file {path} ends mid-stream")
@@ -0,0 +1,178 @@
+"""
+Edge deduplication of event ids before they are queued.
+
+SDK retries and double-fired beacons resend events the collector already
+queued. The deduplicator remembers (api key, event id) pairs for at least
+EVENT_DEDUPE_WINDOW seconds and drops repeats, so they never cost a broker
+round trip or a worker's is_processed lookup. ProcessedEventData stays the
+authority; this only filters the cheap, recent cases.
+
+Backends (EVENT_DEDUPE_BACKEND):
+- 'local': two generations of hashed keys per process, rotated every window
+  or when a generation holds EVENT_DEDUPE_MAX_KEYS keys. No network cost, but
+  only catches repeats that land on the same process.
+- 'cache': the shared cache, one get_many and one set_many per batch, so
+  repeats are caught across web workers.
+- 'off'
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from core.metrics.http import EDGE_DEDUPE_TOTAL
+from core.services.key_counters import DailyKeyCounters
+
+logger = logging.getLogger(__name__)
+
+STATS = DailyKeyCounters('edge_dedupe_stats', ('events', 'duplicates'))
+
+
+def _digest(api_key_id: str, event_id: str) -> bytes:
+    return hashlib.blake2b(f"{api_key_id}:{event_id}".encode(), digest_size=12).digest()
+
+
+class RotatingSeenSet:
+    """
+    Seen keys in a current and a previous generation. A key is remembered for
+    between one and two windows, and memory is bounded by 2 * max_keys digests.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._current = set()
+        self._previous = set()
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def check_and_add(self, keys: Iterable[bytes]) -> List[bool]:
+        """True for every key seen before; unseen keys are remembered"""
+        duplicates = []
+        with self._lock:
+            if time.monotonic() - self._rotated_at >= self.window:
+                self._rotate()
+            for key in keys:
+                if key in self._current or key in self._previous:
+                    duplicates.append(True)
+                    continue
+                self._current.add(key)
+                duplicates.append(False)
+                if len(self._current) >= self.max_keys:
+                    self._rotate()
+        return duplicates
+
+    def discard(self, keys: Iterable[bytes]):
+        with self._lock:
+            for key in keys:
+                self._current.discard(key)
+                self._previous.discard(key)
+
+    def _rotate(self):
+        self._previous, self._current = self._current, set()
+        self._rotated_at = time.monotonic()
+
+
+class EdgeDeduplicator:
+    CACHE_PREFIX = 'edge_dedupe'
+
+    def __init__(self, backend: str = None, window: int = None, max_keys: int = None):
+        self.backend = backend or settings.EVENT_DEDUPE_BACKEND
+        self.window = window or settings.EVENT_DEDUPE_WINDOW
+        self._seen = RotatingSeenSet(self.window, max_keys or settings.EVENT_DEDUPE_MAX_KEYS)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend in ('local', 'cache')
+
+    def filter(self, api_key_id: str, events: List[Dict[str, Any]], id_field: str = 'event_id') -> List[Dict[str, Any]]:
+        """
+        Drop events whose `id_field` (the processor's REFERENCE_FIELD) this key
+        sent within the window, repeats inside the batch included. Events
+        without one pass through; the worker's processed check has the last word
+        """
+        if not self.enabled or not events:
+            return events
+
+        positions, keys = self._keys(api_key_id, events, id_field)
+        if not keys:
+            duplicates = []
+        elif self.backend == 'cache':
+            duplicates = self._check_shared(keys)
+        else:
+            duplicates = self._seen.check_and_add(keys)
+
+        dropped_positions = {position for position, duplicate in zip(positions, duplicates) if duplicate}
+        unique = [event for position, event in enumerate(events) if position not in dropped_positions]
+        dropped = len(events) - len(unique)
+        EDGE_DEDUPE_TOTAL.labels('unique').inc(len(unique))
+        if dropped:
+            EDGE_DEDUPE_TOTAL.labels('duplicate').inc(dropped)
+            logger.debug(f"Dropped {dropped} duplicate events for API key {api_key_id}")
+        STATS.record(api_key_id, events=len(events), duplicates=dropped)
+        return unique
+
+    def forget(self, api_key_id: str, events: List[Dict[str, Any]], id_field: str = 'event_id'):
+        """Unmark events that were not queued after all, so the SDK's retry gets through"""
+        if not self.enabled or not events:
+            return
+        _, keys = self._keys(api_key_id, events, id_field)
+        if not keys:
+            return
+        if self.backend == 'cache':
+            cache.delete_many([self._cache_key(key) for key in keys])
+        else:
+            self._seen.discard(keys)
+
+    @staticmethod
+    def _keys(api_key_id: str, events: List[Dict[str, Any]], id_field: str) -> Tuple[List[int], List[bytes]]:
+        """Positions of the events that carry an id, and their digests"""
+        positions, keys = [], []
+        for position, event in enumerate(events):
+            event_id = event['payload'].get(id_field)
+            if event_id:
+                positions.append(position)
+                keys.append(_digest(api_key_id, str(event_id)))
+        return positions, keys
+
+    def _check_shared(self, keys: List[bytes]) -> List[bool]:
+        cache_keys = [self._cache_key(key) for key in keys]
+        seen = set(cache.get_many(cache_keys))
+
+        duplicates = []
+        new = {}
+        for cache_key in cache_keys:
+            # a repeat inside the batch is a duplicate too
+            duplicate = cache_key in seen or cache_key in new
+            duplicates.append(duplicate)
+            if not duplicate:
+                new[cache_key] = 1
+        if new:
+            cache.set_many(new, self.window)
+        return duplicates
+
+    def _cache_key(self, key: bytes) -> str:
+        return f"{self.CACHE_PREFIX}:{key.hex()}"
+
+
+def duplicate_stats(api_key_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Today's (UTC) events seen and duplicates dropped per key, in one cache round trip"""
+    return {
+        api_key_id: {
+            **counts,
+            'duplicate_rate': counts['duplicates'] / counts['events'] if counts['events'] else 0.0,
+        }
+        for api_key_id, counts in STATS.today(api_key_ids).items()
+    }
+
+
+_deduplicator: Optional[EdgeDeduplicator] = None
+
+
+def get_deduplicator() -> EdgeDeduplicator:
+    global _deduplicator
+    if _deduplicator is None:
+        _deduplicator = EdgeDeduplicator()
+    return _deduplicator
@@ -0,0 +1,120 @@
+"""
+Compact queue envelope for event batches.
+
+Layout: one version byte, one flags byte, then a msgpack map (zlib compressed
+when FLAG_ZLIB is set). Everything the events of a batch share - owner, API
+key id, event type, key category and the enqueue time - is written once in the
+header, and None values are dropped from every payload. Aware datetimes use
+the msgpack timestamp extension so the worker gets datetime objects back.
+"""
+import zlib
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_VERSION = 1
+SUPPORTED_VERSIONS = (1,)
+
+FLAG_ZLIB = 0x01
+
+
+class EnvelopeError(ValueError):
+    pass
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is not None:
+            return msgpack.Timestamp.from_datetime(obj)
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} cannot be packed")
+
+
+def _compact(payload: dict) -> dict:
+    return {key: value for key, value in payload.items() if value is not None}
+
+
+def encode_batch(
+    events: List[Dict[str, Any]],
+    user_id: str,
+    api_key_id: str,
+    queued_at: Optional[datetime] = None,
+    compress_threshold: Optional[int] = None
+) -> bytes:
+    """Pack queued events (the dicts EventQueueService builds) into one envelope"""
+    if not events:
+        raise EnvelopeError("Cannot build an envelope for an empty batch")
+
+    first = events[0]
+    event_types = [event['event_type'] for event in events]
+
+    header = {
+        'u': user_id,
+        'k': api_key_id,
+        'c': first.get('industry_category'),
+        'p': first.get('product'),
+        'q': queued_at,
+    }
+    if len(set(event_types)) == 1:
+        header['t'] = event_types[0]
+    else:
+        header['ts'] = event_types
+
+    body = msgpack.packb(
+        {'h': _compact(header), 'e': [_compact(event['payload']) for event in events]},
+        default=_default,
+        use_bin_type=True
+    )
+
+    flags = 0
+    if compress_threshold and len(body) >= compress_threshold:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= FLAG_ZLIB
+
+    return bytes((ENVELOPE_VERSION, flags)) + body
+
+
+def decode_batch(data: bytes) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Unpack an envelope into its header and events in the legacy queue shape.
+    The events carry 'api_key_id' instead of the raw key; the worker resolves it.
+    """
+    if len(data) < 2:
+        raise EnvelopeError("Envelope is truncated")
+
+    version, flags = data[0], data[1]
+    if version not in SUPPORTED_VERSIONS:
+        raise EnvelopeError(f"Unsupported envelope version {version}")
+
+    body = data[2:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    message = msgpack.unpackb(body, raw=False, timestamp=3)
+    header = message['h']
+    payloads = message['e']
+    event_types = header.get('ts') or [header.get('t')] * len(payloads)
+
+    events = [
+        {
+            'event_type': event_type,
+            'payload': payload,
+            'user_id': header['u'],
+            'api_key_id': header.get('k'),
+            'industry_category': header.get('c'),
+            'product': header.get('p'),
+            'queued_at': header.get('q'),
+        }
+        for event_type, payload in zip(event_types, payloads)
+    ]
+    return header, events
@@ -1,27 +1,31 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uuid
 import logging
-from core.db.events import ActiveSessionData
-from datetime import datetime
+from collections import Counter
+from contextlib import nullcontext
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.db.events import ActiveSessionData, EventOutboxData
+from core.metrics import span
+from core.services.event_envelope import ENVELOPE_VERSION, encode_batch
+from core.services.tenant_scheduling import partition_queue
 
 logger = logging.getLogger(__name__)
 
 class EventQueueService:
     def __init__(self):
         self.active_sessions = ActiveSessionData()
+        self.outbox = EventOutboxData()
     
     def queue_event(
         self,
         user_id: str,
         event_type: str,
         payload: dict,
-        api_key: str
+        api_key: str,
+        api_key_id: Optional[str] = None
     ) -> dict:
-        session_id = payload.get('session_id')
-        if session_id:
-            self.active_sessions.get_or_create(session_id, user_id, api_key)
-            self.active_sessions.update_activity(session_id)
-        
         batch_id = str(uuid.uuid4())
         
         event = {
@@ -29,11 +33,17 @@ class EventQueueService:
             'payload': payload,
             'user_id': user_id,
             'api_key': api_key,
-            'queued_at': datetime.now().isoformat()
+            'queued_at': timezone.now()
         }
         
-        from core.tasks import process_event_batch_task
-        process_event_batch_task.delay([event])
+        session_id = payload.get('session_id')
+        with self._atomic():
+            if session_id:
+                with span('sessions'):
+                    self.active_sessions.get_or_create(session_id, user_id, api_key)
+                    self.active_sessions.update_activity(session_id)
+            
+            self._publish([event], user_id, api_key_id, event['queued_at'])
         
         logger.info(f"Queued single event {event_type} for user {user_id} to Celery/SQS")
         
@@ -47,21 +57,29 @@ class EventQueueService:
         self,
         user_id: str,
         events: List[Dict[str, Any]],
-        api_key: str
+        api_key: str,
+        api_key_id: Optional[str] = None
     ) -> dict:
         batch_id = str(uuid.uuid4())
         
-        for event in events:
-            session_id = event.get('payload', {}).get('session_id')
-            if session_id:
-                self.active_sessions.get_or_create(session_id, user_id, api_key)
-                self.active_sessions.update_activity(session_id)
+        # one round trip per session rather than per event
+        session_counts = Counter(
+            session_id
+            for session_id in (event.get('payload', {}).get('session_id') for event in events)
+            if session_id
+        )
         
+        queued_at = timezone.now()
         for event in events:
-            event['queued_at'] = datetime.now().isoformat()
+            event['queued_at'] = queued_at
         
-        from core.tasks import process_event_batch_task
-        process_event_batch_task.delay(events)
+        with self._atomic():
+            with span('sessions'):
+                for session_id, event_count in session_counts.items():
+                    self.active_sessions.get_or_create(session_id, user_id, api_key)
+                    self.active_sessions.update_activity(session_id, event_count)
+            
+            self._publish(events, user_id, api_key_id, queued_at)
         
         logger.info(f"Queued batch {batch_id} with {len(events)} events to Celery/SQS")
         
@@ -70,4 +88,46 @@ class EventQueueService:
             'events': events,
             'event_count': len(events),
             'queued': True
-        }
\ No newline at end of file
+        }
+    
+    def _uses_outbox(self) -> bool:
+        # the postgres backend consumes the outbox table directly
+        return settings.EVENT_OUTBOX_ENABLED or settings.EVENT_QUEUE_BACKEND == 'postgres'
+    
+    def _atomic(self):
+        # with the outbox the session bookkeeping and the events commit together
+        return transaction.atomic() if self._uses_outbox() else nullcontext()
+    
+    def _publish(self, events: List[Dict[str, Any]], user_id: str, api_key_id: Optional[str], queued_at):
+        if self._uses_outbox():
+            with span('outbox'):
+                self.outbox.append(events, api_key_id)
+            return
+        
+        self.publish_to_broker(events, user_id, api_key_id, queued_at)
+    
+    def publish_to_broker(self, events: List[Dict[str, Any]], user_id: str, api_key_id: Optional[str], queued_at):
+        from core.tasks import process_event_batch_task
+        
+        # partitioned deployments keep each tenant's batches on one queue
+        queue = partition_queue(user_id, api_key_id)
+        routing = {'queue': queue} if queue else {}
+        
+        with span('publish'):
+            if api_key_id and settings.EVENT_ENVELOPE_VERSION >= ENVELOPE_VERSION:
+                envelope = encode_batch(
+                    events,
+                    user_id=user_id,
+                    api_key_id=api_key_id,
+                    queued_at=queued_at,
+                    compress_threshold=settings.EVENT_ENVELOPE_COMPRESS_THRESHOLD
+                )
+                process_event_batch_task.apply_async(args=[envelope], serializer='msgpack', **routing)
+            else:
+                if api_key_id:
+                    # the worker's batch_owner reads it to requeue onto this partition
+                    events = [{**event, 'api_key_id': api_key_id} for event in events]
+                if routing:
+                    process_event_batch_task.apply_async(args=[events], **routing)
+                else:
+                    process_event_batch_task.delay(events)
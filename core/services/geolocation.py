@@ -0,0 +1,266 @@
+"""
+Offline reverse geocoding for grid-intensity lookups.
+
+build_geo_index rasterizes a boundary dataset (GeoJSON polygons with ISO
+3166 country or subdivision codes, e.g. Natural Earth admin-0 / admin-1)
+into a two-level grid stored at GEO_INDEX_PATH:
+
+    header   '<4sHHHHI' magic, version, cell degrees, subcells per side,
+             code count, block count
+    codes    code count * 8 bytes, ASCII, NUL padded; code 0 is "nowhere"
+    cells    (180 / cell) * (360 / cell) uint32, one per coarse cell: the
+             code of a cell that lies in one region, or BLOCK_FLAG | block
+             index for a cell that straddles a border
+    blocks   block count * subcells**2 uint16 codes at cell / subcells
+             degrees, row-major from the south-west corner
+
+Open ocean and the interior of countries cost four bytes per coarse cell;
+only border cells carry a fine block. The file is mmapped read-only, so
+every worker process on a host shares one copy in the page cache. Arrays
+are stored in native (little-endian) byte order.
+
+Lookups are memoized on coordinates quantized to QUANTUM degrees (~1 km),
+well inside the fine cell size, so visitors of one town share a cache entry.
+"""
+import math
+import mmap
+import struct
+import logging
+import threading
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CCGI'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHHI')
+CODE_WIDTH = 8
+BLOCK_FLAG = 0x80000000
+
+# cache key resolution in degrees; 0.01 degrees is ~1.1 km of latitude
+QUANTUM = 0.01
+
+Point = Tuple[float, float]
+
+
+class GeoIndex:
+    def __init__(self, buffer, cache_size: int = 65536):
+        magic, version, cell_degrees, subcells, code_count, block_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} geo index")
+
+        self.cell_degrees = cell_degrees
+        self.subcells = subcells
+        self.rows = 180 // cell_degrees
+        self.cols = 360 // cell_degrees
+        self._fine_per_degree = subcells / cell_degrees
+        self._fine_rows = self.rows * subcells
+        self._fine_cols = self.cols * subcells
+
+        offset = HEADER.size
+        self.codes = [
+            bytes(buffer[offset + i * CODE_WIDTH:offset + (i + 1) * CODE_WIDTH]).rstrip(b'\0').decode('ascii') or None
+            for i in range(code_count)
+        ]
+        offset += code_count * CODE_WIDTH
+
+        view = memoryview(buffer)
+        cells_size = self.rows * self.cols * 4
+        self._cells = view[offset:offset + cells_size].cast('I')
+        offset += cells_size
+        self._blocks = view[offset:offset + block_count * subcells * subcells * 2].cast('H')
+
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup_quantized)
+
+    @classmethod
+    def open(cls, path: str, cache_size: int = 65536) -> 'GeoIndex':
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, cache_size)
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[str]:
+        """The region code at a point, without the cache"""
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+
+        fine_row = min(int((latitude + 90) * self._fine_per_degree), self._fine_rows - 1)
+        # +180 and -180 are the same meridian
+        fine_col = int((longitude + 180) * self._fine_per_degree) % self._fine_cols
+        row, sub_row = divmod(fine_row, self.subcells)
+        col, sub_col = divmod(fine_col, self.subcells)
+
+        entry = self._cells[row * self.cols + col]
+        if entry & BLOCK_FLAG:
+            block = entry & ~BLOCK_FLAG
+            entry = self._blocks[(block * self.subcells + sub_row) * self.subcells + sub_col]
+        return self.codes[entry]
+
+    def resolve(self, latitude: float, longitude: float) -> Optional[str]:
+        return self._cached_lookup(round(latitude / QUANTUM), round(longitude / QUANTUM))
+
+    def resolve_many(self, points: Iterable[Point]) -> List[Optional[str]]:
+        cached_lookup = self._cached_lookup
+        return [cached_lookup(round(lat / QUANTUM), round(lon / QUANTUM)) for lat, lon in points]
+
+    def _lookup_quantized(self, latitude_steps: int, longitude_steps: int) -> Optional[str]:
+        return self.lookup(latitude_steps * QUANTUM, longitude_steps * QUANTUM)
+
+
+def build_index(regions: Iterable[Tuple[str, List[List[List[Point]]]]], cell_degrees: int = 1, subcells: int = 20) -> bytes:
+    """
+    Rasterize (code, polygons) pairs into index bytes. Each polygon is a list
+    of rings of (longitude, latitude) points, holes included; a fine cell
+    belongs to a polygon when its centre is inside by the even-odd rule.
+    Later regions win where boundaries overlap.
+    """
+    if cell_degrees < 1 or 180 % cell_degrees:
+        raise ValueError("cell_degrees must divide 180")
+    if not 1 <= subcells <= 256:
+        raise ValueError("subcells must be between 1 and 256")
+
+    rows, cols = 180 // cell_degrees, 360 // cell_degrees
+    fine_rows, fine_cols = rows * subcells, cols * subcells
+    step = cell_degrees / subcells
+
+    codes = ['']
+    code_index = {}
+    grid = array('H', bytes(2 * fine_rows * fine_cols))
+
+    for code, polygons in regions:
+        if code not in code_index:
+            if len(codes) > 0xffff:
+                raise ValueError("Too many region codes")
+            code_index[code] = len(codes)
+            codes.append(code)
+        value = code_index[code]
+        for rings in polygons:
+            for fine_row, crossings in _scanline_crossings(rings, step, fine_rows).items():
+                crossings.sort()
+                base = fine_row * fine_cols
+                for west, east in zip(crossings[::2], crossings[1::2]):
+                    first = max(math.ceil((west + 180) / step - 0.5), 0)
+                    last = min(math.floor((east + 180) / step - 0.5), fine_cols - 1)
+                    if last >= first:
+                        grid[base + first:base + last + 1] = array('H', [value]) * (last - first + 1)
+
+    cells = array('I', bytes(4 * rows * cols))
+    blocks = array('H')
+    block_count = 0
+    for row in range(rows):
+        for col in range(cols):
+            block = array('H')
+            for sub_row in range(subcells):
+                start = (row * subcells + sub_row) * fine_cols + col * subcells
+                block.extend(grid[start:start + subcells])
+            if block.count(block[0]) == len(block):
+                cells[row * cols + col] = block[0]
+            else:
+                cells[row * cols + col] = BLOCK_FLAG | block_count
+                blocks.extend(block)
+                block_count += 1
+
+    header = HEADER.pack(MAGIC, VERSION, cell_degrees, subcells, len(codes), block_count)
+    code_table = b''.join(code.encode('ascii')[:CODE_WIDTH].ljust(CODE_WIDTH, b'\0') for code in codes)
+    return header + code_table + cells.tobytes() + blocks.tobytes()
+
+
+def _scanline_crossings(rings: List[List[Point]], step: float, fine_rows: int) -> Dict[int, List[float]]:
+    """Longitudes where the polygon's edges cross each fine row's centre latitude"""
+    crossings = defaultdict(list)
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if y1 == y2:
+                continue
+            low, high = min(y1, y2), max(y1, y2)
+            # rows whose centre latitude c satisfies low <= c < high
+            first = max(math.ceil((low + 90) / step - 0.5), 0)
+            last = min(math.ceil((high + 90) / step - 0.5) - 1, fine_rows - 1)
+            slope = (x2 - x1) / (y2 - y1)
+            for fine_row in range(first, last + 1):
+                center = (fine_row + 0.5) * step - 90
+                crossings[fine_row].append(x1 + (center - y1) * slope)
+    return crossings
+
+
+def geojson_regions(collection: Dict[str, Any], code_properties: List[str]) -> Iterable[Tuple[str, List[List[List[Point]]]]]:
+    """(code, polygons) from a GeoJSON FeatureCollection, using the first usable code property"""
+    for feature in collection.get('features', []):
+        properties = feature.get('properties') or {}
+        code = next(
+            (properties[name].upper() for name in code_properties if _usable_code(properties.get(name))),
+            None
+        )
+        geometry = feature.get('geometry') or {}
+        if code is None or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        yield code, [[[(point[0], point[1]) for point in ring] for ring in polygon] for polygon in polygons]
+
+
+def _usable_code(value: Any) -> bool:
+    # Natural Earth marks missing ISO codes as '-99'
+    return isinstance(value, str) and 2 <= len(value) <= CODE_WIDTH and value[:2].isalpha()
+
+
+def payload_point(payload: Dict[str, Any]) -> Optional[Point]:
+    """
+    Coordinates from the SDK's latitude/longitude fields or its geolocation
+    object; None for anything that is not a point on the globe (NaN, inf or
+    out of range), which GeoIndex.resolve cannot even quantize
+    """
+    latitude, longitude = payload.get('latitude'), payload.get('longitude')
+    if latitude is None or longitude is None:
+        geolocation = payload.get('geolocation') or {}
+        latitude = geolocation.get('latitude', geolocation.get('lat'))
+        longitude = geolocation.get('longitude', geolocation.get('lng', geolocation.get('lon')))
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    # NaN fails both comparisons
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def payload_regions(payloads: List[Dict[str, Any]], default: str) -> List[str]:
+    """Region code per payload, in one batched lookup; default where unknown"""
+    regions = [default] * len(payloads)
+    index = get_geo_index()
+    if index is None:
+        return regions
+
+    located = [(position, payload_point(payload)) for position, payload in enumerate(payloads)]
+    located = [(position, point) for position, point in located if point is not None]
+    for (position, _), region in zip(located, index.resolve_many(point for _, point in located)):
+        if region:
+            regions[position] = region
+    return regions
+
+
+_index: Optional[GeoIndex] = None
+_index_path: Optional[str] = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index() -> Optional[GeoIndex]:
+    """The index at GEO_INDEX_PATH, opened once per process; None without one"""
+    global _index, _index_path
+    path = settings.GEO_INDEX_PATH
+    if path == _index_path:
+        return _index
+
+    with _index_lock:
+        if path != _index_path:
+            index = None
+            if path:
+                try:
+                    index = GeoIndex.open(path, settings.GEO_CACHE_SIZE)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Geo index {path} unavailable, using default regions: {e}")
+            _index, _index_path = index, path
+    return _index
@@ -0,0 +1,55 @@
+"""
+Per API key counters for the current UTC day, kept in the shared cache.
+
+The collector's filters (edge dedupe, bot filtering) count what they saw and
+what they removed per key, and the key list reports today's totals. Counters
+live under '<prefix>:<api key id>:<YYYYMMDD>:<counter>' and expire after two
+days, so yesterday's values stay readable until midnight has long passed.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TTL = 2 * 24 * 3600
+
+
+class DailyKeyCounters:
+    def __init__(self, prefix: str, counters: tuple):
+        self.prefix = prefix
+        self.counters = counters
+
+    def record(self, api_key_id: str, **amounts: int):
+        """Add to today's counters of a key; zero amounts cost no round trip"""
+        try:
+            for counter, amount in amounts.items():
+                if amount:
+                    _incr(self.key(api_key_id, counter), amount)
+        except Exception as e:
+            logger.warning(f"Could not record {self.prefix} counters for {api_key_id}: {e}")
+
+    def today(self, api_key_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """Today's value of every counter per key, in one cache round trip"""
+        keys = {
+            api_key_id: {counter: self.key(api_key_id, counter) for counter in self.counters}
+            for api_key_id in api_key_ids
+        }
+        values = cache.get_many([key for per_key in keys.values() for key in per_key.values()])
+        return {
+            api_key_id: {counter: values.get(key, 0) for counter, key in per_key.items()}
+            for api_key_id, per_key in keys.items()
+        }
+
+    def key(self, api_key_id: str, counter: str, day: Optional[str] = None) -> str:
+        day = day or datetime.now(dt_timezone.utc).strftime('%Y%m%d')
+        return f"{self.prefix}:{api_key_id}:{day}:{counter}"
+
+
+def _incr(key: str, amount: int):
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, TTL):
+            cache.incr(key, amount)
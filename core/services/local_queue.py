@@ -0,0 +1,85 @@
+from typing import Dict
+import logging
+from collections import Counter
+from django.conf import settings
+from core.db.events import EventOutboxData
+from core.services.outbox_relay import to_queued_event
+from core.services.tenant_scheduling import DeficitRoundRobin
+
+logger = logging.getLogger(__name__)
+
+
+class LocalQueueWorker:
+    """
+    Batch consumer for EVENT_QUEUE_BACKEND = 'postgres'. Leases up to batch_size
+    rows of event_outbox with SKIP LOCKED, processes them in this process and
+    acks the whole lease with one DELETE. A consumer that dies mid-batch leaves
+    its rows to reappear after the visibility timeout; redelivered events are
+    skipped by the processed_events check.
+    
+    Leases are shared across users by weighted deficit round robin, so one
+    user's backfill cannot crowd out everyone else, and a user holding
+    EVENT_TENANT_MAX_IN_FLIGHT unexpired leases gets nothing more until one is acked.
+    Each lease starts after the last user the previous one served, so with
+    more pending users than one lease can serve they are reached in turn,
+    about batch_size / EVENT_QUEUE_TENANT_QUANTUM users per lease.
+    """
+
+    def __init__(self, batch_size: int = None, visibility_timeout: int = None, max_attempts: int = None):
+        self.outbox = EventOutboxData()
+        self.batch_size = batch_size or settings.EVENT_QUEUE_BATCH_SIZE
+        self.visibility_timeout = visibility_timeout or settings.EVENT_QUEUE_VISIBILITY_TIMEOUT
+        self.max_attempts = max_attempts or settings.EVENT_QUEUE_MAX_ATTEMPTS
+        self.max_in_flight = settings.EVENT_TENANT_MAX_IN_FLIGHT
+        self.scheduler = DeficitRoundRobin(settings.EVENT_QUEUE_TENANT_QUANTUM, settings.EVENT_TENANT_WEIGHTS)
+        self._last_tenant = None
+
+    def run_once(self) -> Dict[str, int]:
+        from core.tasks import process_events, _log_failed_event
+
+        tenants = self.outbox.pending_tenants(self.batch_size, after=self._last_tenant)
+        if not tenants:
+            return {'leased': 0, 'processed': 0, 'skipped': 0, 'failed': 0}
+        
+        caps = {}
+        if self.max_in_flight > 0:
+            caps = {
+                tenant: 0
+                for tenant, leases in self.outbox.leases_by_tenant().items()
+                if leases >= self.max_in_flight
+            }
+        grants = self.scheduler.allocate(tenants, self.batch_size, caps)
+        # resume after the last user served; users past it keep their turn and
+        # credit for the next lease. A page of capped users is skipped whole.
+        served = [tenant for tenant in tenants if grants.get(tenant)]
+        self._last_tenant = served[-1] if served else tenants[-1]
+        
+        lease_id, rows = self.outbox.lease(self.batch_size, self.visibility_timeout, grants=grants)
+        self.scheduler.settle(grants, Counter(row.user_id for row in rows))
+        if not rows:
+            return {'leased': 0, 'processed': 0, 'skipped': 0, 'failed': 0}
+
+        events = []
+        failed = 0
+        for row in rows:
+            event = to_queued_event(row)
+            if row.attempts > self.max_attempts:
+                # delivered and never acked this many times; stop retrying it here
+                _log_failed_event(event, f"Abandoned by the local queue after {row.attempts - 1} deliveries")
+                failed += 1
+            else:
+                events.append(event)
+
+        try:
+            result = process_events(events) if events else {'processed': 0, 'skipped': 0, 'failed': 0}
+        except Exception as e:
+            logger.error(f"Local queue batch {lease_id} failed, leaving it for redelivery: {e}", exc_info=True)
+            return {'leased': len(rows), 'processed': 0, 'skipped': 0, 'failed': failed}
+
+        self.outbox.ack(lease_id)
+        return {
+            'leased': len(rows),
+            'processed': result['processed'],
+            'skipped': result['skipped'],
+            'failed': result['failed'] + failed,
+        }
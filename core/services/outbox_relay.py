@@ -0,0 +1,96 @@
+from typing import Dict, List, Tuple
+from datetime import timedelta
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.db.events import EventOutboxData
+from core.models.event import OutboxEvent
+from core.services.event_queue import EventQueueService
+
+logger = logging.getLogger(__name__)
+
+
+def to_queued_event(row: OutboxEvent) -> dict:
+    """Rebuild the event dict EventQueueService queued"""
+    return {
+        'event_type': row.event_type,
+        'payload': row.payload,
+        'user_id': row.user_id,
+        'api_key': row.api_key,
+        'industry_category': row.industry_category,
+        'product': row.product,
+        'queued_at': row.created_at,
+    }
+
+
+class OutboxRelay:
+    """Moves events from the event_outbox table to the broker in large batches"""
+
+    def __init__(self, publish_batch_size: int = None, max_backoff_seconds: int = None):
+        self.outbox = EventOutboxData()
+        self.queue_service = EventQueueService()
+        self.publish_batch_size = publish_batch_size or settings.EVENT_OUTBOX_PUBLISH_BATCH
+        self.max_backoff_seconds = max_backoff_seconds or settings.EVENT_OUTBOX_MAX_BACKOFF
+
+    def relay_once(self, limit: int = None) -> Dict[str, int]:
+        """
+        Publish up to `limit` of the oldest rows. Rows are locked with SKIP LOCKED,
+        so several relays can run side by side, and deleted in the same transaction
+        once the broker has them; a crash in between republishes them, which the
+        worker's processed_events check absorbs.
+        """
+        limit = limit or settings.EVENT_OUTBOX_RELAY_BATCH
+        published = 0
+        deferred = 0
+
+        with transaction.atomic():
+            rows = self.outbox.claim(limit)
+            failed_streams = set()
+
+            for stream, chunk in self._chunks(rows):
+                # a failed publish holds back the rest of its stream so
+                # sessions keep their order
+                if stream in failed_streams:
+                    self._defer(chunk, "Earlier batch of the stream failed")
+                    deferred += len(chunk)
+                    continue
+
+                try:
+                    self._publish(chunk)
+                except Exception as e:
+                    logger.warning(f"Outbox publish failed for {len(chunk)} events: {e}")
+                    failed_streams.add(stream)
+                    self._defer(chunk, str(e))
+                    deferred += len(chunk)
+                    continue
+
+                self.outbox.delete([row.id for row in chunk])
+                published += len(chunk)
+
+        if rows:
+            logger.info(f"Outbox relay published {published} events, deferred {deferred}")
+
+        return {'claimed': len(rows), 'published': published, 'deferred': deferred}
+
+    def _chunks(self, rows: List[OutboxEvent]) -> List[Tuple[Tuple[str, str], List[OutboxEvent]]]:
+        """Group rows by (user, key) in id order and split into publish-sized batches"""
+        streams: Dict[Tuple[str, str], List[OutboxEvent]] = {}
+        for row in rows:
+            streams.setdefault((row.user_id, row.api_key_id), []).append(row)
+
+        return [
+            (stream, stream_rows[start:start + self.publish_batch_size])
+            for stream, stream_rows in streams.items()
+            for start in range(0, len(stream_rows), self.publish_batch_size)
+        ]
+
+    def _publish(self, chunk: List[OutboxEvent]):
+        first = chunk[0]
+        events = [to_queued_event(row) for row in chunk]
+        self.queue_service.publish_to_broker(events, first.user_id, first.api_key_id or None, first.created_at)
+
+    def _defer(self, chunk: List[OutboxEvent], error: str):
+        attempts = max(row.attempts for row in chunk) + 1
+        backoff = min(2 ** attempts, self.max_backoff_seconds)
+        self.outbox.defer([row.id for row in chunk], timezone.now() + timedelta(seconds=backoff), error)
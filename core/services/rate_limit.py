@@ -0,0 +1,151 @@
+"""
+Sliding-window rate limits for the public endpoints.
+
+Counters live in the RATE_LIMIT_CACHE cache, so with Redis behind it every web
+worker sees the same counts. Each limit keeps one counter per fixed window and
+estimates the sliding window as
+
+    previous_window * (1 - elapsed / window) + current_window
+
+which smooths out the double burst a fixed window allows at its edges for the
+price of two cache round trips.
+"""
+import math
+import time
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from apps.common.response import ORJSONResponse
+from core.metrics.http import RATE_LIMITED_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int = 0
+    remaining: int = 0
+    retry_after: int = 0
+
+
+ALLOWED = RateLimitResult(allowed=True)
+
+
+class SlidingWindowLimiter:
+    KEY_PREFIX = 'ratelimit'
+
+    def __init__(self, scope: str, limit: int, window: int = None):
+        self.scope = scope
+        self.limit = limit
+        self.window = window or settings.RATE_LIMIT_WINDOW
+
+    def hit(self, ident: str, cost: int = 1) -> RateLimitResult:
+        """Count `cost` units against `ident`; refused hits are not counted"""
+        if self.limit <= 0:
+            return ALLOWED
+
+        cache = caches[settings.RATE_LIMIT_CACHE]
+        index, elapsed = divmod(time.time(), self.window)
+        current_key = self._key(ident, int(index))
+        previous_key = self._key(ident, int(index) - 1)
+
+        # count first so concurrent requests cannot all slip under the limit
+        cache.add(current_key, 0, self.window * 2)
+        try:
+            current = cache.incr(current_key, cost)
+        except ValueError:
+            # expired between add and incr
+            cache.add(current_key, cost, self.window * 2)
+            current = cost
+        previous = cache.get(previous_key, 0)
+
+        estimate = previous * (1 - elapsed / self.window) + current
+        if estimate <= self.limit:
+            return RateLimitResult(True, self.limit, int(self.limit - estimate))
+
+        try:
+            cache.decr(current_key, cost)
+        except ValueError:
+            pass
+        return RateLimitResult(
+            False,
+            self.limit,
+            0,
+            self._retry_after(previous, current - cost, elapsed, cost)
+        )
+
+    def _retry_after(self, previous: int, current: int, elapsed: float, cost: int) -> int:
+        """Seconds until a hit of `cost` would fit"""
+        room = self.limit - current - cost
+        if room >= 0 and previous > 0:
+            # once enough of the previous window has slid out
+            wait = self.window * (1 - room / previous) - elapsed
+        elif cost <= self.limit:
+            # not before the next window, where this window's count decays instead
+            wait = self.window - elapsed
+            if current > 0:
+                wait += self.window * max(0.0, 1 - (self.limit - cost) / current)
+        else:
+            wait = self.window
+        return max(1, math.ceil(wait))
+
+    def _key(self, ident: str, index: int) -> str:
+        return f"{self.KEY_PREFIX}:{self.scope}:{ident}:{index}"
+
+
+def client_ip(request) -> str:
+    """Client address, trusting RATE_LIMIT_NUM_PROXIES entries of X-Forwarded-For"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    num_proxies = settings.RATE_LIMIT_NUM_PROXIES or 0
+    if forwarded and num_proxies > 0:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_ip(request) -> RateLimitResult:
+    # without a proxy count the address may be the load balancer's, shared by every client
+    if not settings.RATE_LIMIT_ENABLED or settings.RATE_LIMIT_NUM_PROXIES is None:
+        return ALLOWED
+    result = SlidingWindowLimiter('ip', settings.RATE_LIMIT_IP_REQUESTS).hit(client_ip(request))
+    _record(request, 'ip', result)
+    return result
+
+
+def check_api_key(request, api_key_obj, cost: int = 1) -> RateLimitResult:
+    """Charge `cost` events to the key's plan quota"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return ALLOWED
+    plans = settings.RATE_LIMIT_PLANS
+    limit = plans.get(api_key_obj.plan, plans.get('free', 0))
+    result = SlidingWindowLimiter('api_key', limit).hit(str(api_key_obj.id), max(cost, 1))
+    _record(request, 'api_key', result)
+    return result
+
+
+def too_many_requests(result: RateLimitResult, message: Optional[str] = None) -> ORJSONResponse:
+    response = ORJSONResponse(
+        {
+            'error': 'Rate limit exceeded',
+            'message': message or f"Retry in {result.retry_after} seconds",
+            'retry_after': result.retry_after,
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(result.retry_after)
+    response['X-RateLimit-Limit'] = str(result.limit)
+    response['X-RateLimit-Remaining'] = '0'
+    return response
+
+
+def _record(request, scope: str, result: RateLimitResult):
+    if result.allowed:
+        return
+    match = getattr(request, 'resolver_match', None)
+    view = (match.view_name or match.route) if match else 'unnamed'
+    RATE_LIMITED_TOTAL.labels(view, scope).inc()
+    logger.info(f"Rate limited {scope} on {view}, retry after {result.retry_after}s")
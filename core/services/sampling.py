@@ -0,0 +1,65 @@
+"""
+Session sampling for very high-traffic keys.
+
+A key with sampling_rate < 1 keeps a deterministic fraction of its sessions:
+a session is in the sample when the 32-bit FNV-1a hash of its session_id is
+below rate * 2**32. The keys/config snapshot advertises the rate and the hash,
+so the SDK can stop sending out-of-sample sessions; the collector applies the
+same rule to whatever still arrives and stamps the rate on every kept payload.
+
+Because whole sessions are kept or dropped, every event of a kept session is
+processed and the worker scales its emissions by 1 / rate (see
+BaseEventProcessor._scale_for_sampling).
+"""
+from typing import Any, Dict, List
+
+HASH_ALGORITHM = 'fnv1a32'
+HASH_SPACE = 2 ** 32
+
+_FNV_OFFSET = 0x811c9dc5
+_FNV_PRIME = 0x01000193
+
+
+def session_bucket(session_id: str) -> int:
+    """FNV-1a over the UTF-8 session_id; simple enough to reproduce in the SDK"""
+    value = _FNV_OFFSET
+    for byte in session_id.encode('utf-8'):
+        value = ((value ^ byte) * _FNV_PRIME) & 0xffffffff
+    return value
+
+
+def sampling_threshold(rate: float) -> int:
+    return int(min(max(rate, 0.0), 1.0) * HASH_SPACE)
+
+
+def keeps_session(session_id: str, rate: float) -> bool:
+    if rate >= 1:
+        return True
+    return session_bucket(session_id or '') < sampling_threshold(rate)
+
+
+def sampling_config(rate: float) -> Dict[str, Any]:
+    """The tracker config block: keep a session when hash(key) < threshold"""
+    return {
+        'rate': rate,
+        'hash': HASH_ALGORITHM,
+        'key': 'session_id',
+        'threshold': sampling_threshold(rate),
+    }
+
+
+def sample_events(events: List[Dict[str, Any]], rate: float) -> List[Dict[str, Any]]:
+    """Keep the events of in-sample sessions and stamp the rate the worker scales by"""
+    if rate >= 1:
+        # the rate is ours to set, not the client's
+        for event in events:
+            event['payload'].pop('sampling_rate', None)
+        return events
+
+    kept = []
+    for event in events:
+        payload = event['payload']
+        if keeps_session(payload.get('session_id'), rate):
+            payload['sampling_rate'] = rate
+            kept.append(event)
+    return kept
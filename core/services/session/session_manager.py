@@ -3,10 +3,12 @@ from datetime import datetime
 from typing import Optional
 from ...models.session import Session, SessionEvent
 from ...rules.session_rules import SessionRules
+from ...db.sessions import SessionData
 
 class SessionManager:
     def __init__(self):
         self.rules = SessionRules()
+        self.session_data = SessionData()
     
     def start_session(
         self, 
@@ -85,4 +87,10 @@ class SessionManager:
         return self.rules.calculate_session_emissions(
             duration_seconds=session.duration_seconds(),
             event_count=session.event_count()
-        )
\ No newline at end of file
+        )
+    
+    def process_active_sessions(self) -> dict:
+        return {'processed': self.session_data.mark_active_processed()}
+    
+    def mark_inactive_sessions(self) -> dict:
+        return {'marked': self.session_data.mark_inactive(self.rules.TIMEOUT_SECONDS)}
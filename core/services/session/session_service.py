@@ -1,28 +1,51 @@
-from typing import Dict, Any
+from typing import Any, Dict, List, Tuple
 from django.utils import timezone
 from django.db.models import F
 from django.db import transaction
 import logging
+from domain.internet.devices import detect_device_type
 
 logger = logging.getLogger(__name__)
 
 
 class SessionService:
+    def __init__(self):
+        # the worker builds one service per batch; resolve each key once per batch
+        self._api_key_instances = {}
+    
     def update_or_create(self, payload: dict, api_key_obj, emissions_kg: float):
+        sessions = self.update_many([(payload, api_key_obj, emissions_kg)])
+        return sessions[0] if sessions else None
+    
+    def update_many(self, entries: List[Tuple[dict, Any, float]]) -> list:
+        """
+        update_or_create for (payload, api_key_obj, emissions_kg) entries: the
+        events of one session are folded into one locked read and one write
+        """
+        by_session = {}
+        for payload, api_key_obj, emissions_kg in entries:
+            session_id = payload.get('session_id')
+            if session_id:
+                by_session.setdefault((api_key_obj.key, session_id), []).append((payload, api_key_obj, emissions_kg))
+        
+        sessions = []
+        for (_, session_id), session_entries in by_session.items():
+            session = self._record(session_id, session_entries)
+            if session is not None:
+                sessions.append(session)
+        return sessions
+    
+    def _record(self, session_id: str, entries: List[Tuple[dict, Any, float]]):
         from apps.event.models import Session
         from apps.apikey.models import APIKey
         
-        session_id = payload.get('session_id')
-        if not session_id:
-            return None
-        
+        first_payload, api_key_obj, _ = entries[0]
         try:
-            api_key_instance = APIKey.objects.get(key=api_key_obj.key)
+            api_key_instance = self._get_api_key_instance(api_key_obj.key)
             
-            event_type = payload.get('event', 'page_view')
-            utm_params = payload.get('utm_params', {})
-            user_agent = payload.get('user_agent') or 'Unknown'
-            device_type = self._detect_device_type(user_agent)
+            utm_params = first_payload.get('utm_params', {})
+            user_agent = first_payload.get('user_agent') or 'Unknown'
+            device_type = detect_device_type(user_agent, first_payload.get('screen_resolution'))
             
             with transaction.atomic():
                 session, created = Session.objects.select_for_update().get_or_create(
@@ -44,8 +67,7 @@ class SessionService:
                         'emissions_breakdown': {}
                     }
                 )
-                
-                self._update_metrics(session, event_type, emissions_kg)
+                self._update_metrics(session, entries)
             
             logger.info(
                 f"Session {session_id} updated: "
@@ -61,40 +83,45 @@ class SessionService:
             logger.error(f"Failed to update session: {e}", exc_info=True)
             return None
     
-    def _detect_device_type(self, user_agent: str) -> str:
-        if not user_agent or user_agent == 'Unknown':
-            return 'desktop'
+    def _get_api_key_instance(self, key: str):
+        from apps.apikey.models import APIKey
         
-        ua_lower = user_agent.lower()
-        if 'mobile' in ua_lower or 'android' in ua_lower:
-            return 'mobile'
-        elif 'tablet' in ua_lower or 'ipad' in ua_lower:
-            return 'tablet'
-        return 'desktop'
+        instance = self._api_key_instances.get(key)
+        if instance is None:
+            instance = APIKey.objects.get(key=key)
+            self._api_key_instances[key] = instance
+        return instance
     
-    def _update_metrics(self, session, event_type: str, emissions_kg: float):
+    def _update_metrics(self, session, entries: List[Tuple[dict, Any, float]]):
+        """Apply entries to a session row locked by the caller, in one UPDATE"""
         from apps.event.models import Session
-        from django.db.models import F
-
+        
+        events_summary = session.events_summary or {}
+        emissions_breakdown = session.emissions_breakdown or {}
+        conversion_event = session.conversion_event
+        event_count = 0
+        emissions_g = 0.0
+        
+        for payload, _, emissions_kg in entries:
+            event_type = payload.get('event', 'page_view')
+            count = 1
+            if event_type == 'aggregate':
+                # counted as the events it stands for
+                event_type = payload.get('aggregate_event') or 'page_view'
+                count = payload.get('count') or 1
+            
+            event_count += count
+            emissions_g += emissions_kg * 1000
+            events_summary[event_type] = events_summary.get(event_type, 0) + count
+            emissions_breakdown[event_type] = emissions_breakdown.get(event_type, 0) + (emissions_kg * 1000)
+            if event_type == 'conversion' and not conversion_event:
+                conversion_event = timezone.now()
+        
         Session.objects.filter(id=session.id).update(
             last_event=timezone.now(),
-            event_count=F('event_count') + 1,
-            total_emissions_g=F('total_emissions_g') + (emissions_kg * 1000),
+            event_count=F('event_count') + event_count,
+            total_emissions_g=F('total_emissions_g') + emissions_g,
+            events_summary=events_summary,
+            emissions_breakdown=emissions_breakdown,
+            conversion_event=conversion_event,
         )
-        with transaction.atomic():
-            session = Session.objects.select_for_update().get(id=session.id)
-            
-            events_summary = session.events_summary or {}
-            events_summary[event_type] = events_summary.get(event_type, 0) + 1
-            session.events_summary = events_summary
-
-            if event_type == 'conversion' and not session.conversion_event:
-                session.conversion_event = timezone.now()
-            
-            emissions_breakdown = session.emissions_breakdown or {}
-            emissions_breakdown[event_type] = (
-                emissions_breakdown.get(event_type, 0) + (emissions_kg * 1000)
-            )
-            session.emissions_breakdown = emissions_breakdown
-            
-            session.save(update_fields=['events_summary', 'conversion_event', 'emissions_breakdown'])
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Keeping one tenant's backfill from starving everyone else.
+
+- Partitioning: with EVENT_QUEUE_PARTITIONS > 1 batches are routed to one of N
+  queues by a stable hash of the tenant, so a tenant's batches stay in one
+  partition. Run one single-concurrency worker per partition and a user's
+  balance updates never contend across workers.
+- In-flight limits: a tenant may have at most EVENT_TENANT_MAX_IN_FLIGHT
+  batches being processed at once; further batches are requeued behind
+  other tenants' work.
+- Deficit round robin: the local queue worker splits each lease across the
+  tenants with pending events in proportion to their weights.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+
+
+def partition_for(tenant: str, partitions: int) -> int:
+    if partitions <= 1:
+        return 0
+    # crc32 rather than hash(): it must agree across processes and restarts
+    return zlib.crc32(str(tenant).encode()) % partitions
+
+
+def tenant_of(user_id: str, api_key_id: Optional[str] = None) -> str:
+    if settings.EVENT_QUEUE_PARTITION_KEY == 'api_key' and api_key_id:
+        return str(api_key_id)
+    return user_id
+
+
+def batch_owner(events_data) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (user_id, api_key_id) of a queued batch, envelope or legacy list. Collector
+    batches belong to one API key; retry batches may mix users and are
+    attributed to their first event.
+    """
+    if isinstance(events_data, (bytes, bytearray)):
+        from core.services.event_envelope import decode_batch
+
+        header, _ = decode_batch(events_data)
+        return header.get('u'), header.get('k')
+    if not events_data:
+        return None, None
+    return events_data[0].get('user_id'), events_data[0].get('api_key_id')
+
+
+def partition_queue(user_id: str, api_key_id: Optional[str] = None) -> Optional[str]:
+    """Queue for a batch, or None for the default queue when partitioning is off"""
+    partitions = settings.EVENT_QUEUE_PARTITIONS
+    if partitions <= 1:
+        return None
+    tenant = tenant_of(user_id, api_key_id)
+    return f"{settings.EVENT_QUEUE_PARTITION_PREFIX}-{partition_for(tenant, partitions)}"
+
+
+def partition_queues() -> List[str]:
+    partitions = settings.EVENT_QUEUE_PARTITIONS
+    if partitions <= 1:
+        return []
+    return [f"{settings.EVENT_QUEUE_PARTITION_PREFIX}-{index}" for index in range(partitions)]
+
+
+class TenantInFlightLimiter:
+    """
+    Cross-worker count of batches in progress per tenant, kept in the cache.
+    The count expires `ttl` seconds after the tenant's last acquire, so a
+    killed worker cannot leak slots for long. Releases never take it below
+    zero: a release for a slot counted before an expiry would otherwise
+    hand the tenant an extra slot.
+    """
+
+    KEY_PREFIX = 'tenant_in_flight'
+
+    def __init__(self, limit: int = None, ttl: int = None):
+        self.limit = settings.EVENT_TENANT_MAX_IN_FLIGHT if limit is None else limit
+        self.ttl = ttl or settings.EVENT_TENANT_IN_FLIGHT_TTL
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def acquire(self, tenant: str) -> bool:
+        if not self.enabled:
+            return True
+
+        key = self._key(tenant)
+        cache.add(key, 0, self.ttl)
+        try:
+            in_flight = cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            cache.add(key, 1, self.ttl)
+            in_flight = 1
+        else:
+            # add only sets the expiry on a new key; keep a busy tenant's count alive
+            cache.touch(key, self.ttl)
+
+        if in_flight > self.limit:
+            self.release(tenant)
+            return False
+        return True
+
+    def release(self, tenant: str):
+        if not self.enabled:
+            return
+        key = self._key(tenant)
+        try:
+            in_flight = cache.decr(key)
+        except ValueError:
+            return
+        if in_flight < 0:
+            cache.incr(key, -in_flight)
+
+    def _key(self, tenant: str) -> str:
+        return f"{self.KEY_PREFIX}:{tenant}"
+
+
+class DeficitRoundRobin:
+    """
+    Weighted deficit round robin over tenants. Each round credits every tenant
+    quantum * weight rows and grants what its credit covers, until the lease is
+    full. Credit a tenant could not use carries over to the next lease, and is
+    dropped once its queue runs dry.
+
+    Tenants are served in the order given; the caller rotates that order (the
+    local queue starts each lease after the last tenant it served), so a full
+    lease does not always favour the same tenants.
+    """
+
+    def __init__(self, quantum: int, weights: Dict[str, float] = None):
+        self.quantum = max(quantum, 1)
+        self.weights = weights or {}
+        self.deficits: Dict[str, float] = {}
+
+    def allocate(self, tenants: List[str], capacity: int, caps: Dict[str, int] = None) -> Dict[str, int]:
+        """Split `capacity` rows across `tenants`; `caps` bounds what a tenant may get"""
+        caps = caps or {}
+        grants: Dict[str, int] = {}
+        remaining = capacity
+        while remaining > 0:
+            granted = 0
+            for tenant in tenants:
+                room = min(remaining, caps.get(tenant, capacity) - grants.get(tenant, 0))
+                if room <= 0:
+                    # capped tenants build up no credit while they wait
+                    continue
+                self.deficits[tenant] = self.deficits.get(tenant, 0) + self.quantum * self.weights.get(tenant, 1)
+                grant = min(int(self.deficits[tenant]), room)
+                if grant > 0:
+                    grants[tenant] = grants.get(tenant, 0) + grant
+                    self.deficits[tenant] -= grant
+                    remaining -= grant
+                    granted += grant
+                if not self.deficits[tenant]:
+                    # only leftover credit is worth remembering between leases
+                    del self.deficits[tenant]
+            if not granted:
+                break
+        return grants
+
+    def settle(self, grants: Dict[str, int], taken: Dict[str, int]):
+        """A tenant that got fewer rows than it was granted has run dry; drop its credit"""
+        for tenant, grant in grants.items():
+            if taken.get(tenant, 0) < grant:
+                self.deficits.pop(tenant, None)
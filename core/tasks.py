@@ -1,129 +1,442 @@
 from celery import shared_task
+import time
+import random
 import logging
-from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 import traceback
+from collections import Counter
+from django.conf import settings
 from django.db import transaction
-from django.db.models import F
+from django.utils import timezone
+from core.metrics.worker import (
+    BATCH_LATENCY,
+    BATCH_SIZE,
+    EVENT_LAG,
+    EVENTS_TOTAL,
+    FAILED_EVENTS_TOTAL,
+    STAGE_LATENCY,
+    TENANT_DEFERRED_TOTAL,
+)
 
 logger = logging.getLogger(__name__)
 
+CONVERSION_TRACKED_EVENT_TYPES = ('internet_web', 'internet_ads')
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def process_event_batch_task(self, events_data: List[Dict[str, Any]]):
+def process_event_batch_task(self, events_data):
+    """events_data is either a msgpack envelope (bytes) or the legacy list of event dicts"""
+    from core.services.tenant_scheduling import TenantInFlightLimiter, batch_owner, partition_queue, tenant_of
+    
+    limiter = TenantInFlightLimiter()
+    tenant = None
+    if limiter.enabled:
+        user_id, api_key_id = batch_owner(events_data)
+        tenant = tenant_of(user_id, api_key_id) if user_id else None
+        if tenant and not limiter.acquire(tenant):
+            # the tenant already has its share of batches running; go to the
+            # back of its queue instead of holding a worker slot
+            options = {'serializer': 'msgpack'} if isinstance(events_data, (bytes, bytearray)) else {}
+            queue = partition_queue(user_id, api_key_id)
+            if queue:
+                options['queue'] = queue
+            process_event_batch_task.apply_async(
+                args=[events_data],
+                countdown=settings.EVENT_TENANT_REQUEUE_DELAY,
+                **options
+            )
+            TENANT_DEFERRED_TOTAL.inc()
+            logger.info(f"Tenant {tenant} is at its in-flight limit, requeued batch")
+            return {'status': 'deferred', 'tenant': tenant}
+    
+    try:
+        return process_events(events_data)
+    except Exception as e:
+        logger.error(f"Batch processing error: {e}", exc_info=True)
+        # the retry is a new message; an envelope must not fall back to the
+        # default (JSON) serializer, which cannot carry bytes
+        options = {'serializer': 'msgpack'} if isinstance(events_data, (bytes, bytearray)) else {}
+        raise self.retry(exc=e, countdown=60, **options)
+    finally:
+        if tenant:
+            limiter.release(tenant)
+
+
+def process_events(events_data) -> Dict[str, Any]:
+    """Process one batch in this process; shared by the Celery task and the local queue worker"""
     from core.services.event_dispatcher import EventDispatcher
     from core.services.carbon_accounting import CarbonAccountingService
     from core.services.session.session_service import SessionService
-    from core.services.apikey_service import APIKeyService
+    from core.services.apikey_service import APIKeyService, ConversionRuleService
     from core.db.carbon import CarbonData
-    from core.db.events import ProcessedEventData
-    from decimal import Decimal
+    from core.db.events import ProcessedEventData, FailedEventData
+    from core.services.admission import report_worker_lag
     
-    try:
-        processed_event_data = ProcessedEventData()
-        carbon_service = CarbonAccountingService()
-        carbon_data = CarbonData()
-        session_service = SessionService()
-        apikey_service = APIKeyService()
-        dispatcher = EventDispatcher()
-        
-        logger.info(f"[CELERY] Processing {len(events_data)} events asynchronously")
-        
-        processed_count = 0
-        skipped_count = 0
-        failed_count = 0
-        
-        for event in events_data:
-            try:
-                with transaction.atomic():
-                    event_type = event['event_type']
-                    payload = event['payload']
-                    user_id = event['user_id']
-                    api_key = event.get('api_key')
-
-                    processor = dispatcher.get_processor(event_type)
-                    if not processor:
-                        logger.error(f"No processor for {event_type}")
-                        _log_failed_event(event, f"No processor found for {event_type}")
-                        failed_count += 1
-                        continue
-
-                    result = processor.process(payload)
-
-                    if processed_event_data.is_processed(
-                        result.reference_id,
-                        result.reference_type
-                    ):
-                        logger.info(f"Event already processed: {result.reference_id}")
-                        skipped_count += 1
-                        continue
-
-                    processed_event_data.mark_processed(
-                        reference_id=result.reference_id,
-                        reference_type=result.reference_type,
-                        user_id=user_id,
-                        event_type=event_type,
-                        kg_co2_emitted=result.kg_co2_emitted,
-                        metadata=result.metadata
-                    )
-
-                    balance = carbon_data.get_balance(user_id)
-                    
-                    emission_amount = result.kg_co2_emitted
-                    if not isinstance(emission_amount, Decimal):
-                        emission_amount = Decimal(str(emission_amount))
-                    
-                    transaction = carbon_service.record_emission(
-                        balance=balance,
-                        amount_kg=emission_amount,
-                        reference_id=result.reference_id,
-                        metadata=result.metadata
-                    )
-                    
-                    carbon_data.save_transaction(transaction)
-                    carbon_data.save_balance(balance)
-                    
-                    if api_key:
-                        api_key_obj = apikey_service.validate_api_key(api_key)
-                        if api_key_obj:
-                            session_service.update_or_create(payload, api_key_obj, float(emission_amount))
-
-                    processed_count += 1
-                    logger.info(f"[CELERY] Processed {event_type}: {emission_amount}kg CO2e for user {user_id}")
-
-            except Exception as e:
-                error_msg = str(e)
-                error_trace = traceback.format_exc()
-                logger.error(f"Failed to process event: {error_msg}", exc_info=True)
-                _log_failed_event(event, error_msg, error_trace)
+    processed_event_data = ProcessedEventData()
+    carbon_service = CarbonAccountingService()
+    carbon_data = CarbonData()
+    session_service = SessionService()
+    apikey_service = APIKeyService()
+    conversion_service = ConversionRuleService()
+    dispatcher = EventDispatcher()
+    conversion_counts = Counter()
+    resolved_failed_ids = []
+    
+    if isinstance(events_data, (bytes, bytearray)):
+        events_data = _expand_envelope(events_data, apikey_service)
+    
+    batch_started_at = time.perf_counter()
+    BATCH_SIZE.observe(len(events_data))
+    logger.debug(f"[CELERY] Processing {len(events_data)} events asynchronously")
+    
+    processed_count = 0
+    skipped_count = 0
+    failed_count = 0
+    batch_lag = None
+    
+    processors = {
+        event_type: dispatcher.get_processor(event_type)
+        for event_type in {event.get('event_type', 'unknown') for event in events_data}
+    }
+    batch_results = _process_batches(events_data, processors)
+    
+    ready = []
+    for index, event in enumerate(events_data):
+        event_type = event.get('event_type', 'unknown')
+        lag = _observe_lag(event_type, event.get('queued_at'))
+        if lag is not None and (batch_lag is None or lag > batch_lag):
+            batch_lag = lag
+        try:
+            processor = processors[event_type]
+            if not processor:
+                logger.error(f"No processor for {event_type}")
+                _log_failed_event(event, f"No processor found for {event_type}")
+                EVENTS_TOTAL.labels(event_type, 'failed').inc()
                 failed_count += 1
                 continue
 
-        logger.info(
-            f"[CELERY] Batch complete: {processed_count} processed, "
-            f"{skipped_count} skipped, {failed_count} failed"
-        )
+            result = batch_results.get(index)
+            if result is None:
+                with STAGE_LATENCY.labels(event_type, 'processor').time():
+                    result = processor.process(event['payload'])
+            ready.append((event, result))
 
-        return {
-            'status': 'completed',
-            'processed': processed_count,
-            'skipped': skipped_count,
-            'failed': failed_count
-        }
+        except Exception as e:
+            logger.error(f"Failed to process event: {e}", exc_info=True)
+            _log_failed_event(event, str(e), traceback.format_exc())
+            EVENTS_TOTAL.labels(event_type, 'failed').inc()
+            failed_count += 1
 
+    ledger = _Ledger(processed_event_data, carbon_service, carbon_data, session_service, apikey_service, conversion_service)
+    try:
+        outcomes = ledger.record_batch(ready)
     except Exception as e:
-        logger.error(f"Batch processing error: {e}", exc_info=True)
-        raise self.retry(exc=e, countdown=60)
+        logger.warning(f"Batch ledger write of {len(ready)} events failed, recording them one by one: {e}")
+        outcomes = [ledger.record_one_safely(event, result) for event, result in ready]
+
+    for (event, result), outcome in zip(ready, outcomes):
+        event_type = event.get('event_type', 'unknown')
+        EVENTS_TOTAL.labels(event_type, outcome).inc()
+        if outcome == 'failed':
+            failed_count += 1
+            continue
+        if outcome == 'skipped':
+            _log_sampled(f"Event already processed: {result.reference_id}")
+            skipped_count += 1
+        else:
+            processed_count += 1
+            _log_sampled(f"[CELERY] Processed {event_type}: {result.kg_co2_emitted}kg CO2e for user {event['user_id']}")
+            conversion_counts.update(result.metadata.get('matched_conversion_rules', []))
+        if event.get('failed_event_id'):
+            # retried failures count as resolved only once they went through
+            resolved_failed_ids.append(event['failed_event_id'])
+
+    if conversion_counts:
+        try:
+            conversion_service.record_conversions(dict(conversion_counts))
+        except Exception as e:
+            logger.error(f"Failed to flush conversion counters: {e}", exc_info=True)
+
+    if resolved_failed_ids:
+        FailedEventData().resolve(resolved_failed_ids)
+
+    BATCH_LATENCY.observe(time.perf_counter() - batch_started_at)
+    # the collector's admission control sheds load on this
+    report_worker_lag(batch_lag)
+    logger.info(
+        f"[CELERY] Batch complete: {processed_count} processed, "
+        f"{skipped_count} skipped, {failed_count} failed"
+    )
+
+    return {
+        'status': 'completed',
+        'processed': processed_count,
+        'skipped': skipped_count,
+        'failed': failed_count
+    }
+
+
+class _Ledger:
+    """
+    Ledger, balance and session writes for processed results. record_batch
+    writes a whole batch with a fixed number of statements per user and per
+    session; record_one is the per-event path the worker falls back to when
+    the batch write fails, so one bad event only fails itself.
+    """
+
+    def __init__(self, processed_event_data, carbon_service, carbon_data, session_service, apikey_service, conversion_service):
+        self.processed_event_data = processed_event_data
+        self.carbon_service = carbon_service
+        self.carbon_data = carbon_data
+        self.session_service = session_service
+        self.apikey_service = apikey_service
+        self.conversion_service = conversion_service
+        self._api_key_objs = {}
+
+    def record_batch(self, ready: List[tuple]) -> List[str]:
+        """
+        'processed' or 'skipped' per (event, result). The batch's balances are
+        locked before the processed check, so a concurrent worker holding the
+        same events waits for this transaction and then skips them.
+
+        The dedupe_batch, ledger_batch and session_batch stages are observed
+        once per batch, under its event type ('mixed' for retry batches that
+        span several). Session writes come after the commit: if they fail the
+        events stay recorded and only their sessions miss this batch.
+        """
+        from decimal import Decimal
+
+        if not ready:
+            return []
+
+        event_types = {event.get('event_type', 'unknown') for event, _ in ready}
+        batch_type = event_types.pop() if len(event_types) == 1 else 'mixed'
+        outcomes = []
+        recorded = []
+        with transaction.atomic():
+            started_at = time.perf_counter()
+            balances = self.carbon_data.lock_balances(event['user_id'] for event, _ in ready)
+            lock_seconds = time.perf_counter() - started_at
+            with STAGE_LATENCY.labels(batch_type, 'dedupe_batch').time():
+                seen = self.processed_event_data.processed_references(
+                    [(result.reference_id, result.reference_type) for _, result in ready]
+                )
+            for event, result in ready:
+                reference = (result.reference_id, result.reference_type)
+                if reference in seen:
+                    outcomes.append('skipped')
+                    continue
+                # a repeat later in the batch is skipped too
+                seen.add(reference)
+                self._match_conversions(event, result)
+                recorded.append((event, result))
+                outcomes.append('processed')
+
+            started_at = time.perf_counter()
+            self.processed_event_data.mark_processed_many([
+                {
+                    'reference_id': result.reference_id,
+                    'reference_type': result.reference_type,
+                    'user_id': event['user_id'],
+                    'event_type': event.get('event_type', 'unknown'),
+                    'kg_co2_emitted': result.kg_co2_emitted,
+                    'metadata': result.metadata,
+                }
+                for event, result in recorded
+            ])
+            transactions = []
+            for event, result in recorded:
+                amount = result.kg_co2_emitted
+                if not isinstance(amount, Decimal):
+                    amount = Decimal(str(amount))
+                transactions.append(self.carbon_service.record_emission(
+                    balance=balances[event['user_id']],
+                    amount_kg=amount,
+                    reference_id=result.reference_id,
+                    metadata=result.metadata
+                ))
+            self.carbon_data.save_transactions(transactions)
+            self.carbon_data.save_locked_balances(
+                balances[user_id] for user_id in {event['user_id'] for event, _ in recorded}
+            )
+        # the balance locks and the commit belong to the ledger write
+        STAGE_LATENCY.labels(batch_type, 'ledger_batch').observe(lock_seconds + time.perf_counter() - started_at)
+
+        sessions = []
+        for event, result in recorded:
+            api_key_obj = self._api_key_obj(event.get('api_key'))
+            if api_key_obj:
+                sessions.append((event['payload'], api_key_obj, float(result.kg_co2_emitted)))
+        if sessions:
+            try:
+                with STAGE_LATENCY.labels(batch_type, 'session_batch').time():
+                    self.session_service.update_many(sessions)
+            except Exception as e:
+                # the ledger is committed; recording the events again would skip them
+                logger.error(f"Session update for {len(sessions)} recorded events failed: {e}", exc_info=True)
+        return outcomes
+
+    def record_one_safely(self, event: Dict[str, Any], result) -> str:
+        try:
+            return self.record_one(event, result)
+        except Exception as e:
+            logger.error(f"Failed to process event: {e}", exc_info=True)
+            _log_failed_event(event, str(e), traceback.format_exc())
+            return 'failed'
+
+    def record_one(self, event: Dict[str, Any], result) -> str:
+        from decimal import Decimal
+
+        event_type = event.get('event_type', 'unknown')
+        with transaction.atomic():
+            with STAGE_LATENCY.labels(event_type, 'dedupe').time():
+                already_processed = self.processed_event_data.is_processed(
+                    result.reference_id,
+                    result.reference_type
+                )
+            if already_processed:
+                return 'skipped'
+
+            self._match_conversions(event, result)
+
+            with STAGE_LATENCY.labels(event_type, 'ledger').time():
+                self.processed_event_data.mark_processed(
+                    reference_id=result.reference_id,
+                    reference_type=result.reference_type,
+                    user_id=event['user_id'],
+                    event_type=event_type,
+                    kg_co2_emitted=result.kg_co2_emitted,
+                    metadata=result.metadata
+                )
+
+                balance = self.carbon_data.get_balance(event['user_id'])
+
+                emission_amount = result.kg_co2_emitted
+                if not isinstance(emission_amount, Decimal):
+                    emission_amount = Decimal(str(emission_amount))
+
+                carbon_transaction = self.carbon_service.record_emission(
+                    balance=balance,
+                    amount_kg=emission_amount,
+                    reference_id=result.reference_id,
+                    metadata=result.metadata
+                )
+
+                self.carbon_data.save_transaction(carbon_transaction)
+                self.carbon_data.save_balance(balance)
+
+            api_key_obj = self._api_key_obj(event.get('api_key'))
+            if api_key_obj:
+                with STAGE_LATENCY.labels(event_type, 'session').time():
+                    self.session_service.update_or_create(event['payload'], api_key_obj, float(emission_amount))
+        return 'processed'
+
+    def _match_conversions(self, event: Dict[str, Any], result):
+        payload = event['payload']
+        event_type = event.get('event_type', 'unknown')
+        if not event.get('api_key') or event_type not in CONVERSION_TRACKED_EVENT_TYPES or payload.get('event') != 'page_view':
+            return
+        with STAGE_LATENCY.labels(event_type, 'conversions').time():
+            matched_rule_ids = self.conversion_service.match_page_view(event['api_key'], payload.get('page_url', ''))
+        if matched_rule_ids:
+            result.metadata['matched_conversion_rules'] = matched_rule_ids
+
+    def _api_key_obj(self, api_key: Optional[str]):
+        if not api_key:
+            return None
+        if api_key not in self._api_key_objs:
+            self._api_key_objs[api_key] = self.apikey_service.validate_api_key(api_key)
+        return self._api_key_objs[api_key]
+
+
+def _process_batches(events_data: List[Dict[str, Any]], processors: Dict[str, Any]) -> Dict[int, Any]:
+    """
+    Results by event index from one process_batch call per event type. A type
+    whose batch call fails is left out, and its events go through process()
+    one at a time so a bad payload only fails itself.
+    """
+    indexes_by_type = {}
+    for index, event in enumerate(events_data):
+        indexes_by_type.setdefault(event.get('event_type', 'unknown'), []).append(index)
+    
+    results = {}
+    for event_type, indexes in indexes_by_type.items():
+        processor = processors.get(event_type)
+        if not processor:
+            continue
+        try:
+            with STAGE_LATENCY.labels(event_type, 'processor_batch').time():
+                batch = processor.process_batch([events_data[index]['payload'] for index in indexes])
+        except Exception as e:
+            logger.warning(f"Batch processing of {len(indexes)} {event_type} events failed, processing them one by one: {e}")
+            continue
+        results.update(zip(indexes, batch))
+    return results
+
+
+def _observe_lag(event_type: str, queued_at) -> Optional[float]:
+    if not queued_at:
+        return None
+    try:
+        if isinstance(queued_at, str):
+            queued_at = datetime.fromisoformat(queued_at)
+        if timezone.is_naive(queued_at):
+            queued_at = timezone.make_aware(queued_at)
+        lag = max((timezone.now() - queued_at).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+    EVENT_LAG.labels(event_type).observe(lag)
+    return lag
+
+
+def _log_sampled(message: str):
+    # one line per event floods the worker logs; keep a sample at DEBUG
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < settings.WORKER_EVENT_LOG_SAMPLE_RATE:
+        logger.debug(message)
+
+
+def _expand_envelope(data: bytes, apikey_service) -> List[Dict[str, Any]]:
+    from core.services.event_envelope import decode_batch
+    
+    header, events = decode_batch(data)
+    
+    # the envelope carries the key id only; resolve the key once for the batch
+    api_key_obj = apikey_service.get_api_key_by_id(header['k'], header['u']) if header.get('k') else None
+    api_key = api_key_obj.key if api_key_obj else None
+    if header.get('k') and not api_key_obj:
+        logger.warning(f"API key {header['k']} from envelope no longer exists")
+    
+    for event in events:
+        event['api_key'] = api_key
+    return events
 
 
 def _log_failed_event(event: Dict[str, Any], error_msg: str, error_trace: str = ""):
+    from core.db.events import FailedEventData
+    
+    FAILED_EVENTS_TOTAL.labels(event.get('event_type', 'unknown')).inc()
     try:
-        from apps.event.models import FailedEvent
+        failed_event_data = FailedEventData()
+        if event.get('failed_event_id'):
+            # a retry that failed again goes back on its own row
+            failed_event_data.reschedule(
+                event['failed_event_id'],
+                error_msg,
+                error_trace,
+                base_delay=settings.FAILED_EVENT_RETRY_BASE_DELAY,
+                max_delay=settings.FAILED_EVENT_RETRY_MAX_DELAY
+            )
+            return
         
-        FailedEvent.objects.create(
+        failed_event_data.record(
             event_type=event.get('event_type', 'unknown'),
             payload=event.get('payload', {}),
+            user_id=event.get('user_id', ''),
+            api_key=event.get('api_key', ''),
             error_message=error_msg,
             error_traceback=error_trace,
-            original_queue_message_id=event.get('message_id', ''),
+            message_id=event.get('message_id', ''),
+            retry_at=timezone.now() + timedelta(seconds=settings.FAILED_EVENT_RETRY_BASE_DELAY)
         )
     except Exception as log_error:
         logger.error(f"Failed to log failed event: {log_error}")
@@ -131,69 +444,49 @@ def _log_failed_event(event: Dict[str, Any], error_msg: str, error_trace: str =
 
 @shared_task
 def retry_failed_events():
-    from apps.event.models import FailedEvent
-    from django.utils import timezone
-    from datetime import timedelta
-    from django.db import models
+    """
+    Resubmit due failures in batches of FAILED_EVENT_RETRY_BATCH, one batch task
+    per claim. The batch task resolves what it processes and reschedules the rest
+    with exponential backoff, so nothing is marked resolved before it ran.
+    """
+    from core.db.events import FailedEventData
     
-    cutoff_time = timezone.now() - timedelta(minutes=5)
+    failed_event_data = FailedEventData()
+    abandoned = failed_event_data.abandon_exhausted()
+    submitted = 0
     
-    failed_events = FailedEvent.objects.filter(
-        status='pending',
-        retry_count__lt=models.F('max_retries'),
-        last_retry_at__lt=cutoff_time
-    ) | FailedEvent.objects.filter(
-        status='pending',
-        retry_count__lt=models.F('max_retries'),
-        last_retry_at__isnull=True
-    )
-    
-    for failed_event_id in failed_events[:10].values_list('id', flat=True):
-        try:
-            # locking to prevent re fetch 
-            with transaction.atomic():
-                failed_event = FailedEvent.objects.select_for_update(
-                    skip_locked=True  
-                ).filter(
-                    id=failed_event_id,
-                    status='pending'
-                ).first()
-                
-                if not failed_event:
-                    continue 
-                
-                failed_event.status = 'processing'
-                failed_event.retry_count = F('retry_count') + 1
-                failed_event.last_retry_at = timezone.now()
-                failed_event.save()
-            
-            event_data = {
+    for _ in range(settings.FAILED_EVENT_RETRY_MAX_BATCHES):
+        failed_events = failed_event_data.claim_due(
+            settings.FAILED_EVENT_RETRY_BATCH,
+            settings.FAILED_EVENT_PROCESSING_TIMEOUT
+        )
+        if not failed_events:
+            break
+        
+        process_event_batch_task.delay([
+            {
                 'event_type': failed_event.event_type,
                 'payload': failed_event.payload,
-                'user_id': failed_event.payload.get('user_id', ''),
+                'user_id': failed_event.user_id,
+                'api_key': failed_event.api_key or None,
+                'failed_event_id': failed_event.id,
             }
-            process_event_batch_task.delay([event_data])
-            
-            failed_event.status = 'resolved'
-            failed_event.resolved_at = timezone.now()
-            failed_event.save()
-            
-            logger.info(f"Retried failed event {failed_event.id}")
-            
-        except Exception as e:
-            failed_event.status = 'pending'
-            failed_event.save()
-            logger.error(f"Failed to retry event {failed_event.id}: {e}")
-            
-            if failed_event.retry_count >= failed_event.max_retries:
-                failed_event.status = 'abandoned'
-                failed_event.save()
+            for failed_event in failed_events
+        ])
+        submitted += len(failed_events)
+    
+    logger.info(f"Resubmitted {submitted} failed events, abandoned {abandoned}")
+    return {'submitted': submitted, 'abandoned': abandoned}
 
 
 @shared_task
 def process_dlq_messages():
     import boto3
-    from django.conf import settings
+    from core.services.dlq_drain import DLQDrainer
+    
+    if not settings.SQS_DLQ_URL:
+        logger.warning("SQS_DLQ_URL is not set; skipping DLQ drain")
+        return None
     
     sqs = boto3.client(
         'sqs',
@@ -203,31 +496,22 @@ def process_dlq_messages():
         region_name=settings.AWS_DEFAULT_REGION,
     )
     
-    # for now
-    dlq_url = f"{settings.AWS_ENDPOINT_URL}/000000000000/carbon-events-dlq"
-    
-    response = sqs.receive_message(
-        QueueUrl=dlq_url,
-        MaxNumberOfMessages=10,
-        WaitTimeSeconds=1
+    drainer = DLQDrainer(
+        sqs,
+        settings.SQS_DLQ_URL,
+        time_budget=settings.DLQ_DRAIN_TIME_BUDGET,
+        concurrency=settings.DLQ_DRAIN_CONCURRENCY
     )
-    messages = response.get('Messages', [])
-    for message in messages:
-        try:
-            import json
-            body = json.loads(message['Body'])       
-            _log_failed_event(
-                body,
-                "Message from DLQ",
-                f"Message ID: {message['MessageId']}"
-            )
-            sqs.delete_message(
-                QueueUrl=dlq_url,
-                ReceiptHandle=message['ReceiptHandle']
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to process DLQ message: {e}")
+    return drainer.drain()
+
+
+@shared_task
+def flush_api_key_usage_task(usage_counts: Dict[str, int]):
+    from core.db.apikeys import APIKeyData
+    
+    updated = APIKeyData().bulk_increment_usage(usage_counts)
+    logger.info(f"Flushed usage for {updated} API keys ({sum(usage_counts.values())} hits)")
+    return {'updated': updated}
 
 
 @shared_task
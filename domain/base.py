@@ -1,7 +1,9 @@
+import math
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from decimal import Decimal
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 class EventProcessingResult(BaseModel):
     kg_co2_emitted: Decimal
@@ -12,7 +14,18 @@ class EventProcessingResult(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+# two-sided 95% normal quantile for the sampling confidence interval
+Z_95 = 1.959964
+
+
 class BaseEventProcessor(ABC):
+    # whether process() scales sampled sessions back up (_scale_for_sampling);
+    # the collector only applies a key's sampling_rate to processors that do
+    SAMPLES_SESSIONS = False
+    # payload field that process() uses as the result's reference_id; the
+    # collector's edge dedupe keys on it
+    REFERENCE_FIELD = 'event_id'
+    
     @property
     @abstractmethod
     def event_type(self) -> str:
@@ -24,4 +37,97 @@ class BaseEventProcessor(ABC):
     
     @abstractmethod
     def process(self, payload: dict) -> EventProcessingResult:
-        pass
\ No newline at end of file
+        pass
+    
+    def process_batch(self, payloads: List[dict]) -> List[EventProcessingResult]:
+        """
+        Results for many payloads, in order. Processors override this to share
+        calculations and lookups across the batch. Any exception fails the
+        whole call; the worker then falls back to process() per payload so the
+        error lands on the event that caused it.
+        """
+        return [self.process(payload) for payload in payloads]
+    
+    def validate_batch(self, payloads: List[dict]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        """Validate many payloads; returns the valid ones and (index, error) for the rest"""
+        validated = []
+        errors = []
+        for index, payload in enumerate(payloads):
+            try:
+                validated.append(self.validate_payload(payload))
+            except Exception as e:
+                errors.append((index, str(e)))
+        return validated, errors
+    
+    def _validate_batch_with(
+        self,
+        adapter: TypeAdapter,
+        payloads: List[dict]
+    ) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        # unset optional fields are left out rather than dumped as ~50 nulls
+        # per event; consumers read them with .get()
+        try:
+            return adapter.dump_python(adapter.validate_python(payloads), exclude_none=True), []
+        except ValidationError as e:
+            invalid = {}
+            for error in e.errors():
+                index = error['loc'][0] if error['loc'] else None
+                if not isinstance(index, int):
+                    return BaseEventProcessor.validate_batch(self, payloads)
+                invalid.setdefault(index, error['msg'])
+        
+        valid_payloads = [p for index, p in enumerate(payloads) if index not in invalid]
+        validated = adapter.dump_python(adapter.validate_python(valid_payloads), exclude_none=True)
+        return validated, sorted(invalid.items())
+    
+    @staticmethod
+    def _build_result(kg_co2_emitted: Decimal, reference_id: str, reference_type: str, metadata: dict) -> EventProcessingResult:
+        # the processors build every field with the right type; skip validation
+        return EventProcessingResult.model_construct(
+            kg_co2_emitted=kg_co2_emitted,
+            reference_id=reference_id,
+            reference_type=reference_type,
+            metadata=metadata
+        )
+    
+    @staticmethod
+    def _as_datetime(value) -> datetime:
+        """Payloads that crossed the broker carry ISO strings instead of datetimes"""
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
+
+    
+    @staticmethod
+    def _scale_for_sampling(result: EventProcessingResult, payload: dict) -> EventProcessingResult:
+        """
+        Horvitz-Thompson scaling for events of a sampled session: every kept
+        event stands for 1 / rate events, so its emissions are weighted by that.
+        
+        The sampling unit is the session, so the estimator's variance is
+        (1 - rate) / rate**2 * sum(Y**2) over session totals Y, or
+        (1 - rate) * sum(T**2) over the scaled session totals T that end up in
+        sessions.total_emissions_g. A single event only knows its own y, and
+        sum(y**2) <= (sum y)**2 for non-negative y, so the per-event variance
+        and interval recorded here are lower bounds, not terms that add up.
+        """
+        rate = payload.get('sampling_rate')
+        if not rate or rate >= 1:
+            return result
+        
+        observed = result.kg_co2_emitted
+        weight = 1 / rate
+        estimate = float(observed) * weight
+        variance = (1 - rate) * weight * weight * float(observed) ** 2
+        margin = Z_95 * math.sqrt(variance)
+        
+        result.kg_co2_emitted = observed / Decimal(str(rate))
+        result.metadata['sampling'] = {
+            'rate': rate,
+            'weight': weight,
+            'observed_kg': float(observed),
+            # per event only: the session-level interval is at least this wide
+            'variance_min_kg2': variance,
+            'ci95_narrowest_kg': [max(estimate - margin, 0.0), estimate + margin],
+        }
+        return result
@@ -1,87 +1,42 @@
 from decimal import Decimal
-from typing import Dict, Any, Optional
-from pydantic import BaseModel, Field, validator
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from domain.base import BaseEventProcessor, EventProcessingResult
 from domain.registry import EventProcessorRegistry
+from domain.internet.schemas import AdsEventPayload, AdsEventBatch
+from domain.internet.devices import detect_device_type
+from core.services.geolocation import payload_regions
 from calculators import InternetAdsCalculator, Platform, AdFormat
-
-
-class AdsEventPayload(BaseModel):
-    event: str
-    session_id: str
-    tracker_token: str
-    event_id: str
-    user_id: str
-    page_url: str
-    referrer: str = ""
-    timestamp: datetime
-    utm_params: dict = Field(default_factory=dict)
-    
-    user_agent: Optional[str] = None
-    screen_resolution: Optional[str] = None
-    viewport_size: Optional[str] = None
-    language: Optional[str] = None
-    timezone: Optional[str] = None
-    page_title: Optional[str] = None
-    
-    bytesPerPageView: Optional[int] = None
-    bytesPerClick: Optional[int] = None
-    bytesPerConversion: Optional[int] = None
-    encodedSize: Optional[int] = None
-    decodedSize: Optional[int] = None
-    resourceType: Optional[str] = None
-    trackingRequestBytes: Optional[int] = None
-    trackingRequestBody: Optional[int] = None
-    resourceCount: Optional[int] = None
-    resource_types: Optional[dict] = None
-    
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
-    location_accuracy: Optional[float] = None
-    geolocation: Optional[dict] = None
-    
-
-    conversion_type: Optional[str] = None
-    conversion_label: Optional[str] = None
-    conversion_url: Optional[str] = None
-    conversion_rule_id: Optional[str] = None
-    conversion_value: Optional[float] = None
-    match_type: Optional[str] = None
-    pattern: Optional[str] = None
-    conversion_element: Optional[str] = None
-    conversion_selector: Optional[str] = None
-    element_text: Optional[str] = None
-    
-    time_spent_seconds: Optional[int] = None
-    is_visible: Optional[bool] = None
-    
-    event_name: Optional[str] = None
-    event_data: Optional[dict] = None
-    custom_event_type: Optional[str] = None
-    
-    platform: Optional[str] = None
-    campaign_id: Optional[str] = None
-    ad_id: Optional[str] = None
-    ad_format: Optional[str] = None
-    
-    class Config:
-        populate_by_name = True
-        extra = 'allow'
+from calculators.base import MemoizedCalculator
 
 
 class InternetAdsProcessor(BaseEventProcessor):
+    # grid region for events that carry no coordinates
+    DEFAULT_REGION = 'US'
+    SAMPLES_SESSIONS = True
+    
     @property
     def event_type(self) -> str:
         return "internet_ads"
     
     def validate_payload(self, payload: dict) -> dict:
-        validated = AdsEventPayload(**payload)
-        return validated.dict()
+        return AdsEventPayload.model_validate(payload).model_dump(exclude_none=True)
+    
+    def validate_batch(self, payloads: List[dict]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        return self._validate_batch_with(AdsEventBatch, payloads)
     
     def process(self, payload: dict) -> EventProcessingResult:
-        calculator = InternetAdsCalculator()
-
+        region = payload_regions([payload], self.DEFAULT_REGION)[0]
+        return self._process_one(payload, InternetAdsCalculator(), region)
+    
+    def process_batch(self, payloads: List[dict]) -> List[EventProcessingResult]:
+        # every impression of a platform, format, device and country costs the
+        # same; calculate each combination once per batch
+        calculator = MemoizedCalculator(InternetAdsCalculator())
+        regions = payload_regions(payloads, self.DEFAULT_REGION)
+        return [self._process_one(payload, calculator, region) for payload, region in zip(payloads, regions)]
+    
+    def _process_one(self, payload: dict, calculator, region: str) -> EventProcessingResult:
         utm_params = payload.get('utm_params', {})
 
         platform = self._extract_platform(utm_params)
@@ -100,41 +55,39 @@ class InternetAdsProcessor(BaseEventProcessor):
         
         ad_format = self._determine_ad_format(payload.get('event', 'page_view'))
         
-        device_type = self._detect_device_type(
-            payload.get('user_agent', ''),
-            payload.get('screen_resolution', '')
-        )
-        
-        country_code = 'US'
-        if payload.get('geolocation'):
-            country_code = 'US'
+        device_type = detect_device_type(payload.get('user_agent'), payload.get('screen_resolution'))
         
         calc_input = {
             'platform': platform,
             'ad_format': ad_format,
             'impressions': 1,  # Each event is one impression
             'device_type': device_type,
-            'country_code': country_code
+            'country_code': region
         }
         
         result = calculator.calculate(calc_input)
         
-        return EventProcessingResult(
-            kg_co2_emitted=Decimal(str(result['total_emissions_kg'])),
-            reference_id=payload['event_id'],
-            reference_type=f'internet_ads_{platform}',
-            metadata={
-                'event_type': payload.get('event'),
-                'campaign_id': campaign_id,
-                'ad_id': ad_id,
-                'platform': platform,
-                'ad_format': ad_format,
-                'device_type': device_type,
-                'utm_params': utm_params,
-                'page_url': payload.get('page_url'),
-                'breakdown': result['breakdown']
-            }
-        )
+        metadata = {
+            'event_type': payload.get('event'),
+            'campaign_id': campaign_id,
+            'ad_id': ad_id,
+            'platform': platform,
+            'ad_format': ad_format,
+            'device_type': device_type,
+            'region': region,
+            'utm_params': utm_params,
+            'page_url': payload.get('page_url'),
+            'breakdown': result['breakdown']
+        }
+        if payload.get('bot'):
+            metadata['bot'] = payload['bot']
+        
+        return self._scale_for_sampling(self._build_result(
+            Decimal(str(result['total_emissions_kg'])),
+            payload['event_id'],
+            f'internet_ads_{platform}',
+            metadata
+        ), payload)
     
     def _extract_platform(self, utm_params: dict) -> str:
         """Extract ad platform from UTM params"""
@@ -165,30 +118,6 @@ class InternetAdsProcessor(BaseEventProcessor):
             return 'video'
         else:
             return 'display'  # Default
-    
-    def _detect_device_type(self, user_agent: str, screen_resolution: str) -> str:
-        """Detect device type from user agent and screen resolution"""
-        if not user_agent:
-            return 'desktop'
-            
-        user_agent_lower = user_agent.lower()
-        
-        if 'mobile' in user_agent_lower or 'android' in user_agent_lower:
-            return 'mobile'
-        elif 'tablet' in user_agent_lower or 'ipad' in user_agent_lower:
-            return 'tablet'
-        
-        if screen_resolution:
-            try:
-                width = int(screen_resolution.split('x')[0])
-                if width < 768:
-                    return 'mobile'
-                elif width < 1024:
-                    return 'tablet'
-            except:
-                pass
-        
-        return 'desktop'
 
 
 # Register the unified processor
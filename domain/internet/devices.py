@@ -0,0 +1,91 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# distinct user agents remembered per process; traffic repeats a few thousand
+# strings, so nearly every lookup after warm-up is a hit
+UA_CACHE_SIZE = 8192
+
+# screen widths below these read as phones and tablets when the UA is silent
+MOBILE_MAX_WIDTH = 768
+TABLET_MAX_WIDTH = 1024
+
+# crawlers, headless browsers, HTTP libraries and uptime / load balancer /
+# datacenter health checks, as one alternation
+BOT_PATTERN = re.compile(
+    r'bot[/;-]|\bbot\b|crawl|spider|slurp|scrape|headless|lighthouse|pingdom|uptime|monitor|'
+    r'facebookexternalhit|preview|python-requests|python-urllib|curl/|wget/|go-http-client|'
+    r'java/|okhttp|axios/|node-fetch|libwww|httpclient|'
+    r'health-?check|googlehc|elb-healthchecker|route53|kube-probe|datadog|newrelic|statuscake|'
+    r'site24x7|nagios|zabbix|prometheus|gtmetrix',
+    re.IGNORECASE
+)
+TABLET_PATTERN = re.compile(r'ipad|tablet|kindle|silk/|playbook', re.IGNORECASE)
+MOBILE_PATTERN = re.compile(r'mobile|iphone|ipod|android|windows phone|blackberry|opera mini', re.IGNORECASE)
+ANDROID_PATTERN = re.compile(r'android', re.IGNORECASE)
+
+# first match wins: Edge, Opera and Samsung Internet also announce Chrome, and
+# Chrome announces Safari
+BROWSER_PATTERNS = (
+    ('edge', re.compile(r'edg(?:e|a|ios)?/', re.IGNORECASE)),
+    ('opera', re.compile(r'opr/|opera', re.IGNORECASE)),
+    ('samsung', re.compile(r'samsungbrowser/', re.IGNORECASE)),
+    ('chrome', re.compile(r'chrome/|crios/|chromium/', re.IGNORECASE)),
+    ('firefox', re.compile(r'firefox/|fxios/', re.IGNORECASE)),
+    ('safari', re.compile(r'safari/', re.IGNORECASE)),
+    ('ie', re.compile(r'msie |trident/', re.IGNORECASE)),
+)
+
+
+@dataclass(frozen=True)
+class UserAgentInfo:
+    device_type: str
+    browser_family: str
+    is_bot: bool
+
+
+@lru_cache(maxsize=UA_CACHE_SIZE)
+def classify_user_agent(user_agent: str) -> UserAgentInfo:
+    """Device type, browser family and bot flag of a raw UA string"""
+    if not user_agent or user_agent == 'Unknown':
+        return UserAgentInfo('desktop', 'other', False)
+
+    # Android tablets leave "Mobile" out of their UA; iPads include it
+    if TABLET_PATTERN.search(user_agent):
+        device = 'tablet'
+    elif MOBILE_PATTERN.search(user_agent):
+        is_android_tablet = ANDROID_PATTERN.search(user_agent) and 'mobile' not in user_agent.lower()
+        device = 'tablet' if is_android_tablet else 'mobile'
+    else:
+        device = 'desktop'
+
+    browser = next((family for family, pattern in BROWSER_PATTERNS if pattern.search(user_agent)), 'other')
+
+    return UserAgentInfo(device, browser, bool(BOT_PATTERN.search(user_agent)))
+
+
+def detect_device_type(user_agent: Optional[str], screen_resolution: Optional[str] = None) -> str:
+    """
+    Device type from the UA, refined by the screen width when the UA does not
+    name a phone or tablet.
+    """
+    device = classify_user_agent(user_agent or '').device_type
+    if device != 'desktop' or not screen_resolution:
+        return device
+
+    width = _screen_width(screen_resolution)
+    if width is None:
+        return device
+    if width < MOBILE_MAX_WIDTH:
+        return 'mobile'
+    if width < TABLET_MAX_WIDTH:
+        return 'tablet'
+    return 'desktop'
+
+
+def _screen_width(screen_resolution: str) -> Optional[int]:
+    try:
+        return int(screen_resolution.split('x')[0])
+    except ValueError:
+        return None
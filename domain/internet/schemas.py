@@ -0,0 +1,124 @@
+import hashlib
+from typing import List, Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+
+AGGREGATE_EVENT = 'aggregate'
+# event types an aggregate may count; conversions keep their per-event detail
+AGGREGATABLE_EVENTS = ('page_view', 'ping', 'click')
+
+
+class InternetEventPayload(BaseModel):
+    """Fields shared by every SDK event, whichever internet product the key tracks."""
+
+    model_config = ConfigDict(populate_by_name=True, extra='allow')
+
+    event: str = Field()
+    session_id: str
+    tracker_token: str
+    event_id: str
+    user_id: str
+    page_url: str
+    referrer: str = ""
+    timestamp: datetime
+    utm_params: dict = Field(default_factory=dict)
+
+    user_agent: Optional[str] = None
+    screen_resolution: Optional[str] = None
+    viewport_size: Optional[str] = None
+    language: Optional[str] = None
+    timezone: Optional[str] = None
+    page_title: Optional[str] = None
+
+    bytesPerPageView: Optional[int] = None
+    bytesPerClick: Optional[int] = None
+    bytesPerConversion: Optional[int] = None
+    encodedSize: Optional[int] = None
+    decodedSize: Optional[int] = None
+    resourceType: Optional[str] = None
+    trackingRequestBytes: Optional[int] = None
+    trackingRequestBody: Optional[int] = None
+    resourceCount: Optional[int] = None
+    resource_types: Optional[dict] = None
+
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_accuracy: Optional[float] = None
+    geolocation: Optional[dict] = None
+
+    conversion_type: Optional[str] = None
+    conversion_label: Optional[str] = None
+    conversion_url: Optional[str] = None
+    conversion_rule_id: Optional[str] = None
+    conversion_value: Optional[float] = None
+    match_type: Optional[str] = None
+    pattern: Optional[str] = None
+    conversion_element: Optional[str] = None
+    conversion_selector: Optional[str] = None
+    element_text: Optional[str] = None
+
+    time_spent_seconds: Optional[int] = None
+    is_visible: Optional[bool] = None
+
+    event_name: Optional[str] = None
+    event_data: Optional[dict] = None
+    custom_event_type: Optional[str] = None
+
+
+class SDKEventPayload(InternetEventPayload):
+    queuedAt: Optional[int] = None
+
+    # event == 'aggregate': `count` events of type `aggregate_event` on page_url,
+    # `total_bytes` between them, during the window starting at window_start
+    aggregate_event: Optional[str] = None
+    count: Optional[int] = None
+    total_bytes: Optional[int] = None
+    window_start: Optional[datetime] = None
+    window_seconds: Optional[int] = None
+
+    @model_validator(mode='before')
+    @classmethod
+    def _aggregate_event_id(cls, data):
+        # aggregates are identified by their window, not by a client event_id
+        if isinstance(data, dict) and data.get('event') == AGGREGATE_EVENT and not data.get('event_id'):
+            data = {**data, 'event_id': ''}
+        return data
+
+    @model_validator(mode='after')
+    def _normalize_aggregate(self):
+        if self.event != AGGREGATE_EVENT:
+            return self
+        if self.aggregate_event not in AGGREGATABLE_EVENTS:
+            raise ValueError(f"aggregate_event must be one of {', '.join(AGGREGATABLE_EVENTS)}")
+        if not self.count or self.count < 1:
+            raise ValueError("count must be a positive integer")
+        window_seconds = self.window_seconds or 60
+        if not 1 <= window_seconds <= 3600:
+            raise ValueError("window_seconds must be between 1 and 3600")
+
+        window_start = self.window_start or self.timestamp
+        if window_start.tzinfo is None:
+            window_start = window_start.replace(tzinfo=timezone.utc)
+        epoch = int(window_start.timestamp())
+        self.window_start = datetime.fromtimestamp(epoch - epoch % window_seconds, timezone.utc)
+        self.window_seconds = window_seconds
+        self.event_id = aggregate_reference(self.session_id, self.aggregate_event, self.page_url, self.window_start)
+        return self
+
+
+def aggregate_reference(session_id: str, aggregate_event: str, page_url: str, window_start: datetime) -> str:
+    """Idempotency key of an aggregate: one per session, window, counted event and URL"""
+    url_digest = hashlib.blake2b(page_url.encode('utf-8'), digest_size=8).hexdigest()
+    return f"agg:{session_id}:{aggregate_event}:{window_start:%Y%m%dT%H%M%S}:{url_digest}"
+
+
+class AdsEventPayload(InternetEventPayload):
+    platform: Optional[str] = None
+    campaign_id: Optional[str] = None
+    ad_id: Optional[str] = None
+    ad_format: Optional[str] = None
+
+
+# Built once at import: the validators are compiled when the adapter is created
+SDKEventBatch = TypeAdapter(List[SDKEventPayload])
+AdsEventBatch = TypeAdapter(List[AdsEventPayload])
@@ -1,85 +1,47 @@
 from decimal import Decimal
-from typing import Dict, Any, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from domain.base import BaseEventProcessor, EventProcessingResult
 from domain.registry import EventProcessorRegistry
+from domain.internet.schemas import AGGREGATE_EVENT, SDKEventPayload, SDKEventBatch
+from domain.internet.devices import detect_device_type
+from core.services.geolocation import payload_regions
+from calculators.base import MemoizedCalculator
 from calculators.internet_website import InternetWebsiteCalculator
 
 
-class SDKEventPayload(BaseModel):
-    event: str = Field()
-    session_id: str
-    tracker_token: str
-    event_id: str
-    user_id: str
-    page_url: str
-    referrer: str = ""
-    timestamp: datetime
-    utm_params: dict = Field(default_factory=dict)
-    
-    user_agent: Optional[str] = None
-    screen_resolution: Optional[str] = None
-    viewport_size: Optional[str] = None
-    language: Optional[str] = None
-    timezone: Optional[str] = None
-    page_title: Optional[str] = None
-    
-    bytesPerPageView: Optional[int] = None
-    bytesPerClick: Optional[int] = None
-    bytesPerConversion: Optional[int] = None
-    encodedSize: Optional[int] = None
-    decodedSize: Optional[int] = None
-    resourceType: Optional[str] = None
-    trackingRequestBytes: Optional[int] = None
-    trackingRequestBody: Optional[int] = None
-    resourceCount: Optional[int] = None
-    resource_types: Optional[dict] = None
-    
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
-    location_accuracy: Optional[float] = None
-    geolocation: Optional[dict] = None
-    
-    conversion_type: Optional[str] = None
-    conversion_label: Optional[str] = None
-    conversion_url: Optional[str] = None
-    conversion_rule_id: Optional[str] = None
-    conversion_value: Optional[float] = None
-    match_type: Optional[str] = None
-    pattern: Optional[str] = None
-    conversion_element: Optional[str] = None
-    conversion_selector: Optional[str] = None
-    element_text: Optional[str] = None
-    
-    time_spent_seconds: Optional[int] = None
-    is_visible: Optional[bool] = None
-    
-    event_name: Optional[str] = None
-    event_data: Optional[dict] = None
-    custom_event_type: Optional[str] = None
-    
-    queuedAt: Optional[int] = None
-    
-    class Config:
-        populate_by_name = True
-        extra = 'allow'
-
-
 class InternetWebProcessor(BaseEventProcessor):
+    # grid region for events that carry no coordinates
+    DEFAULT_REGION = 'US'
+    SAMPLES_SESSIONS = True
+    
     @property
     def event_type(self) -> str:
         return "internet_web"
     
     def validate_payload(self, payload: dict) -> dict:
-        validated = SDKEventPayload(**payload)
-        return validated.dict()
+        return SDKEventPayload.model_validate(payload).model_dump(exclude_none=True)
+    
+    def validate_batch(self, payloads: List[dict]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        return self._validate_batch_with(SDKEventBatch, payloads)
     
     def process(self, payload: dict) -> EventProcessingResult:
-        calculator = InternetWebsiteCalculator()
-        
+        region = payload_regions([payload], self.DEFAULT_REGION)[0]
+        return self._process_one(payload, InternetWebsiteCalculator(), region)
+    
+    def process_batch(self, payloads: List[dict]) -> List[EventProcessingResult]:
+        # page views with default sizes share their calculation across the
+        # batch; regions are resolved in one lookup
+        calculator = MemoizedCalculator(InternetWebsiteCalculator())
+        regions = payload_regions(payloads, self.DEFAULT_REGION)
+        return [self._process_one(payload, calculator, region) for payload, region in zip(payloads, regions)]
+    
+    def _process_one(self, payload: dict, calculator, region: str) -> EventProcessingResult:
         event_subtype = payload.get('event', 'page_view')
         
+        if event_subtype == AGGREGATE_EVENT:
+            return self._process_aggregate(payload, calculator, region)
+        
         bytes_transferred = self._get_bytes_transferred(payload, event_subtype)
 
         if bytes_transferred == 0:
@@ -87,28 +49,62 @@ class InternetWebProcessor(BaseEventProcessor):
         
         avg_page_size_mb = bytes_transferred / (1024 * 1024)
         
-        device_type = self._detect_device_type(
-            payload.get('user_agent', ''),
-            payload.get('screen_resolution', '')
-        )
+        device_type = detect_device_type(payload.get('user_agent'), payload.get('screen_resolution'))
         
         calc_input = {
             'bytes_transferred': bytes_transferred,
             'device_type': device_type,
-            'country_code': 'US',  
+            'country_code': region,
             'session_duration_minutes': self._get_session_duration(payload, event_subtype)
         }
         
         result = calculator.calculate(calc_input)
         
-        metadata = self._build_metadata(payload, event_subtype, device_type, bytes_transferred, avg_page_size_mb, result)
+        metadata = self._build_metadata(payload, event_subtype, device_type, region, bytes_transferred, avg_page_size_mb, result)
+        
+        return self._scale_for_sampling(self._build_result(
+            Decimal(str(result['total_emissions_kg'])),
+            payload['event_id'],
+            f'internet_web_{event_subtype}',
+            metadata
+        ), payload)
+    
+    def _process_aggregate(self, payload: dict, calculator, region: str) -> EventProcessingResult:
+        """One ledger entry for `count` events of one session, URL and window"""
+        counted = payload['aggregate_event']
+        count = payload['count']
+        bytes_transferred = payload.get('total_bytes') or self._get_default_bytes(counted) * count
+        
+        device_type = detect_device_type(payload.get('user_agent'), payload.get('screen_resolution'))
+        if counted == 'ping':
+            session_duration = payload.get('time_spent_seconds', 0) / 60.0
+        else:
+            session_duration = self._get_session_duration(payload, counted) * count
         
-        return EventProcessingResult(
-            kg_co2_emitted=Decimal(str(result['total_emissions_kg'])),
-            reference_id=payload['event_id'],
-            reference_type=f'internet_web_{event_subtype}',
-            metadata=metadata
+        result = calculator.calculate({
+            'bytes_transferred': bytes_transferred,
+            'device_type': device_type,
+            'country_code': region,
+            'session_duration_minutes': session_duration
+        })
+        
+        metadata = self._build_metadata(
+            payload, AGGREGATE_EVENT, device_type, region, bytes_transferred,
+            bytes_transferred / count / (1024 * 1024), result
         )
+        metadata['aggregate'] = {
+            'event': counted,
+            'count': count,
+            'window_start': self._as_datetime(payload['window_start']).isoformat(),
+            'window_seconds': payload['window_seconds'],
+        }
+        
+        return self._scale_for_sampling(self._build_result(
+            Decimal(str(result['total_emissions_kg'])),
+            payload['event_id'],
+            f'internet_web_{AGGREGATE_EVENT}',
+            metadata
+        ), payload)
     
     def _get_bytes_transferred(self, payload: dict, event_subtype: str) -> int:
         """Extract bytes transferred based on event type"""
@@ -145,31 +141,7 @@ class InternetWebProcessor(BaseEventProcessor):
         else:
             return 1.0  # Default 1 minute
     
-    def _detect_device_type(self, user_agent: str, screen_resolution: str) -> str:
-        """Detect device type from user agent and screen resolution"""
-        if not user_agent:
-            return 'desktop'
-            
-        user_agent_lower = user_agent.lower()
-        
-        if 'mobile' in user_agent_lower or 'android' in user_agent_lower:
-            return 'mobile'
-        elif 'tablet' in user_agent_lower or 'ipad' in user_agent_lower:
-            return 'tablet'
-        
-        if screen_resolution:
-            try:
-                width = int(screen_resolution.split('x')[0])
-                if width < 768:
-                    return 'mobile'
-                elif width < 1024:
-                    return 'tablet'
-            except:
-                pass
-        
-        return 'desktop'
-    
-    def _build_metadata(self, payload: dict, event_subtype: str, device_type: str, 
+    def _build_metadata(self, payload: dict, event_subtype: str, device_type: str, region: str,
                        bytes_transferred: int, avg_page_size_mb: float, calc_result: dict) -> dict:
         """Build metadata object based on event type"""
         
@@ -180,8 +152,9 @@ class InternetWebProcessor(BaseEventProcessor):
             'page_url': payload['page_url'],
             'referrer': payload.get('referrer'),
             'device_type': device_type,
+            'region': region,
             'utm_params': payload.get('utm_params', {}),
-            'timestamp': payload['timestamp'].isoformat(),
+            'timestamp': self._as_datetime(payload['timestamp']).isoformat(),
             'breakdown': calc_result['breakdown'],
             'bytes_transferred': bytes_transferred,
             'page_size_mb': avg_page_size_mb,
@@ -198,6 +171,8 @@ class InternetWebProcessor(BaseEventProcessor):
             metadata['timezone'] = payload['timezone']
         if payload.get('geolocation'):
             metadata['geolocation'] = payload['geolocation']
+        if payload.get('bot'):
+            metadata['bot'] = payload['bot']
         
         # Add event-specific metadata
         if event_subtype == 'conversion':
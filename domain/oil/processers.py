@@ -1,9 +1,10 @@
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from domain.base import BaseEventProcessor, EventProcessingResult
 from domain.registry import EventProcessorRegistry
+from calculators.base import MemoizedCalculator
 from calculators.oil_gas_lubricant import OilGasLubricantCalculator
 
 
@@ -30,32 +31,40 @@ class OilEventPayload(BaseModel):
 
 
 class OilGasLubricantProcessor(BaseEventProcessor):
+    REFERENCE_FIELD = 'run_id'
+    
     @property
     def event_type(self) -> str:
         return "oil_gas_lubricant"
     
     def validate_payload(self, payload: dict) -> dict:
-        validated = OilEventPayload(**payload)
-        return validated.dict()
+        return OilEventPayload.model_validate(payload).model_dump()
     
     def process(self, payload: dict) -> EventProcessingResult:
-        calculator = OilGasLubricantCalculator()
-        
+        return self._process_one(payload, OilGasLubricantCalculator())
+    
+    def process_batch(self, payloads: List[dict]) -> List[EventProcessingResult]:
+        # machines report the same volumes run after run
+        calculator = MemoizedCalculator(OilGasLubricantCalculator())
+        return [self._process_one(payload, calculator) for payload in payloads]
+    
+    def _process_one(self, payload: dict, calculator) -> EventProcessingResult:
         # Calculate emissions
         result = calculator.calculate({
             'volume_liters': payload['volume_liters']
         })
         
+        started_at = self._as_datetime(payload['started_at'])
+        ended_at = self._as_datetime(payload['ended_at'])
+        
         # Calculate duration
-        duration_seconds = (
-            payload['ended_at'] - payload['started_at']
-        ).total_seconds()
+        duration_seconds = (ended_at - started_at).total_seconds()
         
-        return EventProcessingResult(
-            kg_co2_emitted=Decimal(str(result['total_emissions_kg'])),
-            reference_id=payload['run_id'],
-            reference_type='oil_gas_lubricant_run',
-            metadata={
+        return self._build_result(
+            Decimal(str(result['total_emissions_kg'])),
+            payload['run_id'],
+            'oil_gas_lubricant_run',
+            {
                 'machine_id': payload['machine_id'],
                 'machine_type': payload['machine_type'],
                 'location': payload['location'],
@@ -63,8 +72,8 @@ class OilGasLubricantProcessor(BaseEventProcessor):
                 'duration_seconds': duration_seconds,
                 'fuel_type': payload.get('fuel_type'),
                 'efficiency_rating': payload.get('efficiency_rating'),
-                'started_at': payload['started_at'].isoformat(),
-                'ended_at': payload['ended_at'].isoformat(),
+                'started_at': started_at.isoformat(),
+                'ended_at': ended_at.isoformat(),
                 'breakdown': result['breakdown']
             }
         )